@@ -0,0 +1,86 @@
+"""merge duplicate stored files
+
+Databases created before deduplication may hold several storages rows with the same
+content_hash, which prevent the unique index on content_hash from being created. Each
+group is merged into its oldest row: every column referencing storages.uuid
+(applications' CV and cover letter, candidates' CV and avatar...) is repointed to it,
+its reference_count becomes the sum of the merged rows, and the other rows are deleted.
+Their Cloudinary copies are left in place and logged. Rows without a content_hash are
+not touched.
+
+The migration runs before the autogenerated revision on every migration, so it does
+nothing once the rows are merged, nor on a database whose tables are not created yet.
+
+Revision ID: b7e4c2d91a30
+Revises:
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4c2d91a30'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+STORAGES = "storages"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if STORAGES not in inspector.get_table_names():
+        return
+    columns = {column["name"] for column in inspector.get_columns(STORAGES)}
+    if "content_hash" not in columns:
+        return
+    if "reference_count" not in columns:
+        op.add_column(STORAGES, sa.Column("reference_count", sa.Integer(), nullable=False, server_default="1"))
+
+    storages = sa.table(
+        STORAGES,
+        sa.column("uuid"), sa.column("content_hash"), sa.column("reference_count"), sa.column("public_id"), sa.column("date_added"),
+    )
+    references = [
+        sa.table(table_name, sa.column(column_name)).c[column_name]
+        for table_name in inspector.get_table_names()
+        for foreign_key in inspector.get_foreign_keys(table_name)
+        if foreign_key["referred_table"] == STORAGES and foreign_key["referred_columns"] == ["uuid"]
+        for column_name in foreign_key["constrained_columns"]
+    ]
+    duplicate_hashes = bind.execute(
+        sa.select(storages.c.content_hash)
+        .where(storages.c.content_hash.isnot(None))
+        .group_by(storages.c.content_hash)
+        .having(sa.func.count() > 1)
+    ).scalars().all()
+
+    for content_hash in duplicate_hashes:
+        kept, *duplicates = bind.execute(
+            sa.select(storages.c.uuid, storages.c.reference_count, storages.c.public_id)
+            .where(storages.c.content_hash == content_hash)
+            .order_by(storages.c.date_added, storages.c.uuid)
+        ).all()
+        duplicate_uuids = [row.uuid for row in duplicates]
+        for column in references:
+            bind.execute(sa.update(column.table).where(column.in_(duplicate_uuids)).values({column.name: kept.uuid}))
+        bind.execute(
+            sa.update(storages)
+            .where(storages.c.uuid == kept.uuid)
+            .values(reference_count=sum(row.reference_count or 1 for row in (kept, *duplicates)))
+        )
+        bind.execute(sa.delete(storages).where(storages.c.uuid.in_(duplicate_uuids)))
+        logger.info(f"Files {duplicate_uuids} merged into {kept.uuid}; Cloudinary copies left: {[row.public_id for row in duplicates]}")
+
+
+def downgrade() -> None:
+    # Merged rows cannot be restored
+    pass
@@ -20,6 +20,8 @@ from app.main.core.i18n import add_process_language_header
 from app.main.core.security import decode_access_token
 from app.main.models.db.session import SessionLocal
 from app.main.schedulers import scheduler
+from app.main.analysis.model_registry import ModelNotFound, model_registry
+from app.main.controllers.analyse_controller import model_not_found_handler
 
 
 security = HTTPBasic()
@@ -41,6 +43,7 @@ app = FastAPI(
 )
 
 app.include_router(api_router, prefix=Config.API_V1_STR)
+app.add_exception_handler(ModelNotFound, model_not_found_handler)
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
 app.add_middleware(EventHandlerASGIMiddleware, handlers=[local_handler])
@@ -136,3 +139,5 @@ async def welcome():
 @app.on_event("startup")
 def startup_event():
     scheduler.start()
+    if Config.ML_PRELOAD_MODEL:
+        model_registry.warm_up()
@@ -0,0 +1,147 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from app.main.analysis.model_registry import LoadedModel
+from app.main.utils import logger
+
+
+class MicroBatcher:
+    """
+    Regroupe les demandes de prédiction concurrentes en un seul appel au modèle.
+
+    Chaque demande dépose sa matrice dans une file ; un thread de travail attend la
+    première demande, collecte les suivantes pendant au plus `max_wait_ms` ou jusqu'à
+    `max_batch_size` lignes, lance une prédiction unique sur la matrice concaténée puis
+    renvoie à chaque demande la tranche de résultats qui lui revient.
+
+    Une demande est prédite par le modèle avec lequel sa matrice a été construite : pendant
+    une activation, les demandes collectées ensemble peuvent viser deux modèles (et deux
+    nombres de colonnes), elles sont alors regroupées par modèle et largeur de matrice.
+    """
+
+    def __init__(self, model_provider: Callable[[], LoadedModel], max_batch_size: int = 4096, max_wait_ms: float = 5):
+        self.model_provider = model_provider
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            "requests": 0,
+            "batches": 0,
+            "rows": 0,
+            "last_batch_size": 0,
+            "max_batch_size_seen": 0,
+            "errors": 0,
+        }
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+                self._thread.start()
+
+    def predict(self, X: np.ndarray, loaded_model: Optional[LoadedModel] = None) -> Tuple[np.ndarray, str]:
+        """
+        Prédit les lignes de X avec `loaded_model`, par défaut le modèle actif ; retourne (prédictions, version du modèle).
+        """
+        probabilities, classes, version = self.predict_proba(X, loaded_model)
+        return classes.take(np.argmax(probabilities, axis=1)), version
+
+    def predict_proba(self, X: np.ndarray, loaded_model: Optional[LoadedModel] = None) -> Tuple[np.ndarray, np.ndarray, str]:
+        """
+        Probabilités de chaque classe pour les lignes de X, avec `loaded_model` (celui qui a servi
+        à construire X), par défaut le modèle actif ; retourne (probabilités, classes, version du modèle).
+        """
+        if loaded_model is None:
+            loaded_model = self.model_provider()
+        if len(X) == 0:
+            classes = model_classes(loaded_model.model)
+            return np.empty((0, len(classes))), classes, loaded_model.version
+        self._ensure_started()
+        future = Future()
+        self._queue.put((X, loaded_model, future))
+        return future.result()
+
+    def _collect(self):
+        requests = [self._queue.get()]
+        rows = len(requests[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            requests.append(request)
+            rows += len(request[0])
+        return requests, rows
+
+    def _run(self):
+        while True:
+            requests, _ = self._collect()
+            groups = {}
+            for request in requests:
+                X, loaded_model, _ = request
+                groups.setdefault((id(loaded_model.model), X.shape[1]), []).append(request)
+            for group in groups.values():
+                self._predict_group(group)
+
+    def _predict_group(self, requests):
+        loaded_model = requests[0][1]
+        rows = sum(len(X) for X, _, _ in requests)
+        try:
+            X = requests[0][0] if len(requests) == 1 else np.concatenate([X for X, _, _ in requests])
+            # La classe prédite se déduit des probabilités : un seul parcours des arbres
+            probabilities = loaded_model.model.predict_proba(X)
+            classes = model_classes(loaded_model.model)
+        except Exception as e:
+            logger.error(f"Batched prediction failed: {e}")
+            with self._metrics_lock:
+                self._metrics["errors"] += 1
+            for _, _, future in requests:
+                future.set_exception(e)
+            return
+
+        offset = 0
+        for X, _, future in requests:
+            future.set_result((probabilities[offset:offset + len(X)], classes, loaded_model.version))
+            offset += len(X)
+
+        with self._metrics_lock:
+            self._metrics["requests"] += len(requests)
+            self._metrics["batches"] += 1
+            self._metrics["rows"] += rows
+            self._metrics["last_batch_size"] = rows
+            self._metrics["max_batch_size_seen"] = max(self._metrics["max_batch_size_seen"], rows)
+
+    def metrics(self) -> dict:
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+        metrics["queue_depth"] = self._queue.qsize()
+        metrics["average_batch_size"] = metrics["rows"] / metrics["batches"] if metrics["batches"] else 0
+        metrics["average_requests_per_batch"] = metrics["requests"] / metrics["batches"] if metrics["batches"] else 0
+        metrics["max_batch_size"] = self.max_batch_size
+        metrics["max_wait_ms"] = self.max_wait * 1000
+        return metrics
+
+
+def model_n_features(model, default: int) -> int:
+    """Nombre de colonnes attendues par le modèle, `default` s'il ne l'indique pas."""
+    return getattr(model, "n_features_in_", None) or default
+
+
+def model_classes(model) -> np.ndarray:
+    """Classes du modèle, dans l'ordre des colonnes de predict_proba (scikit-learn ou forêt aplatie)."""
+    classes = getattr(model, "classes_", None)
+    return np.asarray(model.classes if classes is None else classes)
@@ -0,0 +1,199 @@
+"""
+Micro-benchmarks du pipeline d'analyse.
+
+Usage :
+    python -m app.main.analysis.benchmarks [features] [forest] [intervals] [sourcing]
+"""
+import argparse
+import pickle
+import random
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from sklearn.preprocessing import LabelEncoder
+
+from app.main.analysis.features import build_feature_matrix, experience_years
+from app.main.analysis.forest_runtime import FlatForest
+from app.main.analysis.intervals import experience_days
+from app.main.analysis.text_index import TfidfIndex, term_counts, tokenize
+
+
+MODEL_PATH = "app/main/models/ml_model.pkl"
+
+TITLES = [
+    "Développeur Backend", "Développeur CDI Angular", "Data Scientist", "Freelance Designer UI/UX",
+    "Ingénieur DevOps", "Chef de Projet IT", "Stage Comptable", "Responsable RH CDD",
+]
+
+
+def synthetic_candidates(n: int, seed: int = 42):
+    """Génère n candidats factices au format produit par prepare_candidates_data."""
+    rng = random.Random(seed)
+    return [
+        {
+            "uuid": str(i),
+            "experience": rng.sample(TITLES, rng.randint(0, 4)),
+            "years_of_experience": rng.randint(0, 15),
+            "job_title": "Développeur Backend",
+        }
+        for i in range(n)
+    ]
+
+
+def legacy_transform_for_model(candidate_data, job_offer_data):
+    """Implémentation de référence (boucle Python), conservée pour comparaison."""
+    X = []
+    label_encoder = LabelEncoder()
+    for candidate in candidate_data:
+        experience_matches = any(
+            job_offer_data["employment_type"].lower() in job_title.lower() for job_title in candidate["experience"]
+        )
+        label_encoder.fit_transform([candidate["job_title"]])
+        X.append([candidate["years_of_experience"], job_offer_data["salary"], experience_matches])
+    return np.array(X)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def bench_features(sizes=(10_000, 100_000)):
+    with open(MODEL_PATH, "rb") as f:
+        model = pickle.load(f)
+    job_offer_data = {"salary": 350000.0, "employment_type": "CDI"}
+
+    for n in sizes:
+        candidate_data = synthetic_candidates(n)
+        X_legacy, legacy_time = timed(legacy_transform_for_model, candidate_data, job_offer_data)
+        X_new, new_time = timed(build_feature_matrix, candidate_data, job_offer_data)
+
+        assert np.array_equal(X_legacy, X_new), "feature matrices differ"
+        assert np.array_equal(model.predict(X_legacy), model.predict(X_new)), "predictions differ"
+
+        print(f"features n={n}: legacy={legacy_time * 1000:.1f} ms, vectorized={new_time * 1000:.1f} ms, "
+              f"speedup=x{legacy_time / new_time:.1f}")
+
+
+def allocated(func, *args):
+    """Exécute func et retourne (résultat, octets restés alloués)."""
+    tracemalloc.start()
+    result = func(*args)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def latency_ms(func, X, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(X)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def bench_forest(batch_sizes=(1, 100, 10_000)):
+    def load_sklearn():
+        with open(MODEL_PATH, "rb") as f:
+            return pickle.load(f)
+
+    def load_flat(arrays):
+        return FlatForest.from_arrays({name: array.copy() for name, array in arrays.items()})
+
+    model, sklearn_bytes = allocated(load_sklearn)
+    forest, flat_bytes = allocated(load_flat, FlatForest.from_sklearn(model).to_arrays())
+    print(f"forest memory: sklearn={sklearn_bytes / 1024:.0f} KiB, flat={flat_bytes / 1024:.0f} KiB")
+
+    job_offer_data = {"salary": 350000.0, "employment_type": "CDI"}
+    for n in batch_sizes:
+        X = build_feature_matrix(synthetic_candidates(n), job_offer_data)
+        assert np.array_equal(model.predict(X), forest.predict(X)), "predictions differ"
+        repeat = max(1, 2000 // n)
+        print(f"forest n={n}: sklearn={latency_ms(model.predict, X, repeat):.2f} ms, "
+              f"flat={latency_ms(forest.predict, X, repeat):.2f} ms")
+
+
+def synthetic_experiences(n_rows: int, n_candidates: int, seed: int = 42):
+    """Génère n_rows expériences factices (candidat, début, fin) réparties sur n_candidates candidats."""
+    rng = random.Random(seed)
+    base = date(2000, 1, 1)
+    experiences = []
+    for _ in range(n_rows):
+        start = base + timedelta(days=rng.randint(0, 9000))
+        end = rng.choice([None, "Present", (start + timedelta(days=rng.randint(0, 2500))).isoformat()])
+        experiences.append((rng.randrange(n_candidates), start.isoformat(), end))
+    experiences.sort(key=lambda experience: experience[0])
+    return experiences
+
+
+def legacy_experience_years(experiences, n_candidates, today):
+    """Implémentation de référence : strptime ligne par ligne et années pleines additionnées, chevauchements compris."""
+    years = [0] * n_candidates
+    for candidate, start_date, end_date in experiences:
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = today if end_date in (None, "", "Present") else datetime.strptime(end_date, "%Y-%m-%d").date()
+        years[candidate] += (end - start).days // 365
+    return years
+
+
+def bench_intervals(n_rows=1_000_000):
+    n_candidates = n_rows // 3
+    today = date.today()
+    experiences = synthetic_experiences(n_rows, n_candidates)
+
+    legacy, legacy_time = timed(legacy_experience_years, experiences, n_candidates, today)
+    owners, start_dates, end_dates = zip(*experiences)
+    days, new_time = timed(experience_days, owners, start_dates, end_dates, n_candidates, today)
+    overlapping = int(np.count_nonzero(experience_years(days) != np.asarray(legacy)))
+
+    print(f"intervals rows={n_rows}: legacy={legacy_time * 1000:.0f} ms, vectorized (with merging)={new_time * 1000:.0f} ms, "
+          f"speedup=x{legacy_time / new_time:.1f}, candidates whose years change once overlaps are merged={overlapping}/{n_candidates}")
+
+
+def synthetic_term_documents(n: int, vocabulary_size: int = 5000, terms_per_document: int = 15, seed: int = 42):
+    """Génère n documents candidats (clé, termes, groupe) dont les termes suivent une loi de Zipf."""
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([f"skill{i}" for i in range(vocabulary_size)] + list(tokenize(" ".join(TITLES))))
+    probabilities = 1 / np.arange(1, len(vocabulary) + 1)
+    words = rng.choice(len(vocabulary), size=(n, terms_per_document), p=probabilities / probabilities.sum())
+    documents = []
+    for i, row in enumerate(words):
+        terms, counts = np.unique(row, return_counts=True)
+        documents.append((("candidate", str(i)), dict(zip(vocabulary[terms].tolist(), counts.tolist())), "candidate"))
+    return documents
+
+
+def bench_sourcing(n_candidates=500_000, queries=20):
+    documents = synthetic_term_documents(n_candidates)
+    index = TfidfIndex()
+    _, build_time = timed(lambda: [index.add_many(documents[i:i + 2000]) for i in range(0, n_candidates, 2000)])
+    offer_terms = term_counts(["Développeur Backend Python Django API REST", "skill3 skill10 skill250 devops"])
+    index.add(("offer", "o"), offer_terms, group="offer")
+    _, snapshot_time = timed(index.search, ("offer", "o"), 20, "candidate")
+
+    latencies = []
+    for i in range(queries):
+        # Une écriture candidat entre deux recherches, comme en production
+        index.add(("candidate", f"new-{i}"), documents[i][1], group="candidate")
+        _, latency = timed(index.search, ("offer", "o"), 20, "candidate")
+        latencies.append(latency * 1000)
+    print(f"sourcing n={n_candidates}: index build={build_time:.1f} s, snapshot={snapshot_time * 1000:.0f} ms, "
+          f"top-20 search p50={np.percentile(latencies, 50):.1f} ms, max={max(latencies):.1f} ms")
+
+
+BENCHMARKS = {
+    "features": bench_features,
+    "forest": bench_forest,
+    "intervals": bench_intervals,
+    "sourcing": bench_sourcing,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks du pipeline d'analyse")
+    parser.add_argument("names", nargs="*", metavar="name", help=f"parmi : {', '.join(BENCHMARKS)}")
+    args = parser.parse_args()
+    for name in args.names or list(BENCHMARKS):
+        BENCHMARKS[name]()
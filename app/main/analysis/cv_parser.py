@@ -0,0 +1,141 @@
+"""
+Découpage du texte extrait des CV en sections (expériences, formation, compétences).
+
+Le texte est normalisé une fois (minuscules, sans accents), les titres de section sont
+repérés par une seule expression régulière précompilée, puis chaque section est analysée
+par des heuristiques simples : périodes datées pour les expériences, niveau de diplôme
+pour la formation, liste à puces ou à virgules pour les compétences. Les durées de tous
+les CV d'un lot sont fusionnées en un seul calcul vectorisé.
+"""
+import re
+import unicodedata
+from datetime import date
+from typing import List, Optional
+
+import numpy as np
+
+from app.main.analysis.features import diploma_level, normalize_title
+from app.main.analysis.intervals import DAY, merge_intervals
+
+
+EXPERIENCE_SECTION = "experience"
+EDUCATION_SECTION = "education"
+SKILLS_SECTION = "skills"
+OTHER_SECTION = "other"
+
+# Une ligne de titre : éventuelle numérotation ou puce, l'intitulé, éventuellement « : »
+SECTION_HEADINGS = re.compile(
+    r"^[ \t]*(?:[0-9ivx]+[.)][ \t]*|[-*#>][ \t]*)?(?:"
+    r"(?P<experience>(?:experiences?|parcours)(?:[ \t]+professionnel(?:le)?s?)?|work[ \t]+experience|professional[ \t]+experience|employment(?:[ \t]+history)?|emplois?)"
+    r"|(?P<education>formations?(?:[ \t]+academiques?)?|education|etudes|diplomes?(?:[ \t]+et[ \t]+formations?)?|cursus(?:[ \t]+academique)?|academic[ \t]+background)"
+    r"|(?P<skills>competences?(?:[ \t]+(?:techniques|cles|professionnelles))?|(?:technical[ \t]+|key[ \t]+)?skills|savoir[ \t-]+faire|outils|technologies)"
+    # Autres rubriques courantes : elles ne sont pas analysées mais terminent la section précédente
+    r"|(?P<other>langues?|languages?|loisirs|centres?[ \t]+d'?interets?|interests|hobbies|references|certifications?|projets?|projects|profil|profile|resume|summary|contact|informations?[ \t]+personnelles)"
+    r")[ \t]*:?[ \t]*$",
+    re.MULTILINE,
+)
+
+# Période « 2015 - 2018 », « 03/2019 – présent », « sept. 2020 à aujourd'hui »…
+_YEAR = r"(?:(?P<{0}_month>[01]?[0-9])[/.-])?(?P<{0}_year>(?:19|20)[0-9]{{2}})"
+DATE_RANGES = re.compile(
+    _YEAR.format("start")
+    + r"[ \t]*(?:-|a|au|to|until|jusqu'?a)[ \t]*(?:"
+    + _YEAR.format("end")
+    + r"|(?P<ongoing>present|aujourd'?hui|ce[ \t]+jour|now|current|en[ \t]+cours|actuel(?:lement)?))"
+)
+
+_SKILL_SEPARATORS = re.compile(r"[\n,;|•·▪●◦]+|(?:^|\n)[ \t]*[-*][ \t]+")
+_DASHES = str.maketrans({"–": "-", "—": "-", "‑": "-", "‒": "-", "’": "'"})
+
+MAX_SKILLS = 50
+MAX_SKILL_WORDS = 4
+
+
+def normalize_text(text: str) -> str:
+    """Met un texte en minuscules et sans accents, en gardant les retours à la ligne."""
+    text = unicodedata.normalize("NFKD", (text or "").translate(_DASHES))
+    return text.encode("ascii", "ignore").decode("ascii").lower()
+
+
+def split_sections(text: str) -> dict:
+    """
+    Sections d'un texte normalisé, {section: texte} ; le texte d'une section s'étend jusqu'au titre suivant.
+
+    Une section présente plusieurs fois (expériences puis stages, par exemple) est concaténée.
+    """
+    sections = {}
+    headings = list(SECTION_HEADINGS.finditer(text))
+    for heading, following in zip(headings, headings[1:] + [None]):
+        body = text[heading.end():following.start() if following else len(text)]
+        if heading.lastgroup != OTHER_SECTION:
+            sections[heading.lastgroup] = sections.get(heading.lastgroup, "") + body
+    return sections
+
+
+def parse_skills(section: str) -> List[str]:
+    """Compétences d'une liste à puces, à virgules ou ligne par ligne, normalisées et sans doublon."""
+    skills = {}
+    for item in _SKILL_SEPARATORS.split(section):
+        skill = normalize_title(item)
+        if skill and len(skill.split()) <= MAX_SKILL_WORDS:
+            skills.setdefault(skill, None)
+            if len(skills) == MAX_SKILLS:
+                break
+    return list(skills)
+
+
+def _month(year: str, month) -> Optional[np.datetime64]:
+    month = int(month)
+    return np.datetime64(f"{year}-{month:02d}", "M") if 1 <= month <= 12 else None
+
+
+def parse_cvs(texts: List[Optional[str]], today: date = None) -> List[dict]:
+    """
+    Analyse le texte de plusieurs CV.
+
+    Returns:
+        list: Pour chaque CV, un dictionnaire avec les sections trouvées, le nombre
+        d'expériences datées, les mois d'expérience (périodes chevauchantes comptées
+        une fois, périodes en cours jusqu'à aujourd'hui), le niveau de diplôme le plus
+        élevé de la section formation et les compétences.
+    """
+    today = np.datetime64(today or date.today(), "M")
+    parsed, owners, starts, ends = [], [], [], []
+    for i, text in enumerate(texts):
+        sections = split_sections(normalize_text(text))
+        periods = 0
+        for period in DATE_RANGES.finditer(sections.get(EXPERIENCE_SECTION, "")):
+            start = _month(period["start_year"], period["start_month"] or 1)
+            end = today if period["ongoing"] else _month(period["end_year"], period["end_month"] or 12)
+            if start is None or end is None or end < start or start > today:
+                continue
+            owners.append(i)
+            starts.append(start)
+            # Fin exclusive : le mois de fin est compté
+            ends.append(min(end, today) + 1)
+            periods += 1
+        parsed.append({
+            "sections": sorted(sections),
+            "experience_count": periods,
+            "experience_months": 0,
+            "diploma_level": diploma_level(sections.get(EDUCATION_SECTION, "").splitlines()),
+            "skills": parse_skills(sections.get(SKILLS_SECTION, "")),
+        })
+
+    if owners:
+        merged_owners, merged_starts, merged_ends = merge_intervals(
+            np.array(owners, dtype=np.intp), np.array(starts, dtype="datetime64[M]").astype(DAY), np.array(ends, dtype="datetime64[M]").astype(DAY)
+        )
+        months = np.bincount(
+            merged_owners,
+            weights=(merged_ends.astype("datetime64[M]") - merged_starts.astype("datetime64[M]")).astype(np.int64),
+            minlength=len(texts),
+        )
+        for cv, cv_months in zip(parsed, months.tolist()):
+            cv["experience_months"] = int(cv_months)
+    return parsed
+
+
+def parse_cv(text: Optional[str], today: date = None) -> dict:
+    return parse_cvs([text], today)[0]
+
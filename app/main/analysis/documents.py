@@ -0,0 +1,206 @@
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.main.core.config import Config
+from app.main.models.db.session import SessionLocal
+from app.main.models.storage import Storage, TextStatusEnum
+from app.main.utils import logger
+from app.main.utils.file import file_utils
+
+
+# Formats dont le texte est extrait
+EXTRACTABLE_EXTENSIONS = (".pdf", ".docx")
+# Un document est soumis au plus deux fois : une relance s'il a été interrompu par l'arrêt d'un autre
+MAX_ATTEMPTS = 2
+# Intervalle de surveillance des extractions en cours, en secondes
+WATCHDOG_INTERVAL = 1
+
+
+def _extract(file_path: str) -> Tuple[Optional[str], Optional[str]]:
+    """Exécuté dans un processus du pool : (texte, None) ou (None, erreur)."""
+    try:
+        return file_utils.extract_text_from_file(file_path), None
+    except Exception as e:
+        return None, str(getattr(e, "detail", e))
+
+
+def _report_pid(pids):
+    """Initialiseur des processus du pool : communique leur pid au processus web, qui peut ainsi les tuer."""
+    pids.put(os.getpid())
+
+
+def _kill_workers(pids):
+    """Tue les processus du pool dont le pid a été reçu."""
+    while True:
+        try:
+            pid = pids.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    pids.close()
+
+
+class ExtractionJob(NamedTuple):
+    storage_uuid: str
+    file_path: str
+    attempt: int
+
+
+class DocumentTexts:
+    """
+    Extraction du texte des fichiers stockés, une seule fois par contenu.
+
+    Le texte est extrait à la création d'une ligne Storage, dans un pool de processus, hors
+    du thread de la requête. Un contenu déjà stocké réutilise sa ligne (content_hash est
+    unique, voir storage_controller) : il n'est donc extrait qu'une fois. Les fonctions
+    d'analyse lisent ensuite Storage.extracted_text, sans retélécharger ni réanalyser le fichier.
+
+    Les budgets de iter_pdf_text ne sont vérifiés qu'entre deux pages : une seule page piégée
+    peut bloquer un processus. Les extractions sont envoyées au pool au plus une par processus,
+    et celle qui dépasse `timeout` secondes depuis son envoi est arrêtée de l'extérieur : les
+    processus du pool sont tués et un nouveau pool est créé. Le document fautif est marqué en échec ; les autres
+    extractions interrompues sont relancées une fois dans le nouveau pool.
+    """
+
+    def __init__(self, max_workers: int = 2, timeout: Optional[float] = None, extract: Callable = _extract):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.extract = extract
+        self._executor = None
+        self._pids = None
+        self._lock = threading.Lock()
+        self._queue = deque()
+        self._jobs: Dict[Future, ExtractionJob] = {}
+        self._started: Dict[Future, float] = {}
+        self._expired = set()
+        self._watchdog = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn : le processus web a des threads (planificateur, micro-batching), fork n'est pas sûr
+            context = multiprocessing.get_context("spawn")
+            self._pids = context.Queue()
+            self._executor = ProcessPoolExecutor(self.max_workers, mp_context=context, initializer=_report_pid, initargs=(self._pids,))
+        if self.timeout and self._watchdog is None:
+            self._watchdog = threading.Thread(target=self._watch, name="document-texts-watchdog", daemon=True)
+            self._watchdog.start()
+        return self._executor
+
+    def _dispatch(self) -> List[Future]:
+        """
+        Envoie au pool les extractions en attente, au plus une par processus : une extraction
+        envoyée est aussitôt prise en charge, et son échéance court à partir de là. Verrou tenu.
+        """
+        futures = []
+        while self._queue and len(self._jobs) < self.max_workers:
+            job = self._queue.popleft()
+            try:
+                future = self._pool().submit(self.extract, job.file_path)
+            except BrokenProcessPool:
+                # Un processus a été tué (mémoire, document piégé) : le pool est recréé
+                self._executor = None
+                future = self._pool().submit(self.extract, job.file_path)
+            self._jobs[future] = job
+            self._started[future] = time.monotonic()
+            futures.append(future)
+        return futures
+
+    def _submit(self, job: Optional[ExtractionJob] = None):
+        with self._lock:
+            if job is not None:
+                self._queue.append(job)
+            futures = self._dispatch()
+        # Hors verrou : le callback d'une future déjà terminée est appelé immédiatement
+        for future in futures:
+            future.add_done_callback(self._store)
+
+    def _watch(self):
+        while True:
+            time.sleep(WATCHDOG_INTERVAL)
+            self.expire_overdue()
+
+    def expire_overdue(self):
+        """
+        Arrête les extractions en cours depuis plus de `timeout` secondes, en tuant les processus du pool.
+        """
+        now = time.monotonic()
+        with self._lock:
+            overdue = [future for future, started in self._started.items() if not future.done() and now - started > self.timeout]
+            if not overdue or self._executor is None:
+                return
+            self._expired.update(overdue)
+            storage_uuids = [self._jobs[future].storage_uuid for future in overdue]
+            executor, self._executor = self._executor, None
+            _kill_workers(self._pids)
+        # Les futures du pool tué échouent avec BrokenProcessPool (un processus lancé sans avoir encore
+        # communiqué son pid est arrêté par le pool lui-même) : voir _store
+        executor.shutdown(wait=False)
+        for storage_uuid in storage_uuids:
+            logger.warning(f"Text extraction of file {storage_uuid} stopped: no result after {self.timeout}s")
+
+    def submit(self, db: Session, storage: Storage, file_path: str):
+        """
+        Programme l'extraction du texte d'un fichier qui vient d'être stocké ; le fichier local est supprimé ensuite.
+        """
+        if os.path.splitext(file_path)[1].lower() not in EXTRACTABLE_EXTENSIONS:
+            storage.text_status = TextStatusEnum.UNSUPPORTED
+            db.commit()
+            file_utils.delete_temp_file(file_path)
+            return
+
+        storage.text_status = TextStatusEnum.PENDING
+        db.commit()
+        self._submit(ExtractionJob(storage.uuid, file_path, 1))
+
+    def _store(self, future: Future):
+        with self._lock:
+            job = self._jobs.pop(future)
+            self._started.pop(future, None)
+            expired = future in self._expired
+            self._expired.discard(future)
+        try:
+            text, error = future.result()
+        except BrokenProcessPool as e:
+            if not expired and job.attempt < MAX_ATTEMPTS:
+                # Interrompue par l'arrêt d'une autre extraction ou d'un processus : relancée
+                self._submit(job._replace(attempt=job.attempt + 1))
+                return
+            text, error = None, f"timeout after {self.timeout}s" if expired else str(e)
+        except Exception as e:
+            text, error = None, str(e)
+        # Un processus s'est libéré : l'extraction suivante est lancée
+        self._submit()
+        storage_uuid, file_path = job.storage_uuid, job.file_path
+        if error:
+            logger.warning(f"Text extraction failed for file {storage_uuid}: {error}")
+        db = SessionLocal()
+        try:
+            db.query(Storage).filter(Storage.uuid == storage_uuid).update(
+                {
+                    Storage.extracted_text: text,
+                    Storage.text_status: TextStatusEnum.FAILED if error else TextStatusEnum.EXTRACTED,
+                },
+                synchronize_session=False,
+            )
+            db.commit()
+        except Exception as e:
+            logger.error(f"Failed to store extracted text of file {storage_uuid}: {e}")
+        finally:
+            db.close()
+            file_utils.delete_temp_file(file_path)
+
+
+document_texts = DocumentTexts(Config.TEXT_EXTRACTION_WORKERS, Config.TEXT_EXTRACTION_TIMEOUT)
@@ -0,0 +1,115 @@
+import re
+import unicodedata
+from typing import Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+
+# Valeurs de date de fin désignant une expérience en cours
+ONGOING_END_DATES = (None, "", "Present")
+
+# Niveau d'études (années après le bac) déduit de l'intitulé du diplôme, du plus élevé au plus bas
+DIPLOMA_LEVELS = (
+    (re.compile(r"\b(doctor\w*|phd|ph d)\b"), 8),
+    (re.compile(r"\b(master\w*|ingenieur|engineer\w*|mba|dess|dea)\b"), 5),
+    (re.compile(r"\b(licence|bachelor\w*)\b"), 3),
+    (re.compile(r"\b(bts|dut|dts|hnd|deug)\b"), 2),
+    (re.compile(r"\b(bac\w*|high school)\b"), 0),
+)
+
+_NON_ALPHANUMERIC = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_title(title: str) -> str:
+    """Met un intitulé en minuscules, sans accents ni ponctuation."""
+    title = unicodedata.normalize("NFKD", title or "").encode("ascii", "ignore").decode("ascii")
+    return _NON_ALPHANUMERIC.sub(" ", title.lower()).strip()
+
+
+def diploma_level(degree_names: Iterable[str]) -> Optional[int]:
+    """Retourne le niveau le plus élevé parmi les diplômes, ou None si aucun n'est reconnu."""
+    levels = [
+        level
+        for name in degree_names
+        for pattern, level in DIPLOMA_LEVELS
+        if pattern.search(normalize_title(name))
+    ]
+    return max(levels) if levels else None
+
+
+def is_ongoing(end_date: Optional[str]) -> bool:
+    return end_date in ONGOING_END_DATES
+
+
+def experience_years(days):
+    """Années pleines correspondant à un nombre de jours d'expérience (entier ou tableau)."""
+    return days // 365
+
+
+# Colonnes de la matrice de caractéristiques, dans l'ordre attendu par le modèle
+FEATURE_COLUMNS = ("years_of_experience", "salary", "experience_matches")
+# Colonnes tirées du CV analysé (voir analysis.cv_parser), ajoutées pour un modèle entraîné avec
+CV_FEATURE_COLUMNS = ("cv_years_of_experience", "cv_diploma_level", "cv_skill_count")
+
+
+def cv_features(cv: Optional[dict]) -> tuple:
+    """Valeurs des colonnes CV_FEATURE_COLUMNS d'un CV analysé ; CV absent ou non encore analysé : (0, -1, 0)."""
+    if not cv:
+        return 0, -1, 0
+    level = cv.get("diploma_level")
+    return cv.get("experience_months", 0) // 12, -1 if level is None else level, len(cv.get("skills", []))
+
+
+def employment_type_matches(candidate_data: List[dict], employment_type: Union[str, Sequence[str]]) -> np.ndarray:
+    """
+    Indique pour chaque candidat si l'un de ses intitulés de poste contient le type de contrat de l'offre.
+
+    `employment_type` est soit le type de contrat commun à tous les candidats, soit un
+    type par candidat (couples candidat/offre de plusieurs offres). Les intitulés de tous
+    les candidats sont aplatis dans un seul tableau, la recherche est faite en une passe,
+    puis les correspondances sont ramenées à leur candidat. Un type ou un intitulé absent
+    (None) est traité comme une chaîne vide, et non comme le texte « None ».
+    """
+    n = len(candidate_data)
+    matches = np.zeros(n, dtype=bool)
+    counts = np.fromiter((len(candidate["experience"]) for candidate in candidate_data), dtype=np.intp, count=n)
+    if not counts.any():
+        return matches
+
+    titles = np.array([title or "" for candidate in candidate_data for title in candidate["experience"]], dtype=str)
+    owners = np.repeat(np.arange(n), counts)
+    if employment_type is None or isinstance(employment_type, str):
+        employment_types = np.asarray(employment_type or "", dtype=str)
+    else:
+        employment_types = np.array([value or "" for value in employment_type], dtype=str)
+    employment_types = np.char.lower(employment_types)
+    if employment_types.ndim:
+        employment_types = employment_types[owners]
+    found = np.char.find(np.char.lower(titles), employment_types) >= 0
+    matches[owners[found]] = True
+    return matches
+
+
+def build_feature_matrix(candidate_data: List[dict], job_offer_data: dict, n_features: int = len(FEATURE_COLUMNS)) -> np.ndarray:
+    """
+    Construit la matrice (n_candidats, 3) utilisée par le modèle : années d'expérience,
+    salaire ajusté de l'offre et correspondance du type de contrat.
+
+    Le salaire et le type de contrat de `job_offer_data` sont des scalaires pour une
+    seule offre, ou des tableaux alignés sur les candidats. La matrice est préallouée
+    et remplie colonne par colonne.
+
+    Un modèle qui attend plus de colonnes (`n_features`) reçoit à la suite les
+    CV_FEATURE_COLUMNS, lues dans le CV analysé de chaque candidat (clé « cv »).
+    """
+    if n_features > len(FEATURE_COLUMNS) + len(CV_FEATURE_COLUMNS):
+        raise ValueError(f"The model expects {n_features} features, at most {len(FEATURE_COLUMNS) + len(CV_FEATURE_COLUMNS)} are available")
+    n = len(candidate_data)
+    X = np.empty((n, max(n_features, len(FEATURE_COLUMNS))), dtype=np.float64)
+    X[:, 0] = np.fromiter((candidate["years_of_experience"] for candidate in candidate_data), dtype=np.float64, count=n)
+    X[:, 1] = job_offer_data["salary"]
+    X[:, 2] = employment_type_matches(candidate_data, job_offer_data["employment_type"])
+    if n_features > len(FEATURE_COLUMNS):
+        cv_columns = np.array([cv_features(candidate.get("cv")) for candidate in candidate_data], dtype=np.float64).reshape(n, len(CV_FEATURE_COLUMNS))
+        X[:, len(FEATURE_COLUMNS):] = cv_columns[:, :n_features - len(FEATURE_COLUMNS)]
+    return X
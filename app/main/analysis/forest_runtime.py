@@ -0,0 +1,131 @@
+from typing import Dict
+
+import numpy as np
+
+
+# Nombre maximal de lignes parcourues à la fois, pour borner la mémoire (lignes x arbres)
+TRAVERSAL_CHUNK_SIZE = 8192
+
+
+class FlatForest:
+    """
+    Forêt aléatoire aplatie en tableaux NumPy contigus.
+
+    Les nœuds de tous les arbres sont mis bout à bout : `feature`, `threshold`, `left`
+    et `right` décrivent chaque nœud, `value` les probabilités de classe de chaque
+    nœud et `roots` l'indice de la racine de chaque arbre. Les feuilles pointent sur
+    elles-mêmes, ce qui permet de parcourir tous les arbres pour tout un lot de lignes
+    en au plus `max_depth` itérations vectorisées.
+
+    Les prédictions sont identiques à celles du RandomForestClassifier d'origine ;
+    le gain porte sur les petits lots, où la validation de scikit-learn domine.
+    """
+
+    ARRAYS = ("feature", "threshold", "left", "right", "value", "roots", "classes")
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, max_depth, n_features_in_=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes = classes
+        self.max_depth = int(max_depth)
+        self._is_leaf = left == np.arange(len(left))
+        if n_features_in_ is None:
+            # Export sans le nombre de colonnes d'entraînement : dernière caractéristique utilisée par un nœud, plus un
+            n_features_in_ = int(feature[~self._is_leaf].max()) + 1 if not self._is_leaf.all() else 0
+        # Nombre de colonnes des lignes à prédire, celui de l'entraînement
+        self.n_features_in_ = int(n_features_in_)
+
+    @classmethod
+    def from_sklearn(cls, forest) -> "FlatForest":
+        """Exporte un RandomForestClassifier entraîné."""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            is_leaf = tree.children_left == -1
+            nodes = np.arange(offset, offset + n_nodes, dtype=np.int32)
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold).astype(np.float64))
+            lefts.append(np.where(is_leaf, nodes, tree.children_left + offset).astype(np.int32))
+            rights.append(np.where(is_leaf, nodes, tree.children_right + offset).astype(np.int32))
+            value = tree.value[:, 0, :].astype(np.float64)
+            values.append(value / value.sum(axis=1, keepdims=True))
+            roots.append(offset)
+
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n_nodes
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.ascontiguousarray(np.concatenate(values)),
+            roots=np.asarray(roots, dtype=np.int32),
+            classes=np.asarray(forest.classes_),
+            max_depth=max_depth,
+            n_features_in_=forest.n_features_in_,
+        )
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {name: getattr(self, name) for name in self.ARRAYS}
+        arrays["max_depth"] = np.asarray(self.max_depth)
+        arrays["n_features_in_"] = np.asarray(self.n_features_in_)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "FlatForest":
+        n_features_in_ = arrays.get("n_features_in_")
+        return cls(
+            **{name: arrays[name] for name in cls.ARRAYS},
+            max_depth=int(arrays["max_depth"]),
+            n_features_in_=None if n_features_in_ is None else int(n_features_in_),
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in self.ARRAYS)
+
+    def _leaves(self, X: np.ndarray) -> np.ndarray:
+        """
+        Indice de la feuille atteinte par chaque ligne dans chaque arbre : (n_lignes, n_arbres).
+
+        Tous les couples (ligne, arbre) descendent d'un niveau à chaque itération ; ceux
+        qui ont atteint une feuille sont retirés du lot actif.
+        """
+        n_rows, n_features = X.shape
+        n_trees = len(self.roots)
+        values = X.ravel()
+        nodes = np.tile(self.roots, n_rows)
+        row_offsets = np.repeat(np.arange(n_rows, dtype=np.intp) * n_features, n_trees)
+        active = np.flatnonzero(~self._is_leaf[nodes])
+        while active.size:
+            current = nodes[active]
+            go_left = values[row_offsets[active] + self.feature[current]] <= self.threshold[current]
+            following = np.where(go_left, self.left[current], self.right[current])
+            nodes[active] = following
+            active = active[~self._is_leaf[following]]
+        return nodes.reshape(n_rows, n_trees)
+
+    def predict_proba(self, X) -> np.ndarray:
+        # Les arbres de scikit-learn comparent des caractéristiques en float32
+        X = np.asarray(X, dtype=np.float32)
+        proba = np.zeros((len(X), len(self.classes)), dtype=np.float64)
+        for start in range(0, len(X), TRAVERSAL_CHUNK_SIZE):
+            leaves = self._leaves(X[start:start + TRAVERSAL_CHUNK_SIZE])
+            chunk = proba[start:start + TRAVERSAL_CHUNK_SIZE]
+            # Somme arbre par arbre, dans le même ordre que scikit-learn
+            for tree in range(leaves.shape[1]):
+                chunk += self.value[leaves[:, tree]]
+        proba /= len(self.roots)
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes.take(np.argmax(self.predict_proba(X), axis=1))
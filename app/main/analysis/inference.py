@@ -0,0 +1,43 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.main.analysis.batching import MicroBatcher, model_classes
+from app.main.analysis.model_registry import LoadedModel, model_registry
+from app.main.core.config import Config
+
+
+batcher = MicroBatcher(
+    model_registry.get,
+    max_batch_size=Config.ML_BATCH_MAX_SIZE,
+    max_wait_ms=Config.ML_BATCH_MAX_WAIT_MS,
+)
+
+
+def predict(X: np.ndarray, loaded_model: Optional[LoadedModel] = None) -> Tuple[np.ndarray, str]:
+    """
+    Prédit les lignes de X avec `loaded_model`, par défaut le modèle actif, par micro-batching si activé.
+
+    Retourne (prédictions, version du modèle).
+    """
+    if Config.ML_BATCHING_ENABLED:
+        return batcher.predict(X, loaded_model)
+    loaded_model = loaded_model or model_registry.get()
+    return loaded_model.model.predict(X), loaded_model.version
+
+
+def predict_proba(X: np.ndarray, loaded_model: Optional[LoadedModel] = None) -> Tuple[np.ndarray, np.ndarray, str]:
+    """
+    Probabilités de chaque classe pour les lignes de X, avec `loaded_model` (le modèle qui a
+    servi à construire X), par défaut le modèle actif.
+
+    Retourne (probabilités, classes dans l'ordre des colonnes, version du modèle).
+    """
+    if Config.ML_BATCHING_ENABLED:
+        return batcher.predict_proba(X, loaded_model)
+    loaded_model = loaded_model or model_registry.get()
+    return loaded_model.model.predict_proba(X), model_classes(loaded_model.model), loaded_model.version
+
+
+def metrics() -> dict:
+    return {"batching_enabled": Config.ML_BATCHING_ENABLED, **batcher.metrics(), "model_load": model_registry.load_metrics}
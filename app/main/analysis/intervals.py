@@ -0,0 +1,112 @@
+from datetime import date, datetime
+from typing import Sequence, Tuple, Union
+
+import numpy as np
+
+from app.main.analysis.features import is_ongoing
+
+
+DAY = "datetime64[D]"
+
+
+def parse_dates(values: Sequence) -> np.ndarray:
+    """
+    Convertit des dates ISO (AAAA-MM-JJ) en tableau datetime64[D] ; les valeurs vides ou invalides donnent NaT.
+
+    Le tableau est converti en une fois ; si une valeur est rejetée par NumPy, le lot est
+    repris valeur par valeur avec le format historique `%Y-%m-%d`.
+    """
+    try:
+        return np.array([value or None for value in values], dtype=DAY)
+    except ValueError:
+        return np.array([_parse_date(value) for value in values], dtype=DAY)
+
+
+def _parse_date(value) -> np.datetime64:
+    try:
+        return np.datetime64(value or "NaT", "D")
+    except ValueError:
+        try:
+            return np.datetime64(datetime.strptime(value, "%Y-%m-%d").date(), "D")
+        except (TypeError, ValueError):
+            return np.datetime64("NaT", "D")
+
+
+def merge_intervals(owners: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Fusionne les intervalles [début, fin] qui se chevauchent ou se touchent, propriétaire par propriétaire.
+
+    Les intervalles sont triés par (propriétaire, début) ; la fin la plus tardive atteinte
+    depuis le début du groupe est un maximum cumulé sur une clé décalée par propriétaire,
+    et un nouvel intervalle fusionné commence dès qu'un début dépasse cette fin.
+
+    Returns:
+        (propriétaires, débuts, fins) des intervalles fusionnés, triés par propriétaire puis par début.
+    """
+    if len(owners) == 0:
+        return np.asarray(owners, dtype=np.intp), np.asarray(starts, dtype=DAY), np.asarray(ends, dtype=DAY)
+    order = np.lexsort((starts, owners))
+    owners = np.asarray(owners)[order]
+    starts = starts[order].astype(np.int64)
+    ends = ends[order].astype(np.int64)
+
+    base = ends.min()
+    span = ends.max() - base + 1
+    offsets = owners.astype(np.int64) * span
+    running_end = np.maximum.accumulate(offsets + ends - base) - offsets + base
+
+    new_segment = np.empty(len(owners), dtype=bool)
+    new_segment[0] = True
+    new_segment[1:] = (owners[1:] != owners[:-1]) | (starts[1:] > running_end[:-1])
+    first = np.flatnonzero(new_segment)
+    last = np.append(first[1:] - 1, len(owners) - 1)
+    return owners[first], starts[first].astype(DAY), running_end[last].astype(DAY)
+
+
+def merged_days(owners: np.ndarray, starts: np.ndarray, ends: np.ndarray, n_owners: int) -> np.ndarray:
+    """Nombre de jours couverts par l'union des intervalles de chaque propriétaire."""
+    owners, starts, ends = merge_intervals(owners, starts, ends)
+    lengths = (ends - starts).astype(np.int64)
+    return np.bincount(owners, weights=lengths, minlength=n_owners).astype(np.int64)
+
+
+def experience_days(owners: Sequence[int], start_dates: Sequence[str], end_dates: Sequence[str], n_owners: int, today: date) -> np.ndarray:
+    """
+    Jours d'expérience de chaque candidat à partir de ses expériences brutes, telles que lues en base.
+
+    Les expériences sans date de fin (ou "Present") sont comptées jusqu'à `today` ;
+    celles dont les dates sont invalides sont ignorées.
+    """
+    ongoing = np.fromiter((is_ongoing(end_date) for end_date in end_dates), dtype=bool, count=len(end_dates))
+    starts = parse_dates(start_dates)
+    # "Present" est écarté avant la conversion, pour que le lot reste sur le chemin rapide
+    ends = parse_dates([None if is_current else end_date for end_date, is_current in zip(end_dates, ongoing.tolist())])
+    ends[ongoing] = np.datetime64(today, "D")
+    valid = ~np.isnat(starts) & ~np.isnat(ends) & (ends >= starts)
+    return merged_days(np.asarray(owners)[valid], starts[valid], ends[valid], n_owners)
+
+
+def total_experience_days(
+    closed_intervals: Sequence[Sequence[Tuple[str, str]]],
+    ongoing_start_dates: Sequence[Sequence[str]],
+    today: Union[date, Sequence[date]],
+) -> np.ndarray:
+    """
+    Jours d'expérience de chaque candidat, sans compter deux fois les périodes qui se chevauchent.
+
+    Args:
+        closed_intervals: Pour chaque candidat, les (début, fin) ISO de ses expériences terminées.
+        ongoing_start_dates: Pour chaque candidat, les débuts ISO de ses expériences en cours.
+        today: Date jusqu'à laquelle les expériences en cours sont comptées, commune ou une par candidat.
+    """
+    n = len(closed_intervals)
+    closed_owners = np.repeat(np.arange(n), [len(intervals) for intervals in closed_intervals])
+    ongoing_owners = np.repeat(np.arange(n), [len(starts) for starts in ongoing_start_dates])
+
+    starts = parse_dates([start for intervals in closed_intervals for start, _ in intervals] + [start for starts in ongoing_start_dates for start in starts])
+    today = np.broadcast_to(np.asarray(today, dtype=DAY), (n,))
+    ends = np.concatenate([parse_dates([end for intervals in closed_intervals for _, end in intervals]), today[ongoing_owners]])
+    owners = np.concatenate([closed_owners, ongoing_owners])
+
+    valid = ~np.isnat(starts) & ~np.isnat(ends) & (ends >= starts)
+    return merged_days(owners[valid], starts[valid], ends[valid], n)
@@ -0,0 +1,220 @@
+import asyncio
+import hashlib
+import threading
+import weakref
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from app.main.analysis.loaders import load_applications
+from app.main.core.config import Config
+from app.main.models.applications import Application
+from app.main.models.db.session import SessionLocal
+from app.main.models.llm_analyses import LLMAnalysis
+from app.main.models.storage import Storage
+from app.main.utils import logger
+
+
+class ProfileInput(NamedTuple):
+    cv_text: str
+    experience_text: str
+    cover_letter: str
+    job_description: str
+
+
+class ProfileAnalysis(NamedTuple):
+    analysis: Optional[str]  # None si le fournisseur a échoué
+    cached: bool
+
+
+def build_prompt(profile: ProfileInput) -> str:
+    return f"""
+    Job Description: {profile.job_description}
+
+    Candidate CV: {profile.cv_text}
+
+    Candidate Experience: {profile.experience_text}
+
+    Candidate Cover Letter: {profile.cover_letter}
+
+    Based on the job description, evaluate the candidate's suitability for the role. Consider their qualifications, experience, and the relevance of their cover letter.
+    Provide a detailed analysis and suggestion whether this candidate should be shortlisted or rejected.
+    """
+
+
+def prompt_hash(namespace: str, prompt: str) -> str:
+    """Clé de cache d'un prompt : le même prompt envoyé à un autre modèle ou avec d'autres paramètres est une autre entrée."""
+    return hashlib.sha256(f"{namespace}\0{prompt}".encode()).hexdigest()
+
+
+class StubProvider:
+    """
+    Fournisseur local déterministe, pour les tests de charge hors ligne.
+
+    La réponse ne dépend que du prompt ; `latency_ms` simule le temps de réponse d'un vrai modèle.
+    """
+
+    namespace = "stub"
+
+    def __init__(self, latency_ms: float = 200):
+        self.latency = latency_ms / 1000
+
+    async def complete(self, prompt: str) -> str:
+        await asyncio.sleep(self.latency)
+        score = int(hashlib.sha256(prompt.encode()).hexdigest()[:8], 16) % 101
+        decision = "shortlisted" if score >= 50 else "rejected"
+        return f"Suitability score: {score}/100. Recommendation: the candidate should be {decision}."
+
+
+def get_provider(name: str):
+    if name == "stub":
+        return StubProvider(Config.LLM_STUB_LATENCY_MS)
+    if name == "openai":
+        from app.main.analysis.openai_utils import OpenAIProvider
+        return OpenAIProvider(Config.OPENAI_API_KEY, Config.LLM_MODEL)
+    raise ValueError(f"Unknown LLM provider: {name}")
+
+
+class AnalysisCache:
+    """Réponses en base (table llm_analyses), servies jusqu'à leur date d'expiration ; chaque opération ouvre sa propre session."""
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        db = SessionLocal()
+        try:
+            return dict(
+                db.query(LLMAnalysis.prompt_hash, LLMAnalysis.response)
+                .filter(LLMAnalysis.prompt_hash.in_(list(keys)), LLMAnalysis.expires_at > datetime.now())
+            )
+        finally:
+            db.close()
+
+    def set_many(self, responses: Dict[str, str], namespace: str, ttl: timedelta):
+        now = datetime.now()
+        db = SessionLocal()
+        try:
+            for key, response in responses.items():
+                db.merge(LLMAnalysis(prompt_hash=key, provider=namespace, response=response, date_added=now, expires_at=now + ttl))
+            db.commit()
+        finally:
+            db.close()
+
+    def purge_expired(self) -> int:
+        db = SessionLocal()
+        try:
+            count = db.query(LLMAnalysis).filter(LLMAnalysis.expires_at <= datetime.now()).delete(synchronize_session=False)
+            db.commit()
+            return count
+        finally:
+            db.close()
+
+
+class ProfileAnalysisService:
+    """
+    Analyse de profils candidats par un modèle de langage, asynchrone et mise en cache.
+
+    Les profils d'un lot sont traduits en prompts ; ceux dont la réponse est en cache (même
+    empreinte, non expirée) ne sont pas renvoyés au fournisseur, et les prompts identiques
+    d'un même lot ne sont envoyés qu'une fois. Les appels au fournisseur sont lancés
+    ensemble, au plus `max_concurrency` à la fois par boucle d'événements ; l'échec d'un appel
+    n'affecte que son profil.
+    """
+
+    def __init__(self, provider, cache: AnalysisCache, max_concurrency: int = 8, ttl: timedelta = timedelta(days=7)):
+        self.provider = provider
+        self.cache = cache
+        self.ttl = ttl
+        self.max_concurrency = max_concurrency
+        # Un sémaphore asyncio est lié à la boucle où il sert la première fois : un par boucle
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._semaphores_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._metrics = {"profiles": 0, "cache_hits": 0, "provider_calls": 0, "errors": 0}
+
+    async def analyze(self, profile: ProfileInput) -> ProfileAnalysis:
+        return (await self.analyze_many([profile]))[0]
+
+    async def analyze_many(self, profiles: List[ProfileInput]) -> List[ProfileAnalysis]:
+        prompts = [build_prompt(profile) for profile in profiles]
+        keys = [prompt_hash(self.provider.namespace, prompt) for prompt in prompts]
+        cached = await asyncio.to_thread(self.cache.get_many, set(keys))
+        pending = {key: prompt for key, prompt in zip(keys, prompts) if key not in cached}
+
+        responses = await asyncio.gather(*(self._complete(prompt) for prompt in pending.values()), return_exceptions=True)
+        fresh = {}
+        for key, response in zip(pending, responses):
+            if isinstance(response, Exception):
+                logger.error(f"LLM profile analysis failed ({self.provider.namespace}): {response}")
+            else:
+                fresh[key] = response
+        if fresh:
+            await asyncio.to_thread(self.cache.set_many, fresh, self.provider.namespace, self.ttl)
+
+        with self._metrics_lock:
+            self._metrics["profiles"] += len(profiles)
+            self._metrics["cache_hits"] += sum(key in cached for key in keys)
+            self._metrics["provider_calls"] += len(pending)
+            self._metrics["errors"] += len(pending) - len(fresh)
+        return [ProfileAnalysis(cached[key], True) if key in cached else ProfileAnalysis(fresh.get(key), False) for key in keys]
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._semaphores_lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+            return semaphore
+
+    async def _complete(self, prompt: str) -> str:
+        async with self._semaphore():
+            return await self.provider.complete(prompt)
+
+    def metrics(self) -> dict:
+        with self._metrics_lock:
+            return {"provider": self.provider.namespace, **self._metrics}
+
+
+def experience_text(experiences) -> str:
+    return "\n".join(
+        f"{experience.job_title} - {experience.company_name} ({experience.start_date} - {experience.end_date or 'Present'}): {experience.description}"
+        for experience in experiences
+    )
+
+
+def load_offer_profiles(db: Session, job_offer) -> List[tuple]:
+    """
+    (candidature, profil) de chaque candidature de l'offre, avec ses expériences et les textes de son CV et de sa lettre.
+
+    Les candidatures et expériences sont chargées par load_applications, les fichiers (CV,
+    lettres) en une requête. Le texte des fichiers est celui extrait à leur dépôt (voir
+    analysis.documents), ou leur résumé si l'extraction n'est pas disponible.
+    """
+    rows = [row for row in load_applications(db, Application.job_offer_uuid == job_offer.uuid) if row.candidate]
+    storage_uuids = {uuid for row in rows for uuid in (row.application.cv_uuid, row.application.cover_letter_uuid) if uuid}
+    storages = {storage.uuid: storage for storage in db.query(Storage).filter(Storage.uuid.in_(storage_uuids))} if storage_uuids else {}
+    job_description = "\n".join(text for text in (job_offer.title, job_offer.description, job_offer.requirements) if text)
+
+    def storage_text(storage_uuid):
+        storage = storages.get(storage_uuid)
+        return (storage.extracted_text or storage.summary or "") if storage else ""
+
+    return [
+        (
+            row.application,
+            ProfileInput(
+                storage_text(row.application.cv_uuid),
+                experience_text(row.experiences),
+                storage_text(row.application.cover_letter_uuid),
+                job_description,
+            ),
+        )
+        for row in rows
+    ]
+
+
+profile_analysis = ProfileAnalysisService(
+    get_provider(Config.LLM_PROVIDER),
+    AnalysisCache(),
+    max_concurrency=Config.LLM_MAX_CONCURRENCY,
+    ttl=timedelta(seconds=Config.LLM_CACHE_TTL),
+)
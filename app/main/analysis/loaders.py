@@ -0,0 +1,103 @@
+from collections import defaultdict
+from typing import Iterator, List, NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, contains_eager
+
+from app.main.models.applications import Application
+from app.main.models.candidates import Candidat
+from app.main.models.candidate_features import CandidateFeature
+from app.main.models.candidates import Diploma, Experience
+from app.main.models.storage import Storage
+
+
+class OfferApplicationRow(NamedTuple):
+    application: Application
+    candidate: Optional[Candidat]
+    experiences: list
+    diplomas: list
+    features: Optional[CandidateFeature]
+    cv: Optional[dict]  # CV analysé (Storage.cv_data) de la candidature, à défaut du candidat
+
+
+def load_offer_applications(db: Session, job_offer_uuid: str) -> List[OfferApplicationRow]:
+    """
+    Charge les candidatures d'une offre avec leurs candidats, expériences, diplômes et caractéristiques précalculées.
+    """
+    return load_applications(db, Application.job_offer_uuid == job_offer_uuid)
+
+
+def load_applications(db: Session, *criteria) -> List[OfferApplicationRow]:
+    """
+    Charge les candidatures non supprimées répondant aux critères (portant sur Application) avec leurs candidats, expériences, diplômes et caractéristiques précalculées.
+
+    Le nombre de requêtes est fixe (5 au plus) quel que soit le nombre de candidatures :
+    les candidats sont joints aux candidatures, puis les expériences, les diplômes et
+    les caractéristiques sont chargés en une requête chacun et regroupés en mémoire par
+    candidat ; les CV analysés, s'il y en a, en une dernière requête.
+    """
+    # Les candidatures supprimées ne sont jamais analysées
+    criteria = (*criteria, Application.is_deleted.isnot(True))
+    applications = (
+        db.query(Application)
+        .outerjoin(Application.candidate)
+        .options(contains_eager(Application.candidate))
+        .filter(*criteria)
+        .all()
+    )
+    if not applications:
+        return []
+
+    candidate_uuids = select(Application.candidate_uuid).where(*criteria)
+
+    experiences_by_candidate = defaultdict(list)
+    for experience in db.query(Experience).filter(Experience.candidate_uuid.in_(candidate_uuids)):
+        experiences_by_candidate[experience.candidate_uuid].append(experience)
+
+    diplomas_by_candidate = defaultdict(list)
+    for diploma in db.query(Diploma).filter(Diploma.candidate_uuid.in_(candidate_uuids)):
+        diplomas_by_candidate[diploma.candidate_uuid].append(diploma)
+
+    features_by_candidate = {
+        feature.candidate_uuid: feature
+        for feature in db.query(CandidateFeature).filter(CandidateFeature.candidate_uuid.in_(candidate_uuids))
+    }
+
+    cv_uuids = {application.uuid: application.cv_uuid or (application.candidate.cv_uuid if application.candidate else None) for application in applications}
+    cv_data = {}
+    if any(cv_uuids.values()):
+        cv_data = dict(
+            db.query(Storage.uuid, Storage.cv_data)
+            .filter(Storage.uuid.in_({cv_uuid for cv_uuid in cv_uuids.values() if cv_uuid}), Storage.cv_data.isnot(None))
+        )
+
+    return [
+        OfferApplicationRow(
+            application,
+            application.candidate,
+            experiences_by_candidate.get(application.candidate_uuid, []),
+            diplomas_by_candidate.get(application.candidate_uuid, []),
+            features_by_candidate.get(application.candidate_uuid),
+            cv_data.get(cv_uuids[application.uuid]),
+        )
+        for application in applications
+    ]
+
+
+def iter_applications(db: Session, *criteria, chunk_size: int = 500) -> Iterator[List[OfferApplicationRow]]:
+    """
+    Parcourt les candidatures répondant aux critères par lots de `chunk_size`, chargés comme par load_applications.
+
+    Les lots sont paginés par uuid de candidature (pagination par clé, sans OFFSET) : seul
+    le lot courant est en mémoire, quel que soit le nombre de candidatures.
+    """
+    last_uuid = None
+    while True:
+        query = db.query(Application.uuid).filter(*criteria, Application.is_deleted.isnot(True))
+        if last_uuid is not None:
+            query = query.filter(Application.uuid > last_uuid)
+        application_uuids = [application_uuid for application_uuid, in query.order_by(Application.uuid).limit(chunk_size)]
+        if not application_uuids:
+            return
+        yield load_applications(db, Application.uuid.in_(application_uuids))
+        last_uuid = application_uuids[-1]
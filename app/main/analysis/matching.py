@@ -0,0 +1,202 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.main.analysis.text_index import TfidfIndex, term_counts, top_k
+from app.main.models.applications import Application
+from app.main.models.candidates import Candidat
+from app.main.models.candidate_features import CandidateFeature
+from app.main.models.job_offers import JobOffer, JobStatus
+from app.main.core.config import Config
+
+
+OFFER = "offer"
+CANDIDATE = "candidate"
+# Groupe des offres fermées ou expirées : toujours comparables à leurs candidats, jamais recommandées
+INACTIVE_OFFER = "inactive_offer"
+
+# Les lignes modifiées juste avant le dernier point de synchronisation sont relues, au cas
+# où leur transaction aurait été validée après la lecture précédente
+SYNC_OVERLAP = timedelta(minutes=1)
+SYNC_CHUNK_SIZE = 2000
+# Résultats demandés en plus à l'index pour compenser ceux que le filtre en base écarte ensuite
+SEARCH_MARGIN = 20
+
+
+def offer_terms(job_offer) -> dict:
+    """Termes d'une offre : intitulé, description et prérequis."""
+    return term_counts([job_offer.title, job_offer.description, job_offer.requirements])
+
+
+class TextIndexSync:
+    """
+    Alimente un index TF-IDF commun aux offres et aux candidats à partir de la base.
+
+    Le premier appel charge tous les documents ; les suivants ne relisent que les lignes
+    modifiées depuis la dernière synchronisation (date_modified des caractéristiques
+    candidat, updated_at des offres). Les termes des candidats sont précalculés dans
+    candidate_features, dans la même transaction que l'écriture de leurs expériences et
+    diplômes ; chaque worker rattrape ainsi les écritures des autres.
+    """
+
+    def __init__(self, index: TfidfIndex, min_interval: float = 0):
+        self.index = index
+        self.min_interval = min_interval
+        self._candidates_synced_at = None
+        self._offers_synced_at = None
+        self._last_sync = None
+        self._lock = threading.Lock()
+
+    def sync(self, db: Session):
+        """Rattrape les écritures en base, au plus une fois toutes les `min_interval` secondes."""
+        with self._lock:
+            if self._last_sync is not None and time.monotonic() - self._last_sync < self.min_interval:
+                return
+            self._sync_candidates(db)
+            self._sync_offers(db)
+            self._last_sync = time.monotonic()
+
+    def _sync_candidates(self, db: Session):
+        query = db.query(CandidateFeature.candidate_uuid, CandidateFeature.text_terms, CandidateFeature.date_modified)
+        if self._candidates_synced_at is not None:
+            query = query.filter(CandidateFeature.date_modified >= self._candidates_synced_at - SYNC_OVERLAP)
+        documents = []
+        for candidate_uuid, text_terms, date_modified in query.yield_per(SYNC_CHUNK_SIZE):
+            documents.append(((CANDIDATE, candidate_uuid), text_terms or {}, CANDIDATE))
+            self._candidates_synced_at = max(self._candidates_synced_at or date_modified, date_modified)
+            if len(documents) == SYNC_CHUNK_SIZE:
+                self.index.add_many(documents)
+                documents = []
+        self.index.add_many(documents)
+
+    def _sync_offers(self, db: Session):
+        query = db.query(JobOffer)
+        if self._offers_synced_at is not None:
+            query = query.filter(JobOffer.updated_at >= self._offers_synced_at - SYNC_OVERLAP)
+        for job_offer in query.yield_per(SYNC_CHUNK_SIZE):
+            self.refresh_offer(job_offer)
+            if job_offer.updated_at is not None:
+                self._offers_synced_at = max(self._offers_synced_at or job_offer.updated_at, job_offer.updated_at)
+
+    def refresh_offer(self, job_offer):
+        """Réindexe une offre ; appelé par CRUDJobOffers à chaque création, modification ou suppression."""
+        if job_offer.is_deleted:
+            self.index.remove((OFFER, job_offer.uuid))
+        else:
+            group = OFFER if job_offer.status == JobStatus.active else INACTIVE_OFFER
+            self.index.add((OFFER, job_offer.uuid), offer_terms(job_offer), group=group)
+
+    def ensure_candidate(self, candidate):
+        """Indexe à la volée un candidat dont les caractéristiques n'ont pas encore été calculées."""
+        if (CANDIDATE, candidate.uuid) not in self.index:
+            features = CandidateFeature(candidate_uuid=candidate.uuid).compute(candidate.experiences, candidate.diplomas)
+            self.index.add((CANDIDATE, candidate.uuid), features.text_terms, group=CANDIDATE)
+
+
+text_index = TfidfIndex()
+text_index_sync = TextIndexSync(text_index, min_interval=Config.TEXT_INDEX_SYNC_INTERVAL)
+
+
+def search_filtered(query_key, group: str, limit: int, load: Callable[[List[str]], Dict[str, object]]) -> List[Tuple[object, float]]:
+    """
+    Les `limit` meilleurs documents d'un groupe, filtrés en base par `load` (uuids -> objets retenus).
+
+    Les résultats écartés par le filtre (candidat supprimé, offre expirée) sont compensés
+    en demandant une marge à l'index, élargie tant qu'il en manque.
+    """
+    k = limit
+    while True:
+        results = text_index.search(query_key, k + SEARCH_MARGIN, group=group)
+        kept = load([uuid for (_, uuid), _ in results]) if results else {}
+        matches = [(kept[uuid], score) for (_, uuid), score in results if uuid in kept]
+        if len(matches) >= limit or len(results) < k + SEARCH_MARGIN:
+            return matches[:limit]
+        k *= 4
+
+
+def rank_applicants(db: Session, job_offer, limit: int = 20) -> List[dict]:
+    """
+    Classe les candidats d'une offre par similarité cosinus entre le texte de l'offre et celui de leur profil.
+
+    Les similarités de tous les candidats sont obtenues en un seul produit matrice creuse /
+    vecteur, et seuls les `limit` meilleurs sont triés.
+    """
+    text_index_sync.sync(db)
+    # L'offre est réindexée telle que chargée, pour ne pas dépendre de la précision de updated_at
+    text_index_sync.refresh_offer(job_offer)
+
+    applicants = (
+        db.query(Application.uuid, Candidat.uuid, Candidat.first_name, Candidat.last_name)
+        .join(Candidat, Candidat.uuid == Application.candidate_uuid)
+        .filter(Application.job_offer_uuid == job_offer.uuid, Application.is_deleted.isnot(True))
+        .all()
+    )
+    scores = text_index.similarities((OFFER, job_offer.uuid), [(CANDIDATE, candidate_uuid) for _, candidate_uuid, _, _ in applicants])
+    return [
+        {
+            "application_uuid": applicants[i][0],
+            "candidate_uuid": applicants[i][1],
+            "first_name": applicants[i][2],
+            "last_name": applicants[i][3],
+            "score": float(scores[i]),
+        }
+        for i in top_k(scores, limit)
+    ]
+
+
+def source_candidates(db: Session, job_offer, limit: int = 20) -> List[dict]:
+    """
+    Les `limit` candidats de toute la base (non supprimés) dont le profil est le plus proche du texte de l'offre.
+
+    La recherche passe par l'index inversé : seuls les candidats qui partagent au moins
+    un terme avec l'offre sont notés. Les candidats supprimés sont écartés ensuite, en
+    une requête sur les meilleurs résultats.
+    """
+    text_index_sync.sync(db)
+    text_index_sync.refresh_offer(job_offer)
+
+    def load(candidate_uuids):
+        return {
+            candidate.uuid: candidate
+            for candidate in db.query(Candidat).filter(Candidat.uuid.in_(candidate_uuids), Candidat.is_deleted.isnot(True))
+        }
+
+    return [
+        {
+            "candidate_uuid": candidate.uuid,
+            "first_name": candidate.first_name,
+            "last_name": candidate.last_name,
+            "email": candidate.email,
+            "score": score,
+        }
+        for candidate, score in search_filtered((OFFER, job_offer.uuid), CANDIDATE, limit, load)
+    ]
+
+
+def recommend_offers(db: Session, candidate, limit: int = 20) -> List[Tuple[JobOffer, float]]:
+    """
+    Les `limit` offres actives et non expirées les plus proches des expériences et diplômes du candidat.
+
+    Les offres sont indexées à leur écriture (CRUDJobOffers) : une recommandation est une
+    recherche dans l'index, suivie d'une requête sur les seules offres retenues.
+    """
+    text_index_sync.sync(db)
+    text_index_sync.ensure_candidate(candidate)
+    now = datetime.now()
+
+    def load(job_offer_uuids):
+        return {
+            job_offer.uuid: job_offer
+            for job_offer in db.query(JobOffer).filter(
+                JobOffer.uuid.in_(job_offer_uuids),
+                JobOffer.is_deleted.isnot(True),
+                JobOffer.status == JobStatus.active,
+                or_(JobOffer.expiration_date.is_(None), JobOffer.expiration_date > now),
+            )
+        }
+
+    return search_filtered((CANDIDATE, candidate.uuid), OFFER, limit, load)
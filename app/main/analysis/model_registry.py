@@ -0,0 +1,269 @@
+import os
+import pickle
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Any, List, NamedTuple, Optional
+
+import numpy as np
+
+from app.main.analysis.forest_runtime import FlatForest
+from app.main.core.config import Config
+from app.main.utils import logger
+
+
+# Version attribuée au modèle historique app/main/models/ml_model.pkl
+LEGACY_VERSION = "legacy"
+ARTIFACT_EXTENSION = ".pkl"
+# Répertoire de tableaux .npy dérivé d'un artefact .pkl, chargé en mémoire partagée (mmap)
+FLAT_ARTIFACT_EXTENSION = ".forest"
+ACTIVE_POINTER = "ACTIVE"
+
+# Moteurs d'inférence : le modèle scikit-learn tel quel, ou la forêt aplatie en tableaux NumPy
+SKLEARN_BACKEND = "sklearn"
+FLAT_BACKEND = "flat"
+
+
+class ModelNotFound(LookupError):
+    """Aucune version active, ou la version demandée n'existe pas dans le répertoire des modèles."""
+
+
+class LoadedModel(NamedTuple):
+    version: str
+    model: Any
+
+
+class ModelRegistry:
+    """
+    Registre des modèles de scoring versionnés stockés sur disque.
+
+    Chaque version est un fichier `<version>.pkl` du répertoire `models_dir` ; la version
+    active est désignée par le fichier `ACTIVE`, réécrit de façon atomique par `activate()`.
+    Sans pointeur, seul le modèle historique est servi : un artefact déposé dans le
+    répertoire n'est jamais utilisé tant qu'il n'a pas été activé explicitement. Le modèle actif
+    est chargé à la première utilisation, et l'activation d'une nouvelle version charge
+    celle-ci à part avant de remplacer la référence : les prédictions en cours gardent
+    le modèle qu'elles ont obtenu et ne sont jamais bloquées.
+
+    Avec le moteur `flat`, la forêt est exportée une fois dans `<version>.forest/`, un
+    fichier .npy non compressé par tableau, puis chargée avec `mmap_mode="r"` : tous les
+    workers d'un même nœud partagent alors les mêmes pages physiques du cache disque.
+
+    Chaque processus surveille lui-même le pointeur ACTIVE : au plus une fois toutes les
+    `sync_interval` secondes, `get()` compare sa date de modification à celle du dernier
+    chargement et recharge le modèle si un autre worker a activé une autre version.
+    """
+
+    def __init__(self, models_dir: str, legacy_path: Optional[str] = None, backend: str = SKLEARN_BACKEND, sync_interval: float = 30):
+        self.models_dir = models_dir
+        self.legacy_path = legacy_path
+        self.backend = backend
+        self.sync_interval = sync_interval
+        self._active: Optional[LoadedModel] = None
+        self._lock = threading.Lock()
+        self._pointer_mtime: Optional[float] = None
+        self._next_sync = 0.0
+        self.load_metrics: dict = {}
+
+    def _artifact_path(self, version: str) -> str:
+        if version == LEGACY_VERSION and self.legacy_path:
+            return self.legacy_path
+        return os.path.join(self.models_dir, f"{version}{ARTIFACT_EXTENSION}")
+
+    def _flat_artifact_path(self, version: str) -> str:
+        return os.path.join(self.models_dir, f"{version}{FLAT_ARTIFACT_EXTENSION}")
+
+    def export_flat(self, version: str, model=None) -> str:
+        """
+        Écrit la forêt aplatie d'une version dans `<version>.forest/`, de façon atomique.
+        """
+        if model is None:
+            with open(self._artifact_path(version), "rb") as f:
+                model = pickle.load(f)
+        path = self._flat_artifact_path(version)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        os.makedirs(tmp_path, exist_ok=True)
+        for name, array in FlatForest.from_sklearn(model).to_arrays().items():
+            np.save(os.path.join(tmp_path, f"{name}.npy"), array)
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # Un autre worker a exporté la même version entre-temps
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        return path
+
+    def _load_flat(self, version: str) -> FlatForest:
+        path = self._flat_artifact_path(version)
+        if not os.path.isdir(path):
+            self.export_flat(version)
+        elif not os.path.exists(os.path.join(path, "n_features_in_.npy")):
+            # Export antérieur à l'enregistrement du nombre de colonnes : complété depuis l'artefact .pkl
+            with open(self._artifact_path(version), "rb") as f:
+                n_features_in = pickle.load(f).n_features_in_
+            tmp_path = os.path.join(path, f"n_features_in_.{os.getpid()}.tmp.npy")
+            np.save(tmp_path, np.asarray(n_features_in))
+            os.replace(tmp_path, os.path.join(path, "n_features_in_.npy"))
+        return FlatForest.from_arrays({
+            name[:-len(".npy")]: np.load(os.path.join(path, name), mmap_mode="r")
+            for name in os.listdir(path)
+            if name.endswith(".npy")
+        })
+
+    def versions(self) -> List[str]:
+        """Retourne les versions disponibles, de la plus ancienne à la plus récente."""
+        versions = []
+        if os.path.isdir(self.models_dir):
+            versions = sorted(
+                (name[:-len(ARTIFACT_EXTENSION)] for name in os.listdir(self.models_dir) if name.endswith(ARTIFACT_EXTENSION)),
+                key=lambda version: os.path.getmtime(self._artifact_path(version)),
+            )
+        if self.legacy_path and os.path.exists(self.legacy_path):
+            versions.insert(0, LEGACY_VERSION)
+        return versions
+
+    def describe(self) -> List[dict]:
+        active = self.active_version()
+        return [
+            {
+                "version": version,
+                "path": self._artifact_path(version),
+                "size": os.path.getsize(self._artifact_path(version)),
+                "modified_at": datetime.fromtimestamp(os.path.getmtime(self._artifact_path(version))),
+                "is_active": version == active,
+                "is_loaded": self._active is not None and self._active.version == version,
+            }
+            for version in self.versions()
+        ]
+
+    def _read_pointer_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(os.path.join(self.models_dir, ACTIVE_POINTER)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def active_version(self) -> Optional[str]:
+        """Version désignée par le pointeur ACTIVE, à défaut le modèle historique s'il existe."""
+        try:
+            with open(os.path.join(self.models_dir, ACTIVE_POINTER)) as f:
+                version = f.read().strip()
+            if version:
+                return version
+        except FileNotFoundError:
+            pass
+        if self.legacy_path and os.path.exists(self.legacy_path):
+            return LEGACY_VERSION
+        return None
+
+    def _load(self, version: Optional[str]) -> LoadedModel:
+        if version is None:
+            raise ModelNotFound("no active ML model")
+        if version not in self.versions():
+            raise ModelNotFound(f"ML model {version} not found in {self.models_dir}")
+        rss_before = process_memory()
+        start = time.perf_counter()
+        if self.backend == FLAT_BACKEND:
+            path = self._flat_artifact_path(version)
+            model = self._load_flat(version)
+        else:
+            path = self._artifact_path(version)
+            with open(path, "rb") as f:
+                model = pickle.load(f)
+        self.load_metrics = {
+            "version": version,
+            "backend": self.backend,
+            "load_time_ms": (time.perf_counter() - start) * 1000,
+            "memory_before": rss_before,
+            "memory_after": process_memory(),
+        }
+        logger.info(f"ML model {version} loaded from {path} ({self.backend} backend): {self.load_metrics}")
+        return LoadedModel(version, model)
+
+    def get(self) -> LoadedModel:
+        """
+        Retourne le modèle actif, en le chargeant à la première utilisation et en
+        suivant, au plus une fois par `sync_interval`, les changements du pointeur ACTIVE.
+        """
+        active = self._active
+        if active is not None:
+            now = time.monotonic()
+            if now < self._next_sync:
+                return active
+            self._next_sync = now + self.sync_interval
+            try:
+                self.sync()
+            except ModelNotFound as e:
+                logger.warning(f"ML model not switched: {e}")
+            return self._active
+        with self._lock:
+            if self._active is None:
+                pointer_mtime = self._read_pointer_mtime()
+                self._active = self._load(self.active_version())
+                self._pointer_mtime = pointer_mtime
+                self._next_sync = time.monotonic() + self.sync_interval
+            return self._active
+
+    def warm_up(self) -> dict:
+        """
+        Charge le modèle actif au démarrage du worker ; le temps de chargement et la mémoire
+        du processus avant/après sont journalisés et conservés dans load_metrics.
+        """
+        try:
+            self.get()
+        except ModelNotFound as e:
+            logger.warning(f"ML model not loaded at startup: {e}")
+        return self.load_metrics
+
+    def activate(self, version: str) -> LoadedModel:
+        """
+        Active une version : elle est chargée hors verrou, le pointeur ACTIVE est réécrit
+        de façon atomique puis la référence au modèle est remplacée.
+        """
+        loaded = self._load(version)
+        os.makedirs(self.models_dir, exist_ok=True)
+        pointer = os.path.join(self.models_dir, ACTIVE_POINTER)
+        tmp_pointer = f"{pointer}.{os.getpid()}.tmp"
+        with open(tmp_pointer, "w") as f:
+            f.write(version)
+        os.replace(tmp_pointer, pointer)
+        with self._lock:
+            self._active = loaded
+            self._pointer_mtime = self._read_pointer_mtime()
+        logger.info(f"ML model {version} activated")
+        return loaded
+
+    def sync(self):
+        """
+        Recharge le modèle si le pointeur ACTIVE a été modifié par un autre processus ;
+        le pointeur n'est relu que si sa date de modification a changé.
+        """
+        active = self._active
+        pointer_mtime = self._read_pointer_mtime()
+        if active is None or pointer_mtime == self._pointer_mtime:
+            return
+        version = self.active_version()
+        if version is None or active.version == version:
+            self._pointer_mtime = pointer_mtime
+            return
+        loaded = self._load(version)
+        with self._lock:
+            self._active = loaded
+            self._pointer_mtime = pointer_mtime
+        logger.info(f"ML model switched from {active.version} to {version}")
+
+
+def process_memory() -> dict:
+    """
+    Mémoire du processus courant en octets : résidente (rss) et partagée avec d'autres processus (shared).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            _, resident, shared = (int(value) for value in f.read().split()[:3])
+        page_size = os.sysconf("SC_PAGE_SIZE")
+        return {"rss": resident * page_size, "shared": shared * page_size}
+    except (OSError, ValueError):
+        import resource
+        return {"rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024, "shared": None}
+
+
+model_registry = ModelRegistry(Config.ML_MODELS_DIR, Config.ML_LEGACY_MODEL_PATH, Config.ML_INFERENCE_BACKEND, Config.ML_MODEL_SYNC_INTERVAL)
@@ -0,0 +1,149 @@
+import threading
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from app.main.models.applications import Application
+from app.main.models.application_scores import ApplicationScore, ScoreStatusEnum
+from app.main.models.candidates import Candidat
+from app.main.models.candidate_features import CandidateFeature
+
+
+class DataVersion(NamedTuple):
+    """État des données d'analyse d'une offre : il change à chaque candidature, suppression, notation ou recalcul de caractéristiques."""
+    applications: int
+    applications_modified: Optional[datetime]
+    scores_modified: Optional[datetime]
+    features_modified: Optional[datetime]
+
+
+def data_version(db: Session, job_offer_uuid: str, model_version: str) -> DataVersion:
+    """Version des données d'une offre pour un modèle, en une requête d'agrégat (sans charger les candidatures)."""
+    row = (
+        db.query(
+            func.count(Application.uuid),
+            func.max(Application.date_modified),
+            func.max(ApplicationScore.date_modified),
+            func.max(CandidateFeature.date_modified),
+        )
+        .join(Candidat, Candidat.uuid == Application.candidate_uuid)
+        .outerjoin(ApplicationScore, and_(ApplicationScore.application_uuid == Application.uuid, ApplicationScore.model_version == model_version))
+        .outerjoin(CandidateFeature, CandidateFeature.candidate_uuid == Application.candidate_uuid)
+        .filter(Application.job_offer_uuid == job_offer_uuid, Application.is_deleted.isnot(True))
+        .one()
+    )
+    return DataVersion(*row)
+
+
+class OfferResults:
+    """Résultat d'analyse d'une offre : candidats notés indexés par uuid de candidature, et effectifs par catégorie."""
+
+    def __init__(self, model_version: str, version: DataVersion, candidates: Iterable[dict]):
+        self.model_version = model_version
+        self.data_version = version
+        self.candidates = {}
+        self.counts = Counter()
+        for candidate in candidates:
+            self.upsert(candidate)
+
+    def upsert(self, candidate: dict):
+        previous = self.candidates.get(candidate["application_uuid"])
+        if previous is not None:
+            self.counts[previous["status"]] -= 1
+        self.candidates[candidate["application_uuid"]] = candidate
+        self.counts[candidate["status"]] += 1
+
+    def remove(self, application_uuid: str):
+        previous = self.candidates.pop(application_uuid, None)
+        if previous is not None:
+            self.counts[previous["status"]] -= 1
+
+    def bucket_counts(self) -> dict:
+        return {status.value: self.counts[status.value] for status in ScoreStatusEnum}
+
+
+class OfferResultCache:
+    """
+    Résultats d'analyse des offres récemment consultées, mis à jour en place à chaque écriture.
+
+    Une entrée n'est servie que pour la version du modèle qui l'a produite et tant que la
+    version des données de l'offre (data_version) n'a pas changé : les écritures faites
+    par un autre worker invalident ainsi l'entrée locale. Les écritures de ce worker
+    (nouvelle candidature, changement de statut, suppression, renotation) modifient
+    l'entrée en place puis enregistrent la nouvelle version des données ; si l'entrée ne
+    compte plus autant de candidats que la base, elle est abandonnée.
+    """
+
+    def __init__(self, max_offers: int = 256):
+        self.max_offers = max_offers
+        self._entries: "OrderedDict[str, OfferResults]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, job_offer_uuid: str, model_version: str, version: DataVersion) -> Optional[List[dict]]:
+        """Candidats notés de l'offre si l'entrée est à jour, sinon None."""
+        with self._lock:
+            entry = self._entries.get(job_offer_uuid)
+            if entry is None or entry.model_version != model_version or entry.data_version != version:
+                return None
+            self._entries.move_to_end(job_offer_uuid)
+            return list(entry.candidates.values())
+
+    def counts(self, job_offer_uuid: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(job_offer_uuid)
+            return entry.bucket_counts() if entry is not None else None
+
+    def put(self, job_offer_uuid: str, results: OfferResults):
+        with self._lock:
+            self._entries[job_offer_uuid] = results
+            self._entries.move_to_end(job_offer_uuid)
+            while len(self._entries) > self.max_offers:
+                self._entries.popitem(last=False)
+
+    def discard(self, job_offer_uuid: str):
+        with self._lock:
+            self._entries.pop(job_offer_uuid, None)
+
+    def apply(
+        self,
+        db: Session,
+        job_offer_uuid: str,
+        model_version: Optional[str] = None,
+        candidates: Iterable[dict] = (),
+        removed: Iterable[str] = (),
+    ):
+        """
+        Répercute sur l'entrée d'une offre (si elle existe) les candidats notés ou modifiés et les candidatures retirées.
+
+        `model_version` est la version qui a noté `candidates` ; une entrée d'une autre version est abandonnée.
+        """
+        entry = self._entries.get(job_offer_uuid)
+        if entry is None:
+            return
+        if model_version is not None and entry.model_version != model_version:
+            self.discard(job_offer_uuid)
+            return
+        version = data_version(db, job_offer_uuid, entry.model_version)
+        with self._lock:
+            for candidate in candidates:
+                entry.upsert(candidate)
+            for application_uuid in removed:
+                entry.remove(application_uuid)
+            if self._entries.get(job_offer_uuid) is not entry:
+                return
+            if len(entry.candidates) == version.applications:
+                entry.data_version = version
+            else:
+                del self._entries[job_offer_uuid]
+
+    def update_application_status(self, db: Session, job_offer_uuid: str, application_uuid: str, status: str):
+        entry = self._entries.get(job_offer_uuid)
+        candidate = entry.candidates.get(application_uuid) if entry is not None else None
+        if candidate is not None:
+            self.apply(db, job_offer_uuid, candidates=[{**candidate, "application_status": status}])
+
+
+offer_results = OfferResultCache()
@@ -1,31 +1,53 @@
+import asyncio
+
 import openai
-from typing import List
+
+from app.main.core.config import Config
 
 # Assurez-vous que votre clé API OpenAI est configurée
-openai.api_key = "your_openai_api_key"
+openai.api_key = Config.OPENAI_API_KEY
 
-def analyze_candidate_profile(cv_text: str, experience_text: str, cover_letter: str, job_description: str) -> str:
+
+class OpenAIProvider:
     """
-    Analyse le profil du candidat (CV, expérience, lettre de motivation) par rapport à l'offre d'emploi.
+    Fournisseur OpenAI. Le client installé n'a pas d'API asynchrone : l'appel bloquant est
+    exécuté dans un thread, pour ne pas bloquer la boucle d'événements.
     """
-    prompt = f"""
-    Job Description: {job_description}
 
-    Candidate CV: {cv_text}
+    def __init__(self, api_key: str, model: str = "gpt-4", max_tokens: int = 300, temperature: float = 0.7):
+        self.api_key = api_key
+        self.model = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.namespace = f"openai:{model}:{max_tokens}:{temperature}"
 
-    Candidate Experience: {experience_text}
+    async def complete(self, prompt: str) -> str:
+        response = await asyncio.to_thread(
+            openai.Completion.create,
+            api_key=self.api_key,
+            model=self.model,
+            prompt=prompt,
+            max_tokens=self.max_tokens,
+            temperature=self.temperature,
+        )
+        return response.choices[0].text.strip()
 
-    Candidate Cover Letter: {cover_letter}
 
-    Based on the job description, evaluate the candidate's suitability for the role. Consider their qualifications, experience, and the relevance of their cover letter.
-    Provide a detailed analysis and suggestion whether this candidate should be shortlisted or rejected.
+def analyze_candidate_profile(cv_text: str, experience_text: str, cover_letter: str, job_description: str) -> str:
     """
-    
-    response = openai.Completion.create(
-        model="gpt-4",
-        prompt=prompt,
-        max_tokens=300,
-        temperature=0.7,
-    )
-    analysis = response.choices[0].text.strip()
-    return analysis
+    Analyse le profil du candidat (CV, expérience, lettre de motivation) par rapport à l'offre d'emploi.
+
+    Version synchrone, pour les scripts : passe par le service d'analyse (cache compris).
+    Depuis du code asynchrone, utiliser directement `await profile_analysis.analyze(...)`.
+    """
+    from app.main.analysis.llm import ProfileInput, profile_analysis
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        raise RuntimeError("analyze_candidate_profile ne peut pas être appelée depuis une boucle d'événements : utiliser `await profile_analysis.analyze(...)`")
+    result = asyncio.run(profile_analysis.analyze(ProfileInput(cv_text, experience_text, cover_letter, job_description)))
+    return result.analysis
+
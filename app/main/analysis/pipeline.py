@@ -0,0 +1,153 @@
+import base64
+import json
+from datetime import date
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.main.analysis.batching import model_n_features
+from app.main.analysis.features import FEATURE_COLUMNS, build_feature_matrix, experience_years
+from app.main.analysis import inference
+from app.main.analysis.model_registry import model_registry
+from app.main.models.application_scores import ScoreStatusEnum
+from app.main.models.candidate_features import CandidateFeature
+
+
+# Fonction pour ajuster le salaire (min 50 000 FCFA)
+def adjust_salary(salary):
+    return max(salary, 50000)
+
+
+# Préparer les données des candidats à partir des lignes chargées par load_applications
+def prepare_candidates_data(rows, job_offer):
+    candidate_data = []
+    job_offer_data = {
+        "salary": adjust_salary(job_offer.salary),
+        "employment_type": job_offer.employment_type,
+    }
+
+    # Les caractéristiques sont lues dans le magasin candidate_features ; calcul à la volée si absentes
+    rows = [row for row in rows if row.candidate]
+    features = [row.features or CandidateFeature(candidate_uuid=row.candidate.uuid) for row in rows]
+    CandidateFeature.compute_many([(feature, row.experiences, row.diplomas) for row, feature in zip(rows, features) if row.features is None])
+    # Années d'expérience de tous les candidats en un seul calcul vectorisé
+    years_of_experience = experience_years(CandidateFeature.experience_days(features, date.today()))
+
+    for (app, candidate, experiences, diplomas, _, cv), candidate_features, years in zip(rows, features, years_of_experience.tolist()):
+        candidate_data.append({
+            "uuid": candidate.uuid,
+            "application_uuid": app.uuid,
+            "application_status": app.status,
+            "first_name": candidate.first_name,
+            "last_name": candidate.last_name,
+            "experience": candidate_features.job_titles,
+            "years_of_experience": years,
+            "job_title": job_offer.title if job_offer else "Titre non trouvé",
+            "diplomas": [{"degree_name": diploma.degree_name, "institution_name": diploma.institution_name, "start_year": diploma.start_year, "end_year": diploma.end_year} for diploma in diplomas],
+            "experiences": [{"job_title": exp.job_title, "company_name": exp.company_name, "start_date": exp.start_date, "end_date": exp.end_date, "description": exp.description} for exp in experiences],
+            "cv": cv,
+        })
+
+    return candidate_data, job_offer_data
+
+
+# Transformer les données en format utilisable par le modèle ; les colonnes du CV ne sont
+# ajoutées que si le modèle (par défaut le modèle actif) a été entraîné avec
+def transform_for_model(candidate_data, job_offer_data, model=None):
+    n_features = model_n_features(model_registry.get().model if model is None else model, len(FEATURE_COLUMNS))
+    return build_feature_matrix(candidate_data, job_offer_data, n_features)
+
+
+# Classe « accepté » du modèle : sa probabilité sert de score de classement
+ACCEPTED_CLASS = 1
+
+
+# Score de classement de chaque ligne : probabilité de la classe « accepté »
+def ranking_scores(probabilities, classes):
+    accepted = np.flatnonzero(np.asarray(classes) == ACCEPTED_CLASS)
+    if not len(accepted):
+        return np.zeros(len(probabilities))
+    return np.asarray(probabilities)[:, accepted[0]]
+
+
+# Catégorie d'un candidat à partir de la prédiction du modèle
+def candidate_status(candidate, prediction):
+    if candidate["years_of_experience"] == 1:
+        return ScoreStatusEnum.PRE_EMPLOYMENT
+    elif prediction == 2:
+        return ScoreStatusEnum.PRE_EMPLOYMENT
+    elif prediction == 0:
+        return ScoreStatusEnum.REJECTED
+    elif prediction == 1:
+        return ScoreStatusEnum.ACCEPTED
+    return None
+
+
+# Répartir les candidats dans les listes acceptés / pré-emploi / rejetés
+def split_by_status(candidate_data: List[dict], statuses):
+    buckets = {status: [] for status in ScoreStatusEnum}
+    for candidate, status in zip(candidate_data, statuses):
+        if status is not None:
+            buckets[ScoreStatusEnum(status)].append(candidate)
+    return buckets[ScoreStatusEnum.ACCEPTED], buckets[ScoreStatusEnum.PRE_EMPLOYMENT], buckets[ScoreStatusEnum.REJECTED]
+
+
+# Classifier les candidats avec le modèle IA ; chaque candidat reçoit ses probabilités par classe et son score
+def classify_candidates(candidate_data, job_offer_data):
+    loaded_model = model_registry.get()
+    X = transform_for_model(candidate_data, job_offer_data, loaded_model.model)
+    probabilities, classes, model_version = inference.predict_proba(X, loaded_model)
+    predictions = classes.take(np.argmax(probabilities, axis=1)) if len(X) else []
+    for candidate, row, score in zip(candidate_data, probabilities.tolist(), ranking_scores(probabilities, classes).tolist()):
+        candidate["probabilities"] = dict(zip(map(str, classes.tolist()), row))
+        candidate["score"] = score
+    statuses = [candidate_status(candidate, prediction) for candidate, prediction in zip(candidate_data, predictions)]
+    return (*split_by_status(candidate_data, statuses), model_version)
+
+
+# Ordre de classement : score décroissant, puis uuid de candidature croissant pour départager les égalités
+def ranking_order(candidate_data: List[dict]) -> np.ndarray:
+    scores = np.array([candidate["score"] for candidate in candidate_data], dtype=np.float64)
+    keys = np.array([candidate["application_uuid"] for candidate in candidate_data], dtype=str)
+    return np.lexsort((keys, -scores)) if len(candidate_data) else np.empty(0, dtype=np.intp)
+
+
+def encode_cursor(candidate: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps([candidate["score"], candidate["application_uuid"]]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """Position (score, uuid de candidature) du dernier candidat d'une page ; ValueError si le curseur est invalide."""
+    try:
+        score, application_uuid = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(score), str(application_uuid)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f"invalid cursor: {cursor}") from e
+
+
+# Page de candidats dans l'ordre de classement, à partir d'un curseur
+def rank_page(candidate_data: List[dict], limit: int, cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+    """
+    Les `limit` candidats suivant le curseur dans l'ordre de classement, et le curseur de la page suivante (None s'il n'y en a plus).
+
+    Le curseur désigne une position (score, uuid) et non un rang : la page suivante reste
+    juste même si des candidats sont notés entre deux appels. Seuls les candidats qui
+    peuvent figurer dans la page sont triés, après une sélection partielle (argpartition).
+    """
+    scores = np.array([candidate["score"] for candidate in candidate_data], dtype=np.float64)
+    keys = np.array([candidate["application_uuid"] for candidate in candidate_data], dtype=str)
+    remaining = np.arange(len(candidate_data))
+    if cursor is not None:
+        after_score, after_uuid = decode_cursor(cursor)
+        remaining = np.flatnonzero((scores < after_score) | ((scores == after_score) & (keys > after_uuid)))
+
+    selected = remaining
+    if len(remaining) > limit:
+        # Les ex æquo du seuil sont tous gardés : le tri qui suit départage par uuid
+        threshold = -np.partition(-scores[remaining], limit - 1)[limit - 1]
+        selected = remaining[scores[remaining] >= threshold]
+    selected = selected[np.lexsort((keys[selected], -scores[selected]))][:limit]
+
+    page = [candidate_data[i] for i in selected.tolist()]
+    next_cursor = encode_cursor(page[-1]) if len(remaining) > limit else None
+    return page, next_cursor
@@ -0,0 +1,191 @@
+import re
+from datetime import date
+from functools import lru_cache
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.main.analysis.features import DIPLOMA_LEVELS, experience_years, normalize_title
+from app.main.analysis.loaders import load_applications
+from app.main.models.applications import Application
+from app.main.models.candidates import Candidat
+from app.main.models.candidate_features import CandidateFeature
+from app.main.models.job_offers import JobOffer
+
+
+class ScreeningCriteria(NamedTuple):
+    """
+    Critères de présélection d'une offre ; un critère à None (ou sans mot-clé) n'est pas appliqué.
+
+    Attributes:
+        min_experience_count: Nombre minimal d'expériences déclarées.
+        min_years_of_experience: Années pleines d'expérience minimales, périodes chevauchantes comptées une fois.
+        min_diploma_level: Niveau de diplôme minimal (années après le baccalauréat).
+        title_keywords: Mots-clés dont l'un au moins doit figurer dans un intitulé de poste du candidat.
+    """
+    min_experience_count: Optional[int] = None
+    min_years_of_experience: Optional[int] = None
+    min_diploma_level: Optional[int] = None
+    title_keywords: Tuple[str, ...] = ()
+
+
+# Règle historique de analyze_candidates : au moins deux expériences
+DEFAULT_CRITERIA = ScreeningCriteria(min_experience_count=2)
+
+# Exigences lues dans le texte normalisé de l'offre : « 3 ans d'expérience », « 5+ years of experience », « Bac+5 »
+YEARS_REQUIRED = re.compile(r"\b([0-9]{1,2}) (?:ans?|annees?|years?) (?:d |of )?(?:experience|exp)\b")
+BAC_LEVEL = re.compile(r"\bbac ([0-9])\b")
+# Mots du titre de l'offre qui ne désignent pas le métier
+TITLE_STOPWORDS = frozenset({
+    "and", "cdd", "cdi", "confirme", "des", "du", "en", "et", "for", "hf", "junior", "la", "le", "les",
+    "of", "alternance", "alternant", "senior", "stage", "stagiaire", "the", "une",
+})
+MIN_KEYWORD_LENGTH = 3
+
+
+def offer_criteria(job_offer: JobOffer, base: ScreeningCriteria = DEFAULT_CRITERIA) -> ScreeningCriteria:
+    """
+    Critères de présélection déduits d'une offre : ceux de `base`, complétés de ce que l'offre exige.
+
+    - mots-clés : les mots du titre, hors mots vides et mots de moins de trois lettres ;
+    - années d'expérience : le plus grand nombre d'années exigé par les prérequis ou la description ;
+    - niveau de diplôme : le plus bas cité dans les prérequis (« Bac+N », sinon le diplôme nommé).
+    """
+    title_keywords = tuple(dict.fromkeys(
+        word for word in normalize_title(job_offer.title).split()
+        if len(word) >= MIN_KEYWORD_LENGTH and word not in TITLE_STOPWORDS
+    ))
+
+    requirements = normalize_title(job_offer.requirements or "")
+    years = [int(match) for match in YEARS_REQUIRED.findall(f"{requirements} {normalize_title(job_offer.description or '')}")]
+
+    levels = [int(level) for level in BAC_LEVEL.findall(requirements)]
+    if not levels:
+        levels = [level for pattern, level in DIPLOMA_LEVELS if pattern.search(requirements)]
+
+    return base._replace(
+        min_years_of_experience=max(years) if years else base.min_years_of_experience,
+        min_diploma_level=min(levels) if levels else base.min_diploma_level,
+        title_keywords=base.title_keywords + title_keywords,
+    )
+
+
+class FeatureArrays(NamedTuple):
+    """Caractéristiques de n candidats en colonnes, telles que les règles compilées les évaluent."""
+    experience_count: np.ndarray
+    years_of_experience: np.ndarray
+    diploma_level: np.ndarray  # -1 si aucun diplôme reconnu
+    title_owners: np.ndarray  # Candidat de chaque intitulé de `titles`
+    titles: List[str]  # Intitulés normalisés de tous les candidats, mis bout à bout
+
+    @classmethod
+    def from_features(cls, features: List[CandidateFeature], today: date = None) -> "FeatureArrays":
+        return cls(
+            np.fromiter((feature.experience_count or 0 for feature in features), dtype=np.int64, count=len(features)),
+            experience_years(CandidateFeature.experience_days(features, today)),
+            np.fromiter((-1 if feature.diploma_level is None else feature.diploma_level for feature in features), dtype=np.int64, count=len(features)),
+            np.repeat(np.arange(len(features)), [len(feature.normalized_job_titles or []) for feature in features]),
+            [title for feature in features for title in feature.normalized_job_titles or []],
+        )
+
+    def __len__(self) -> int:
+        return len(self.experience_count)
+
+
+Predicate = Callable[[FeatureArrays], np.ndarray]
+
+
+class CompiledRules(NamedTuple):
+    criteria: ScreeningCriteria
+    predicates: Tuple[Predicate, ...]
+
+    def evaluate(self, arrays: FeatureArrays) -> np.ndarray:
+        """Masque des candidats qui satisfont tous les critères."""
+        selected = np.ones(len(arrays), dtype=bool)
+        for predicate in self.predicates:
+            selected &= predicate(arrays)
+        return selected
+
+
+@lru_cache(maxsize=256)
+def compile_criteria(criteria: ScreeningCriteria) -> CompiledRules:
+    """
+    Traduit des critères en prédicats vectorisés, évalués sur tous les candidats à la fois.
+
+    Les mots-clés sont normalisés comme les intitulés et réunis en une seule expression
+    régulière ; la compilation est mise en cache, les mêmes critères ne sont compilés qu'une fois.
+    """
+    predicates = []
+    if criteria.min_experience_count is not None:
+        predicates.append(lambda arrays: arrays.experience_count >= criteria.min_experience_count)
+    if criteria.min_years_of_experience is not None:
+        predicates.append(lambda arrays: arrays.years_of_experience >= criteria.min_years_of_experience)
+    if criteria.min_diploma_level is not None:
+        predicates.append(lambda arrays: arrays.diploma_level >= criteria.min_diploma_level)
+
+    keywords = [normalize_title(keyword) for keyword in criteria.title_keywords]
+    keywords = [keyword for keyword in keywords if keyword]
+    if keywords:
+        pattern = re.compile(r"\b(?:" + "|".join(re.escape(keyword) for keyword in keywords) + r")\b")
+
+        def has_title_keyword(arrays: FeatureArrays) -> np.ndarray:
+            matches = np.fromiter((pattern.search(title) is not None for title in arrays.titles), dtype=bool, count=len(arrays.titles))
+            return np.bincount(arrays.title_owners[matches], minlength=len(arrays)) > 0
+
+        predicates.append(has_title_keyword)
+    return CompiledRules(criteria, tuple(predicates))
+
+
+def criteria_for_offer(db: Session, job_offer_uuid: str) -> ScreeningCriteria:
+    """Critères déduits de l'offre, ou les critères par défaut si l'offre n'existe pas."""
+    job_offer = db.query(JobOffer).filter(JobOffer.uuid == job_offer_uuid).first()
+    return offer_criteria(job_offer) if job_offer else DEFAULT_CRITERIA
+
+
+def load_screening_features(db: Session, job_offer_uuid: str) -> Tuple[List[Candidat], List[CandidateFeature]]:
+    """
+    Candidats (non supprimés) ayant postulé à l'offre et leurs caractéristiques, en une requête jointe.
+
+    Les caractéristiques encore absentes du magasin sont calculées en lot, à partir des
+    expériences et diplômes chargés par load_applications pour ces seuls candidats.
+    """
+    rows = (
+        db.query(Candidat, CandidateFeature)
+        .join(Application, Application.candidate_uuid == Candidat.uuid)
+        .outerjoin(CandidateFeature, CandidateFeature.candidate_uuid == Candidat.uuid)
+        .filter(Application.job_offer_uuid == job_offer_uuid, Application.is_deleted.isnot(True))
+        .all()
+    )
+    candidates = [candidate for candidate, _ in rows]
+    features = [feature for _, feature in rows]
+
+    missing = [i for i, feature in enumerate(features) if feature is None]
+    if missing:
+        loaded = {
+            row.candidate.uuid: row
+            for row in load_applications(db, Application.job_offer_uuid == job_offer_uuid, Application.candidate_uuid.in_([candidates[i].uuid for i in missing]))
+        }
+        entries = []
+        for i in missing:
+            features[i] = CandidateFeature(candidate_uuid=candidates[i].uuid)
+            row = loaded.get(candidates[i].uuid)
+            entries.append((features[i], row.experiences if row else [], row.diplomas if row else []))
+        CandidateFeature.compute_many(entries)
+    return candidates, features
+
+
+def screen_candidates(db: Session, job_offer_uuid: str, criteria: Optional[ScreeningCriteria] = None) -> Tuple[List[Candidat], List[Candidat]]:
+    """
+    Retourne (retenus, non retenus) parmi les candidats de l'offre, en une passe sur leurs caractéristiques.
+
+    Sans critères, ceux-ci sont déduits de l'offre (voir offer_criteria).
+    """
+    if criteria is None:
+        criteria = criteria_for_offer(db, job_offer_uuid)
+    candidates, features = load_screening_features(db, job_offer_uuid)
+    selected = compile_criteria(criteria).evaluate(FeatureArrays.from_features(features))
+    return (
+        [candidate for candidate, keep in zip(candidates, selected.tolist()) if keep],
+        [candidate for candidate, keep in zip(candidates, selected.tolist()) if not keep],
+    )
@@ -0,0 +1,204 @@
+import hashlib
+import uuid
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+
+import numpy as np
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.main.analysis import inference
+from app.main.analysis.loaders import load_applications
+from app.main.analysis.model_registry import model_registry
+from app.main.analysis.offer_results import offer_results
+from app.main.analysis.pipeline import candidate_status, prepare_candidates_data, ranking_scores, transform_for_model
+from app.main.models.applications import Application
+from app.main.models.application_scores import ApplicationScore
+from app.main.models.job_offers import JobOffer
+from app.main.utils import logger
+
+
+# Au-delà, les scores existants sont lus par offre plutôt que par liste de candidatures
+MAX_IN_CLAUSE = 500
+# Tentatives de commit des scores face aux requêtes concurrentes qui notent les mêmes candidatures
+MAX_SCORE_ATTEMPTS = 3
+
+
+def feature_hashes(X: np.ndarray) -> List[str]:
+    """Empreinte SHA-1 de chaque ligne de la matrice de caractéristiques."""
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    return [hashlib.sha1(row.tobytes()).hexdigest() for row in X]
+
+
+class OfferBatch(NamedTuple):
+    job_offer: JobOffer
+    candidate_data: List[dict]
+    job_offer_data: dict
+
+
+def offer_batches(rows, job_offers) -> List[OfferBatch]:
+    """Regroupe des lignes chargées par load_applications par offre, dans l'ordre des offres données."""
+    rows_by_offer = defaultdict(list)
+    for row in rows:
+        rows_by_offer[row.application.job_offer_uuid].append(row)
+    return [OfferBatch(job_offer, *prepare_candidates_data(rows_by_offer[job_offer.uuid], job_offer)) for job_offer in job_offers]
+
+
+def score_candidates(
+    db: Session,
+    job_offer: JobOffer,
+    candidate_data: List[dict],
+    job_offer_data: dict,
+) -> Tuple[Dict[str, ApplicationScore], str]:
+    """
+    Retourne les scores du modèle actif pour les candidatures d'une offre, indexés par uuid de candidature.
+    """
+    return score_offers(db, [OfferBatch(job_offer, candidate_data, job_offer_data)])
+
+
+def score_offers(db: Session, batches: List[OfferBatch]) -> Tuple[Dict[str, ApplicationScore], str]:
+    """
+    Retourne les scores du modèle actif pour les candidatures de plusieurs offres, indexés par uuid de candidature.
+
+    Les scores existants sont lus en une requête, et les couples (candidat, offre) à
+    noter de toutes les offres forment une seule matrice, prédite en un seul appel.
+    Seules les candidatures sans score pour la version active, ou dont l'empreinte des
+    caractéristiques a changé depuis leur notation, passent par le modèle, qui
+    fournit les probabilités de chaque classe : la classe prédite en découle, et la
+    probabilité de la classe « accepté » est enregistrée comme score de classement.
+    Les scores créés ou mis à jour sont ajoutés à la session, sans commit.
+    """
+    loaded_model = model_registry.get()
+    query = db.query(ApplicationScore).filter(ApplicationScore.model_version == loaded_model.version)
+    application_uuids = [candidate["application_uuid"] for batch in batches for candidate in batch.candidate_data]
+    if len(application_uuids) <= MAX_IN_CLAUSE:
+        query = query.filter(ApplicationScore.application_uuid.in_(application_uuids))
+    else:
+        query = query.filter(ApplicationScore.job_offer_uuid.in_([batch.job_offer.uuid for batch in batches]))
+    scores = {score.application_uuid: score for score in query}
+
+    pairs = [(batch.job_offer, candidate) for batch in batches for candidate in batch.candidate_data]
+    if not pairs:
+        return scores, loaded_model.version
+    X = np.concatenate([transform_for_model(batch.candidate_data, batch.job_offer_data, loaded_model.model) for batch in batches])
+    hashes = feature_hashes(X)
+    to_score = [
+        i for i, (_, candidate) in enumerate(pairs)
+        if is_missing(scores.get(candidate["application_uuid"])) or scores[candidate["application_uuid"]].feature_hash != hashes[i]
+    ]
+    X, hashes = X[to_score], [hashes[i] for i in to_score]
+
+    if to_score:
+        # Prédiction par le modèle qui a fixé le nombre de colonnes de X, même s'il a été remplacé entre-temps
+        probabilities, classes, _ = inference.predict_proba(X, loaded_model)
+        predictions = classes.take(np.argmax(probabilities, axis=1))
+        rankings = ranking_scores(probabilities, classes)
+        class_keys = [str(label) for label in classes.tolist()]
+        for i, feature_hash, prediction, row, ranking_score in zip(to_score, hashes, predictions, probabilities.tolist(), rankings.tolist()):
+            job_offer, candidate = pairs[i]
+            score = scores.get(candidate["application_uuid"])
+            if score is None:
+                score = ApplicationScore(
+                    uuid=str(uuid.uuid4()),
+                    application_uuid=candidate["application_uuid"],
+                    job_offer_uuid=job_offer.uuid,
+                    candidate_uuid=candidate["uuid"],
+                    model_version=loaded_model.version,
+                )
+                db.add(score)
+                scores[candidate["application_uuid"]] = score
+            status = candidate_status(candidate, prediction)
+            score.feature_hash = feature_hash
+            score.prediction = int(prediction)
+            score.status = status.value if status else None
+            score.probabilities = dict(zip(class_keys, row))
+            score.ranking_score = ranking_score
+        logger.info(f"{len(to_score)} applications scored for {len(batches)} offer(s) with model {loaded_model.version}")
+
+    return scores, loaded_model.version
+
+
+def commit_scores(db: Session, score: Callable[[], Any]) -> Tuple[Any, bool]:
+    """
+    Exécute `score`, qui ajoute des scores à la session, puis enregistre ceux-ci.
+
+    Deux requêtes simultanées peuvent noter la même candidature pour la même version :
+    la seconde viole alors la contrainte d'unicité (candidature, version). La transaction
+    est annulée et `score` relancé ; il relit les scores que l'autre requête a enregistrés
+    et ne note plus que les candidatures restantes.
+
+    Returns:
+        tuple: Le résultat de `score`, et si des scores ont été enregistrés.
+    """
+    for attempt in range(MAX_SCORE_ATTEMPTS):
+        result = score()
+        if not (db.new or db.dirty):
+            return result, False
+        try:
+            db.commit()
+            return result, True
+        except IntegrityError:
+            db.rollback()
+            if attempt == MAX_SCORE_ATTEMPTS - 1:
+                raise
+            logger.info("Scores written concurrently by another request, scoring again")
+
+
+def is_missing(score: ApplicationScore) -> bool:
+    """Score absent, ou calculé avant l'enregistrement des probabilités."""
+    return score is None or score.ranking_score is None
+
+
+def attach_scores(candidate_data: List[dict], scores: Dict[str, ApplicationScore]) -> List[str]:
+    """Ajoute à chaque candidat sa catégorie, son score de classement et ses probabilités ; retourne les catégories."""
+    statuses = []
+    for candidate in candidate_data:
+        score = scores[candidate["application_uuid"]]
+        candidate["status"] = score.status
+        candidate["score"] = score.ranking_score
+        candidate["probabilities"] = score.probabilities
+        statuses.append(score.status)
+    return statuses
+
+
+def score_applications(db: Session, *criteria) -> int:
+    """
+    Calcule et enregistre les scores manquants ou périmés des candidatures répondant aux critères.
+
+    Retourne le nombre de candidatures examinées.
+    """
+    rows = load_applications(db, *criteria)
+    if not rows:
+        return 0
+
+    job_offer_uuids = {row.application.job_offer_uuid for row in rows}
+
+    def score():
+        batches = offer_batches(rows, db.query(JobOffer).filter(JobOffer.uuid.in_(job_offer_uuids)).all())
+        return batches, *score_offers(db, batches)
+
+    (batches, scores, model_version), _ = commit_scores(db, score)
+
+    # Les résultats en cache des offres concernées sont mis à jour en place
+    for batch in batches:
+        attach_scores(batch.candidate_data, scores)
+        offer_results.apply(db, batch.job_offer.uuid, model_version, candidates=batch.candidate_data)
+    return len(rows)
+
+
+def score_offer(db: Session, job_offer_uuid: str) -> int:
+    return score_applications(db, Application.job_offer_uuid == job_offer_uuid)
+
+
+def score_application(db: Session, application_uuid: str) -> int:
+    return score_applications(db, Application.uuid == application_uuid)
+
+
+def application_updated(db: Session, application: Application):
+    """Répercute le changement de statut d'une candidature sur le résultat en cache de son offre."""
+    offer_results.update_application_status(db, application.job_offer_uuid, application.uuid, application.status)
+
+
+def application_deleted(db: Session, application: Application):
+    """Retire une candidature supprimée du résultat en cache de son offre."""
+    offer_results.apply(db, application.job_offer_uuid, removed=[application.uuid])
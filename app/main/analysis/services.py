@@ -1,38 +1,22 @@
 # app/analysis/services.py
 from sqlalchemy.orm import Session
-from app.main.models import Application, Candidat, JobOffer
-from typing import List, Dict
+from typing import Dict, List, Optional
 
-def analyze_candidates(db: Session, job_offer_uuid: str) -> Dict[str, List]:
-    """
-    Analyse les candidatures pour une offre d'emploi donnée.
-    Retourne les candidats retenus et non retenus.
-    """
-    applications = db.query(Application).filter(Application.job_offer_uuid == job_offer_uuid, Application.is_deleted == False).all()
-    
-    selected_candidates = []
-    rejected_candidates = []
-    
-    for application in applications:
-        candidate = db.query(Candidat).filter(Candidat.uuid == application.candidate_uuid).first()
-        job_offer = db.query(JobOffer).filter(JobOffer.uuid == job_offer_uuid).first()
-        
-        if not candidate or not job_offer:
-            continue
-        
-        if meets_criteria(candidate, job_offer):
-            selected_candidates.append(candidate)
-        else:
-            rejected_candidates.append(candidate)
-    
-    return {"selected": selected_candidates, "rejected": rejected_candidates}
+from app.main.analysis.rules import ScreeningCriteria, criteria_for_offer, screen_candidates
 
 
-def meets_criteria(candidate: Candidat, job_offer: JobOffer) -> bool:
+def analyze_candidates(db: Session, job_offer_uuid: str, criteria: Optional[ScreeningCriteria] = None) -> Dict[str, List]:
     """
-    Vérifie si un candidat répond aux critères d'une offre d'emploi.
+    Analyse les candidatures pour une offre d'emploi donnée.
+    Retourne les critères appliqués, les candidats retenus et non retenus.
+
+    Sans critères, ceux-ci sont déduits de l'offre : au moins deux expériences (règle
+    historique), plus les mots-clés du titre, les années d'expérience et le niveau de
+    diplôme exigés (voir analysis.rules.offer_criteria). Les critères sont compilés une
+    fois en prédicats vectorisés, évalués sur les caractéristiques de tous les candidats
+    chargées en une requête.
     """
-    # Logique avancée d'analyse (exemple simplifié)
-    if candidate.experiences and len(candidate.experiences) >= 2:
-        return True
-    return False
+    if criteria is None:
+        criteria = criteria_for_offer(db, job_offer_uuid)
+    selected_candidates, rejected_candidates = screen_candidates(db, job_offer_uuid, criteria)
+    return {"criteria": criteria, "selected": selected_candidates, "rejected": rejected_candidates}
@@ -0,0 +1,52 @@
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, TypeVar
+
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Regroupe les appels identiques simultanés en un seul calcul.
+
+    Le premier appel pour une clé lance le calcul ; les appels de même clé qui arrivent
+    pendant qu'il est en cours l'attendent et reçoivent son résultat (ou son exception)
+    au lieu de recommencer. La clé est retirée dès la fin du calcul : un appel ultérieur
+    recalcule, le cache éventuel étant de la responsabilité de l'appelant.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._metrics = {"computed": 0, "coalesced": 0, "errors": 0}
+
+    def do(self, key: Hashable, compute: Callable[[], T]) -> T:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self._metrics["computed"] += 1
+            else:
+                self._metrics["coalesced"] += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = compute()
+        except BaseException as e:
+            with self._lock:
+                self._metrics["errors"] += 1
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {**self._metrics, "in_flight": len(self._calls)}
@@ -0,0 +1,264 @@
+import threading
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from app.main.analysis.features import normalize_title
+
+
+# Mots vides français et anglais, sans intérêt pour la correspondance offre / candidat
+STOP_WORDS = frozenset("""
+    a au aux avec ce ces dans de des du en et est il ils la le les leur lui mais me meme mes ne nos notre nous on ou
+    par pas pour qu que qui sa se ses son sur ta te tes toi ton tu un une vos votre vous afin ainsi chez comme entre
+    etre avoir plus tres tout tous toute toutes
+    an and are as at be by for from has have in is it its of on or that the their this to was were will with you your
+""".split())
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Découpe un texte normalisé (minuscules, sans accents) en termes, sans mots vides ni nombres."""
+    return [
+        token
+        for token in normalize_title(text).split()
+        if len(token) > 1 and token not in STOP_WORDS and not token.isdigit()
+    ]
+
+
+def term_counts(texts: Iterable[Optional[str]]) -> Dict[str, int]:
+    """Nombre d'occurrences de chaque terme dans l'ensemble des textes d'un document."""
+    counts = Counter()
+    for text in texts:
+        counts.update(tokenize(text))
+    return dict(counts)
+
+
+class IndexSnapshot(NamedTuple):
+    """Index inversé figé : vecteurs TF-IDF normalisés au format CSC (une colonne = la liste des documents d'un terme)."""
+    postings: sparse.csc_matrix
+    n_rows: int
+    groups: np.ndarray
+
+
+class TfidfIndex:
+    """
+    Index TF-IDF incrémental de documents identifiés par une clé.
+
+    Les nombres d'occurrences sont conservés dans une matrice creuse CSR (une ligne par
+    document) et les fréquences documentaires sont tenues à jour à chaque ajout : un
+    document ajouté ou modifié ne coûte que sa propre ligne. Les lignes ajoutées sont
+    accumulées puis empilées en une fois à la lecture suivante ; la ligne d'un document
+    remplacé ou retiré est vidée, et la matrice est compactée quand ces lignes mortes
+    deviennent majoritaires.
+
+    Les vecteurs retournés sont pondérés par l'IDF courant (lissé, comme scikit-learn)
+    et normalisés (L2) : le produit de deux vecteurs est leur similarité cosinus.
+
+    Pour la recherche dans tout l'index, un instantané CSC sert d'index inversé : seuls
+    les documents qui partagent au moins un terme avec la requête sont notés. Il est
+    reconstruit quand les documents ajoutés depuis dépassent `snapshot_tolerance` (en
+    part de l'index) ; ces derniers sont notés à part, avec l'IDF courant.
+    """
+
+    def __init__(self, snapshot_tolerance: float = 0.05):
+        self.vocabulary: Dict[str, int] = {}
+        self.snapshot_tolerance = snapshot_tolerance
+        self._document_frequency = np.zeros(0, dtype=np.int64)
+        self._rows: Dict[Hashable, int] = {}
+        self._signatures: Dict[Hashable, int] = {}
+        self._keys: List[Optional[Hashable]] = []
+        self._groups: List[Hashable] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._counts = sparse.csr_matrix((0, 0), dtype=np.float64)
+        self._pending: List[sparse.csr_matrix] = []
+        self._snapshot: Optional[IndexSnapshot] = None
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._rows
+
+    def add(self, key: Hashable, terms: Dict[str, int], group: Hashable = None):
+        """
+        Ajoute un document, ou remplace celui qui porte déjà cette clé.
+
+        `group` (type de document) permet de restreindre une recherche, par exemple aux seuls candidats.
+        """
+        self.add_many([(key, terms, group)])
+
+    def add_many(self, documents: Iterable[Tuple[Hashable, Dict[str, int], Hashable]]):
+        """Ajoute ou remplace des documents (clé, termes, groupe) en un seul bloc de lignes."""
+        # Une clé présente plusieurs fois dans le lot n'est ajoutée qu'une fois, avec ses derniers termes
+        documents = {key: (terms, group) for key, terms, group in documents}
+        with self._lock:
+            indptr, indices, data = [0], [], []
+            for key, (terms, group) in documents.items():
+                # Document inchangé (resynchronisation, offre réindexée) : rien à faire
+                signature = hash(frozenset(terms.items()))
+                if self._signatures.get(key) == signature and self._groups[self._rows[key]] == group:
+                    continue
+                self._drop(key)
+                self._signatures[key] = signature
+                for term, count in terms.items():
+                    column = self.vocabulary.get(term)
+                    if column is None:
+                        column = self.vocabulary[term] = len(self.vocabulary)
+                    indices.append(column)
+                    data.append(count)
+                indptr.append(len(indices))
+                self._rows[key] = len(self._keys)
+                self._keys.append(key)
+                self._groups.append(group)
+            if len(indptr) == 1:
+                return
+
+            n_terms = len(self.vocabulary)
+            if n_terms > len(self._document_frequency):
+                grown = np.zeros(max(n_terms, 2 * len(self._document_frequency)), dtype=np.int64)
+                grown[:len(self._document_frequency)] = self._document_frequency
+                self._document_frequency = grown
+            indices = np.asarray(indices, dtype=np.int64)
+            self._document_frequency[:n_terms] += np.bincount(indices, minlength=n_terms)
+
+            if len(self._keys) > len(self._alive):
+                grown = np.zeros(max(1024, 2 * len(self._keys)), dtype=bool)
+                grown[:len(self._alive)] = self._alive
+                self._alive = grown
+            self._alive[len(self._keys) - len(indptr) + 1:len(self._keys)] = True
+
+            block = sparse.csr_matrix((np.asarray(data, dtype=np.float64), indices, indptr), shape=(len(indptr) - 1, n_terms))
+            block.sort_indices()
+            self._pending.append(block)
+
+    def remove(self, key: Hashable):
+        with self._lock:
+            self._drop(key)
+
+    def _drop(self, key: Hashable):
+        row = self._rows.pop(key, None)
+        if row is None:
+            return
+        del self._signatures[key]
+        self._keys[row] = None
+        self._alive[row] = False
+        self._flush()
+        start, end = self._counts.indptr[row], self._counts.indptr[row + 1]
+        self._document_frequency[self._counts.indices[start:end]] -= 1
+        self._counts.data[start:end] = 0
+
+    def _flush(self):
+        """Empile les lignes en attente et aligne toutes les lignes sur la taille courante du vocabulaire."""
+        if self._pending:
+            n_terms = len(self.vocabulary)
+            blocks = [self._counts] + self._pending
+            for block in blocks:
+                block.resize((block.shape[0], n_terms))
+            self._counts = sparse.vstack(blocks, format="csr")
+            self._pending = []
+
+    def _compact(self):
+        """Retire les lignes des documents remplacés ou supprimés quand elles sont majoritaires."""
+        if len(self._keys) <= 64 or len(self._rows) >= len(self._keys) // 2:
+            return
+        live = [row for row, key in enumerate(self._keys) if key is not None]
+        self._counts = self._counts[live]
+        self._counts.eliminate_zeros()
+        self._keys = [self._keys[row] for row in live]
+        self._groups = [self._groups[row] for row in live]
+        self._rows = {key: row for row, key in enumerate(self._keys)}
+        self._alive = np.zeros(max(1024, 2 * len(live)), dtype=bool)
+        self._alive[:len(live)] = True
+        self._snapshot = None
+
+    def idf(self) -> np.ndarray:
+        n_documents = len(self._rows)
+        return np.log((1 + n_documents) / (1 + self._document_frequency[:len(self.vocabulary)])) + 1
+
+    def _weighted(self, rows: np.ndarray) -> sparse.csr_matrix:
+        matrix = self._counts[rows] @ sparse.diags(self.idf())
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sparse.csr_matrix(sparse.diags(1 / norms) @ matrix)
+
+    def vectors(self, keys: Iterable[Hashable]) -> sparse.csr_matrix:
+        """
+        Vecteurs TF-IDF normalisés des documents demandés, dans l'ordre des clés ; ligne vide pour une clé inconnue.
+        """
+        keys = list(keys)
+        with self._lock:
+            self._flush()
+            self._compact()
+            known = [i for i, key in enumerate(keys) if key in self._rows]
+            weighted = self._weighted(np.asarray([self._rows[keys[i]] for i in known], dtype=np.int64))
+        # Les lignes des clés inconnues restent vides
+        placement = sparse.csr_matrix(
+            (np.ones(len(known)), (known, np.arange(len(known)))),
+            shape=(len(keys), len(known)),
+        )
+        return sparse.csr_matrix(placement @ weighted)
+
+    def _current_snapshot(self) -> IndexSnapshot:
+        snapshot = self._snapshot
+        n_rows = len(self._keys)
+        if snapshot is None or n_rows - snapshot.n_rows > self.snapshot_tolerance * max(len(self._rows), 1):
+            postings = self._weighted(np.arange(n_rows)).tocsc()
+            snapshot = self._snapshot = IndexSnapshot(postings, n_rows, np.asarray(self._groups, dtype=object))
+        return snapshot
+
+    def search(self, query_key: Hashable, k: int, group: Hashable = None) -> List[Tuple[Hashable, float]]:
+        """
+        Les k documents les plus proches du document `query_key` (hors lui-même), éventuellement limités à un groupe.
+
+        Les listes de documents des termes de la requête (colonnes de l'instantané CSC)
+        sont parcourues par un unique produit creux ; les documents sans terme commun ne
+        sont jamais notés, et la sélection des k meilleurs se fait par argpartition.
+
+        Returns:
+            list: (clé, similarité cosinus) triés par similarité décroissante.
+        """
+        with self._lock:
+            self._flush()
+            self._compact()
+            if query_key not in self._rows:
+                return []
+            snapshot = self._current_snapshot()
+            query_row = self._rows[query_key]
+            query = self._weighted(np.asarray([query_row]))
+            columns = query.indices[query.indices < snapshot.postings.shape[1]]
+
+            # Produit limité aux colonnes (listes de documents) des termes de la requête
+            scores = snapshot.postings[:, columns] @ query.data[np.isin(query.indices, columns)]
+            rows = np.flatnonzero(scores)
+            scores = scores[rows]
+
+            # Documents ajoutés depuis l'instantané
+            recent = np.arange(snapshot.n_rows, len(self._keys))
+            if len(recent):
+                rows = np.concatenate([rows, recent])
+                scores = np.concatenate([scores, np.asarray((self._weighted(recent) @ query.T).todense()).ravel()])
+
+            groups = np.concatenate([snapshot.groups, np.asarray(self._groups[snapshot.n_rows:], dtype=object)])
+            keep = self._alive[rows] & (rows != query_row) & (scores > 0)
+            if group is not None:
+                keep &= groups[rows] == group
+            rows, scores = rows[keep], scores[keep]
+            best = top_k(scores, k)
+            return [(self._keys[row], float(score)) for row, score in zip(rows[best].tolist(), scores[best].tolist())]
+
+    def similarities(self, query_key: Hashable, keys: Iterable[Hashable]) -> np.ndarray:
+        """Similarité cosinus du document `query_key` avec chacun des documents `keys`."""
+        keys = list(keys)
+        vectors = self.vectors([query_key] + keys)
+        return np.asarray((vectors[1:] @ vectors[0].T).todense()).ravel()
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices des k meilleurs scores, du plus élevé au plus faible, sans trier tout le tableau."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best], kind="stable")]
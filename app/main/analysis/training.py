@@ -0,0 +1,402 @@
+"""
+Entraînement du modèle de scoring à partir de l'issue des candidatures passées.
+
+Les candidatures sont lues par lots (`yield_per`) avec le salaire et le type de contrat
+de leur offre, les caractéristiques précalculées du candidat et son CV analysé ; la matrice
+est construite par les mêmes fonctions que le scoring, colonnes du CV comprises. Le modèle est évalué sur un jeu de validation puis
+écrit dans le répertoire des modèles sous `<version>.pkl`, accompagné de `<version>.metrics.json`.
+
+Un artefact écrit sans `--activate` reste inerte : le registre continue de servir la version
+désignée par le pointeur ACTIVE (ou le modèle historique) jusqu'à `POST /analyse/models/activate`.
+
+Usage :
+    python -m app.main.analysis.training --database-url sqlite:///training.sqlite --synthetic 1000000
+    python -m app.main.analysis.training --version 2024-06-01 --n-jobs -1 --activate
+"""
+import argparse
+import json
+import os
+import pickle
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+from sklearn.model_selection import train_test_split
+from sqlalchemy import create_engine, func, insert
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.main.analysis.features import CV_FEATURE_COLUMNS, FEATURE_COLUMNS, build_feature_matrix, experience_years
+from app.main.analysis.intervals import total_experience_days
+from app.main.analysis.model_registry import ARTIFACT_EXTENSION, ModelRegistry
+from app.main.analysis.pipeline import adjust_salary
+from app.main.core.config import Config
+from app.main.models.applications import Application, ApplicationStatusEnum
+from app.main.models.candidates import Candidat
+from app.main.models.candidate_features import CandidateFeature
+from app.main.models.db.base_class import Base
+from app.main.models.job_offers import JobOffer
+from app.main.models.storage import Storage
+from app.main.utils import logger
+
+
+# Classe cible de chaque statut final, dans la convention de candidate_status :
+# 0 = rejeté, 1 = accepté, 2 = pré-emploi (candidature restée en attente)
+LABELS = {
+    ApplicationStatusEnum.REJECTED: 0,
+    ApplicationStatusEnum.ACCEPTED: 1,
+    ApplicationStatusEnum.PENDING: 2,
+}
+
+DEFAULT_CHUNK_SIZE = 10000
+# Colonnes de la matrice d'entraînement : celles du scoring suivies de celles du CV analysé
+TRAINING_COLUMNS = FEATURE_COLUMNS + CV_FEATURE_COLUMNS
+METRICS_EXTENSION = ".metrics.json"
+
+
+def backfill_features(db: Session, batch_size: int = 1000) -> int:
+    """
+    Calcule les caractéristiques des candidats qui n'en ont pas encore, par lots.
+    """
+    total = 0
+    while True:
+        missing = (
+            db.query(Candidat.uuid)
+            .outerjoin(CandidateFeature, CandidateFeature.candidate_uuid == Candidat.uuid)
+            .filter(CandidateFeature.candidate_uuid.is_(None))
+            .limit(batch_size)
+            .all()
+        )
+        if not missing:
+            return total
+        CandidateFeature.refresh(db, [uuid for uuid, in missing])
+        db.commit()
+        total += len(missing)
+
+
+def training_query(db: Session):
+    """
+    Candidatures étiquetées : statut final, offre, caractéristiques et CV analysé du candidat, en tuples de colonnes.
+
+    Le CV est celui de la candidature, à défaut celui du candidat, comme au chargement pour le scoring.
+    """
+    return (
+        db.query(
+            Application.status,
+            Application.applied_date,
+            JobOffer.salary,
+            JobOffer.employment_type,
+            CandidateFeature.closed_intervals,
+            CandidateFeature.ongoing_start_dates,
+            CandidateFeature.job_titles,
+            Storage.cv_data,
+        )
+        .join(JobOffer, JobOffer.uuid == Application.job_offer_uuid)
+        .join(CandidateFeature, CandidateFeature.candidate_uuid == Application.candidate_uuid)
+        .join(Candidat, Candidat.uuid == Application.candidate_uuid)
+        .outerjoin(Storage, Storage.uuid == func.coalesce(Application.cv_uuid, Candidat.cv_uuid))
+        .filter(Application.is_deleted.isnot(True), Application.status.in_([status.value for status in LABELS]))
+    )
+
+
+def build_training_chunk(rows) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Matrice de caractéristiques et classes cibles d'un lot de candidatures.
+
+    Les expériences en cours sont comptées jusqu'à la date de candidature, c'est-à-dire
+    telles que le scoring les voyait au moment où la décision a été prise.
+    """
+    statuses, applied_dates, salaries, employment_types, closed_intervals, ongoing_start_dates, job_titles, cvs = zip(*rows)
+    reference_dates = [applied_date.date() if applied_date else date.today() for applied_date in applied_dates]
+    years = experience_years(total_experience_days(closed_intervals, ongoing_start_dates, reference_dates))
+    candidate_data = [
+        {"experience": titles, "years_of_experience": candidate_years, "cv": cv}
+        for titles, candidate_years, cv in zip(job_titles, years.tolist(), cvs)
+    ]
+    salaries = np.fromiter((adjust_salary(salary) for salary in salaries), dtype=np.float64, count=len(rows))
+    y = np.fromiter((LABELS[ApplicationStatusEnum(status)] for status in statuses), dtype=np.int8, count=len(rows))
+    X = build_feature_matrix(candidate_data, {"salary": salaries, "employment_type": employment_types}, n_features=len(TRAINING_COLUMNS))
+    return X, y
+
+
+def load_training_set(db: Session, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lit les candidatures étiquetées lot par lot et remplit une matrice préallouée.
+
+    Seules la matrice finale (48 octets par candidature) et le lot courant sont en
+    mémoire : les objets ORM ne sont jamais matérialisés.
+    """
+    query = training_query(db)
+    n = query.count()
+    X = np.empty((n, len(TRAINING_COLUMNS)), dtype=np.float64)
+    y = np.empty(n, dtype=np.int8)
+
+    offset = 0
+    chunk = []
+    for row in query.yield_per(chunk_size):
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            offset = _store_chunk(X, y, offset, chunk)
+            chunk = []
+    if chunk:
+        offset = _store_chunk(X, y, offset, chunk)
+    # Des candidatures ont pu être supprimées entre le comptage et la lecture
+    return X[:offset], y[:offset]
+
+
+def _store_chunk(X: np.ndarray, y: np.ndarray, offset: int, rows) -> int:
+    # Des candidatures ont pu être ajoutées entre le comptage et la lecture
+    rows = rows[:len(X) - offset]
+    if not rows:
+        return offset
+    X_chunk, y_chunk = build_training_chunk(rows)
+    X[offset:offset + len(X_chunk)] = X_chunk
+    y[offset:offset + len(y_chunk)] = y_chunk
+    return offset + len(X_chunk)
+
+
+def train(
+    X: np.ndarray,
+    y: np.ndarray,
+    holdout: float = 0.2,
+    n_estimators: int = 200,
+    max_depth: Optional[int] = None,
+    n_jobs: int = -1,
+    random_state: int = 42,
+) -> Tuple[RandomForestClassifier, dict]:
+    """
+    Entraîne la forêt aléatoire et l'évalue sur une part `holdout` des candidatures, tirée de façon stratifiée.
+    """
+    classes, counts = np.unique(y, return_counts=True)
+    stratify = y if len(classes) > 1 and counts.min() > 1 else None
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=holdout, random_state=random_state, stratify=stratify)
+
+    model = RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth, n_jobs=n_jobs, random_state=random_state)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    predict_seconds = time.perf_counter() - start
+
+    metrics = {
+        "rows": int(len(y)),
+        "train_rows": int(len(y_train)),
+        "holdout_rows": int(len(y_test)),
+        "class_counts": {str(label): int(count) for label, count in zip(classes, counts)},
+        "params": {"n_estimators": n_estimators, "max_depth": max_depth, "n_jobs": n_jobs, "random_state": random_state},
+        "features": list(TRAINING_COLUMNS[:X.shape[1]]),
+        "feature_importances": dict(zip(TRAINING_COLUMNS, model.feature_importances_.tolist())),
+        "accuracy": accuracy_score(y_test, y_pred),
+        "classification_report": classification_report(y_test, y_pred, output_dict=True, zero_division=0),
+        "confusion_matrix": {
+            "labels": model.classes_.tolist(),
+            "matrix": confusion_matrix(y_test, y_pred, labels=model.classes_).tolist(),
+        },
+        "fit_seconds": fit_seconds,
+        "predict_seconds": predict_seconds,
+    }
+    return model, metrics
+
+
+def save_artifact(models_dir: str, version: str, model, metrics: dict) -> str:
+    """
+    Écrit `<version>.pkl` et `<version>.metrics.json` de façon atomique dans le répertoire des modèles.
+    """
+    os.makedirs(models_dir, exist_ok=True)
+    path = os.path.join(models_dir, f"{version}{ARTIFACT_EXTENSION}")
+    if os.path.exists(path):
+        raise ValueError(f"Model version {version} already exists in {models_dir}")
+
+    metrics_path = os.path.join(models_dir, f"{version}{METRICS_EXTENSION}")
+    tmp_metrics_path = f"{metrics_path}.{os.getpid()}.tmp"
+    with open(tmp_metrics_path, "w") as f:
+        json.dump(metrics, f, indent=2, default=str)
+    os.replace(tmp_metrics_path, metrics_path)
+
+    # L'artefact est écrit en dernier : le registre ne voit la version qu'une fois complète
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(model, f)
+    os.replace(tmp_path, path)
+    return path
+
+
+SYNTHETIC_TITLES = [
+    "Développeur Backend CDI", "Développeur React JS", "Data Scientist CDD", "Ingénieur DevOps",
+    "Comptable Senior", "Stage Marketing Digital", "Responsable RH", "Chef de Projet IT Freelance",
+]
+SYNTHETIC_EMPLOYMENT_TYPES = ["CDI", "CDD", "Stage", "Freelance"]
+
+
+def generate_synthetic_data(db: Session, n_applications: int, seed: int = 42, batch_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Remplit une base vide de candidats, offres et candidatures factices, par insertions groupées.
+
+    Le statut final suit une règle bruitée (expérience, contrat correspondant, salaire)
+    pour que le modèle ait un signal à apprendre.
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    now = datetime.now()
+    n_candidates = max(1, n_applications // 3)
+    n_offers = max(1, n_applications // 1000)
+
+    offers = []
+    for _ in range(n_offers):
+        salary = float(rng.choice([40000, 150000, 300000, 500000, 800000, 1200000]))
+        offers.append({
+            "uuid": str(uuid.uuid4()),
+            "title": rng.choice(SYNTHETIC_TITLES),
+            "description": "Offre générée pour l'entraînement",
+            "company_name": "Synthetic",
+            "location": "Douala",
+            "salary": salary,
+            "full_salary": f"{salary:.0f} FCFA",
+            "employment_type": rng.choice(SYNTHETIC_EMPLOYMENT_TYPES),
+            "contact_email": "training@example.com",
+        })
+    db.execute(insert(JobOffer), offers)
+
+    candidates = []
+    for start in range(0, n_candidates, batch_size):
+        candidate_rows, feature_rows = [], []
+        for i in range(start, min(start + batch_size, n_candidates)):
+            candidate_uuid = str(uuid.uuid4())
+            job_titles = rng.sample(SYNTHETIC_TITLES, rng.randint(0, 3))
+            # Une période terminée puis, pour certains, une expérience en cours commencée après
+            closed_end = today - timedelta(days=rng.randint(1000, 3000))
+            closed_start = closed_end - timedelta(days=rng.randint(0, 4000))
+            closed = [[closed_start.isoformat(), closed_end.isoformat()]] if job_titles else []
+            ongoing_start = closed_end + timedelta(days=rng.randint(0, 1500)) if job_titles and rng.random() < 0.4 else None
+            candidate_rows.append({
+                "uuid": candidate_uuid,
+                "first_name": f"Candidate{i}",
+                "last_name": "Synthetic",
+                "email": f"candidate{i}@example.com",
+                "code_country": "+237",
+                "phone_number": f"{i:09d}",
+                "full_phone_number": f"+237{i:09d}",
+                "date_added": now,
+                "date_modified": now,
+            })
+            feature_rows.append({
+                "candidate_uuid": candidate_uuid,
+                "experience_count": len(job_titles),
+                "closed_experience_days": (closed_end - closed_start).days if closed else 0,
+                "closed_intervals": closed,
+                "ongoing_start_dates": [ongoing_start.isoformat()] if ongoing_start else [],
+                "job_titles": job_titles,
+                "normalized_job_titles": [title.lower() for title in job_titles],
+                "diploma_level": rng.choice([None, 0, 2, 3, 5]),
+                "date_modified": now,
+            })
+            candidates.append((candidate_uuid, feature_rows[-1], ongoing_start))
+        db.execute(insert(Candidat), candidate_rows)
+        db.execute(insert(CandidateFeature), feature_rows)
+
+    for start in range(0, n_applications, batch_size):
+        application_rows = []
+        for _ in range(start, min(start + batch_size, n_applications)):
+            candidate_uuid, features, ongoing_start = rng.choice(candidates)
+            offer = rng.choice(offers)
+            applied_date = now - timedelta(days=rng.randint(0, 1000))
+            ongoing_days = max(0, (applied_date.date() - ongoing_start).days) if ongoing_start else 0
+            years = experience_years(features["closed_experience_days"] + ongoing_days)
+            matches = any(offer["employment_type"].lower() in title.lower() for title in features["job_titles"])
+            score = years / 4 + matches - (offer["salary"] > 600000) + rng.gauss(0, 0.75)
+            status = ApplicationStatusEnum.ACCEPTED if score > 1.5 else ApplicationStatusEnum.REJECTED if score < 0.5 else ApplicationStatusEnum.PENDING
+            application_rows.append({
+                "uuid": str(uuid.uuid4()),
+                "candidate_uuid": candidate_uuid,
+                "job_offer_uuid": offer["uuid"],
+                "status": status.value,
+                "applied_date": applied_date,
+                "is_deleted": False,
+                "date_added": applied_date,
+                "date_modified": applied_date,
+            })
+        db.execute(insert(Application), application_rows)
+    db.commit()
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_sqlite(type_, compiler, **kw):
+    # Le type JSONB n'existe pas sous SQLite, qui ne sert qu'à l'entraînement hors ligne
+    return "JSON"
+
+
+def create_tables(engine):
+    Base.metadata.create_all(engine)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the scoring model from historical application outcomes.")
+    parser.add_argument("--database-url", default=None, help="defaults to the application database")
+    parser.add_argument("--synthetic", type=int, default=0, help="create the tables and insert N synthetic applications first")
+    parser.add_argument("--models-dir", default=Config.ML_MODELS_DIR)
+    parser.add_argument("--version", default=None, help="defaults to the current timestamp")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--n-estimators", type=int, default=200)
+    parser.add_argument("--max-depth", type=int, default=None)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--activate", action="store_true", help="make the new version the active model; otherwise it is written but not served")
+    args = parser.parse_args(argv)
+
+    if args.database_url:
+        db = sessionmaker(bind=create_engine(args.database_url))()
+    else:
+        from app.main.models.db.session import SessionLocal
+        db = SessionLocal()
+    version = args.version or datetime.now().strftime("%Y%m%d%H%M%S")
+
+    try:
+        timings = {}
+        if args.synthetic:
+            create_tables(db.get_bind())
+            start = time.perf_counter()
+            generate_synthetic_data(db, args.synthetic, seed=args.seed, batch_size=args.chunk_size)
+            timings["synthetic_seconds"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        backfilled = backfill_features(db)
+        timings["backfill_seconds"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        X, y = load_training_set(db, chunk_size=args.chunk_size)
+        timings["load_seconds"] = time.perf_counter() - start
+        if len(y) == 0:
+            raise SystemExit("No labelled application to train on")
+        logger.info(f"Training set loaded: {len(y)} applications ({backfilled} candidate features backfilled)")
+    finally:
+        db.close()
+
+    model, metrics = train(
+        X, y,
+        holdout=args.holdout,
+        n_estimators=args.n_estimators,
+        max_depth=args.max_depth,
+        n_jobs=args.n_jobs,
+        random_state=args.seed,
+    )
+    metrics.update(timings, version=version, trained_at=datetime.now().isoformat())
+    path = save_artifact(args.models_dir, version, model, metrics)
+    logger.info(f"Model {version} written to {path}: accuracy {metrics['accuracy']:.3f} on {metrics['holdout_rows']} holdout applications")
+
+    if args.activate:
+        ModelRegistry(args.models_dir, Config.ML_LEGACY_MODEL_PATH).activate(version)
+
+    print(json.dumps({key: metrics[key] for key in ("version", "rows", "accuracy", "fit_seconds", "load_seconds")}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import and_, func
 from sqlalchemy.orm import Session
-from sklearn.ensemble import RandomForestClassifier
-import numpy as np
-import pickle
-from sklearn.preprocessing import LabelEncoder
-from app.main.core.dependencies import get_db
+from app.main import models, schemas
+from app.main.core.config import Config
+from app.main.core.dependencies import get_db, TokenRequired
 from app.main.models.applications import Application
 from app.main.models.job_offers import JobOffer
-from app.main.models.candidates import Candidat, Diploma, Experience
+from app.main.models.db.session import SessionLocal
+from app.main.analysis.loaders import iter_applications, load_applications, load_offer_applications
+from app.main.analysis.matching import rank_applicants, source_candidates
+from app.main.analysis.services import analyze_candidates
+from app.main.analysis.llm import load_offer_profiles, profile_analysis
+from app.main.analysis import inference
+from app.main.analysis.model_registry import ModelNotFound, model_registry
+from app.main.analysis.offer_results import OfferResults, data_version, offer_results
+from app.main.analysis.pipeline import decode_cursor, prepare_candidates_data, rank_page, ranking_order, split_by_status
+from app.main.models.application_scores import ScoreStatusEnum
+from app.main.analysis.singleflight import SingleFlight
+from app.main.analysis.scoring import attach_scores, commit_scores, offer_batches, score_candidates, score_offers
 from app.main.core.i18n import __
-from datetime import datetime
+from app.main.utils import logger
+from typing import Optional
 router = APIRouter(prefix="/analyse", tags=["analyse"])
 
-# Charger le modèle entraîné
-try:
-    with open("app/main/models/ml_model.pkl", "rb") as f:
-        model = pickle.load(f)
-except FileNotFoundError:
-    raise HTTPException(status_code=500, detail="Le modèle ML n'a pas été trouvé")
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Taille de page quand seuls `cursor` ou `status` sont fournis
+DEFAULT_PAGE_SIZE = 20
 
-# Fonction pour ajuster le salaire (min 50 000 FCFA)
-def adjust_salary(salary):
-    return max(salary, 50000)
+# Calculs d'analyse en cours, partagés par les requêtes identiques simultanées
+analysis_requests = SingleFlight()
+
+
+def model_not_found_handler(request: Request, exc: ModelNotFound):
+    """Aucun modèle ML à servir : erreur serveur, le détail reste dans les journaux."""
+    logger.error(f"ML model unavailable for {request.url.path}: {exc}")
+    return JSONResponse(status_code=500, content={"detail": __(key="ml-model-not-found")})
 
 # Fonction pour récupérer l'offre d'emploi par UUID
 def get_job_offer_by_uuid(job_offer_uuid: str, db: Session):
@@ -30,86 +47,6 @@ def get_job_offer_by_uuid(job_offer_uuid: str, db: Session):
         raise HTTPException(status_code=404, detail=__("offer-not-found"))
     return job_offer
 
-# Préparer les données des candidats
-def prepare_candidates_data(applications, job_offer, db):
-    candidate_data = []
-    job_offer_data = {
-        "salary": adjust_salary(job_offer.salary),
-        "employment_type": job_offer.employment_type,
-    }
-
-    for app in applications:
-        candidate = app.candidate
-        if candidate:
-            experiences = db.query(Experience).filter(Experience.candidate_uuid == candidate.uuid).all()
-            diplomas = db.query(Diploma).filter(Diploma.candidate_uuid == candidate.uuid).all()
-            
-            job_titles = [exp.job_title for exp in experiences] if experiences else []
-            years_of_experience = 0
-            for exp in experiences:
-                if exp.end_date == "Present":
-                    end_date = datetime.now().strftime('%Y-%m-%d')
-                else:
-                    end_date = exp.end_date
-                
-                start_date = datetime.strptime(exp.start_date, '%Y-%m-%d')
-                end_date = datetime.strptime(end_date, '%Y-%m-%d')
-                years_of_experience += (end_date - start_date).days // 365
-
-            candidate_data.append({
-                "uuid": candidate.uuid,
-                "first_name": candidate.first_name,
-                "last_name": candidate.last_name,
-                "experience": job_titles,
-                "years_of_experience": years_of_experience,
-                "job_title": job_offer.title if job_offer else "Titre non trouvé",
-                "diplomas": [{"degree_name": diploma.degree_name, "institution_name": diploma.institution_name, "start_year": diploma.start_year, "end_year": diploma.end_year} for diploma in diplomas],
-                "experiences": [{"job_title": exp.job_title, "company_name": exp.company_name, "start_date": exp.start_date, "end_date": exp.end_date, "description": exp.description} for exp in experiences]
-            })
-
-    return candidate_data, job_offer_data
-
-# Transformer les données en format utilisable par le modèle
-def transform_for_model(candidate_data, job_offer_data):
-    X = []
-    label_encoder = LabelEncoder()
-    
-    for candidate in candidate_data:
-        experience_matches = any(
-            job_offer_data["employment_type"].lower() in job_title.lower() for job_title in candidate["experience"]
-        )
-        
-        job_title_encoded = label_encoder.fit_transform([candidate["job_title"]])[0]
-        
-        X.append([
-            candidate["years_of_experience"],
-            job_offer_data["salary"],
-            experience_matches
-        ])
-    
-    return np.array(X)
-
-# Classifier les candidats avec le modèle IA
-def classify_candidates(candidate_data, job_offer_data):
-    X = transform_for_model(candidate_data, job_offer_data)
-    predictions = model.predict(X)
-
-    pre_employment_candidates = [] 
-    rejected_candidates = []         
-    accepted_candidates = []         
-
-    for candidate, prediction in zip(candidate_data, predictions):
-        if candidate["years_of_experience"] == 1:
-            pre_employment_candidates.append(candidate)
-        elif prediction == 2:
-            pre_employment_candidates.append(candidate)
-        elif prediction == 0:
-            rejected_candidates.append(candidate)
-        elif prediction == 1:
-            accepted_candidates.append(candidate)
-
-    return accepted_candidates, pre_employment_candidates, rejected_candidates
-
 # Recommendations by domain
 recommendations = {
     'Tech': {
@@ -146,39 +83,326 @@ def get_learning_recommendation(job_title):
     
     return domain_recommendations.get(job_title, "Pas de recommandations disponibles pour ce titre.")
 
-# Fonction principale pour analyser les candidatures avec l'IA
-def get_candidates_by_status(job_offer_uuid: str, db: Session):
+# Fonction principale pour analyser les candidatures avec l'IA : candidats notés (catégorie, score, probabilités)
+def get_scored_candidates(job_offer_uuid: str, db: Session):
     job_offer = db.query(JobOffer).filter(JobOffer.uuid == job_offer_uuid).first()
     
     if not job_offer:
         raise HTTPException(status_code=404, detail=__(key="offer-not-found"))
 
-    applications = db.query(Application).filter(Application.job_offer_uuid == job_offer_uuid).all()
-    if not applications:
-        raise HTTPException(status_code=404, detail=__(key="no-applications-found-for-this-job-offer"))
+    # Le résultat en cache est servi tant que les données de l'offre n'ont pas changé
+    model_version = model_registry.get().version
+    version = data_version(db, job_offer_uuid, model_version)
+    candidate_data = offer_results.get(job_offer_uuid, model_version, version)
+    if candidate_data is not None:
+        return candidate_data, model_version
 
-    candidate_data, job_offer_data = prepare_candidates_data(applications, job_offer, db)
-    
-    return classify_candidates(candidate_data, job_offer_data)
+    def score():
+        rows = load_offer_applications(db, job_offer_uuid)
+        if not rows:
+            raise HTTPException(status_code=404, detail=__(key="no-applications-found-for-this-job-offer"))
+
+        candidate_data, job_offer_data = prepare_candidates_data(rows, job_offer)
+
+        # Les scores précalculés sont lus ; les candidatures non notées, ou dont les caractéristiques
+        # ont changé depuis leur notation, passent par le modèle
+        scores, scored_version = score_candidates(db, job_offer, candidate_data, job_offer_data)
+        attach_scores(candidate_data, scores)
+        return candidate_data, scored_version
+
+    def compute():
+        (candidate_data, scored_version), committed = commit_scores(db, score)
+        new_version = data_version(db, job_offer_uuid, scored_version) if committed else version
+
+        offer_results.put(job_offer_uuid, OfferResults(scored_version, new_version, candidate_data))
+        return candidate_data, scored_version
+
+    # Les requêtes simultanées sur la même offre et les mêmes données attendent un seul calcul
+    return analysis_requests.do((job_offer_uuid, model_version, version), compute)
+
+# Candidats répartis par catégorie, chaque liste dans l'ordre de classement
+def get_candidates_by_status(job_offer_uuid: str, db: Session):
+    candidate_data, model_version = get_scored_candidates(job_offer_uuid, db)
+    candidate_data = [candidate_data[i] for i in ranking_order(candidate_data)]
+    return (*split_by_status(candidate_data, [candidate["status"] for candidate in candidate_data]), model_version)
+
+# Fonction pour analyser les candidatures de plusieurs offres, une prédiction par lot d'offres
+def get_candidates_by_status_for_offers(job_offer_uuids: list, db: Session, chunk_size: int = Config.ANALYSIS_STREAM_CHUNK_SIZE):
+    """
+    Génère (uuid de l'offre, candidats par catégorie, version du modèle) offre par offre, dans l'ordre donné ;
+    les catégories valent None pour une offre inconnue.
+
+    Les offres consécutives sont regroupées en lots d'au plus `chunk_size` candidatures (une offre plus
+    grande forme un lot à elle seule) : chaque lot est chargé et noté en une seule prédiction, puis ses
+    offres sont produites avant que le lot suivant ne soit chargé.
+    """
+    application_counts = dict(
+        db.query(JobOffer.uuid, func.count(Application.uuid))
+        .outerjoin(Application, and_(Application.job_offer_uuid == JobOffer.uuid, Application.is_deleted.isnot(True)))
+        .filter(JobOffer.uuid.in_(job_offer_uuids))
+        .group_by(JobOffer.uuid)
+    )
+
+    def score_chunk(chunk):
+        def score():
+            job_offers = db.query(JobOffer).filter(JobOffer.uuid.in_(chunk)).all()
+            rows = load_applications(db, Application.job_offer_uuid.in_(chunk))
+            batches = offer_batches(rows, job_offers)
+            scores, model_version = score_offers(db, batches)
+            return {batch.job_offer.uuid: split_by_status(batch.candidate_data, attach_scores(batch.candidate_data, scores)) for batch in batches}, model_version
+
+        return commit_scores(db, score)[0]
+
+    chunk, chunk_applications = [], 0
+    for i, job_offer_uuid in enumerate(job_offer_uuids):
+        if job_offer_uuid in application_counts:
+            chunk.append(job_offer_uuid)
+            chunk_applications += application_counts[job_offer_uuid]
+        following = job_offer_uuids[i + 1] if i + 1 < len(job_offer_uuids) else None
+        if chunk and (following not in application_counts or chunk_applications + application_counts[following] > chunk_size):
+            results, model_version = score_chunk(chunk)
+            for uuid in chunk:
+                yield uuid, results[uuid], model_version
+            chunk, chunk_applications = [], 0
+        if job_offer_uuid not in application_counts:
+            yield job_offer_uuid, None, None
+
+def candidates_status_payload(accepted_candidates, pre_employment_candidates, rejected_candidates, model_version):
+    # Ajouter des recommandations d'apprentissage pour les candidats en pré-emploi (copies : les candidats peuvent venir du cache)
+    pre_employment_candidates = [
+        {**candidate, 'learning_recommendations': get_learning_recommendation(candidate['job_title'])}
+        for candidate in pre_employment_candidates
+    ]
+
+    return {
+        "message": "Je suis une IA qui analyse les candidatures en fonction des offres d'emploi et des expériences des candidats.",
+        "accepted_candidates": accepted_candidates,
+        "pre_employment_candidates": pre_employment_candidates,
+        "rejected_candidates": rejected_candidates,
+        "model_version": model_version,
+        "status_message": __(key="prediction-completed")
+    }
+
+# Fonction pour analyser les candidatures d'une offre lot par lot, un candidat noté par ligne NDJSON
+def stream_candidates_by_status(job_offer_uuid: str):
+    # La session de la requête est fermée dès l'envoi des en-têtes : le flux utilise la sienne
+    db = SessionLocal()
+    try:
+        job_offer = db.query(JobOffer).filter(JobOffer.uuid == job_offer_uuid).first()
+        for rows in iter_applications(db, Application.job_offer_uuid == job_offer_uuid, chunk_size=Config.ANALYSIS_STREAM_CHUNK_SIZE):
+            def score():
+                candidate_data, job_offer_data = prepare_candidates_data(rows, job_offer)
+                scores, model_version = score_candidates(db, job_offer, candidate_data, job_offer_data)
+                return candidate_data, attach_scores(candidate_data, scores), model_version
+
+            (candidate_data, statuses, model_version), _ = commit_scores(db, score)
+
+            for candidate, status in zip(candidate_data, statuses):
+                if status is None:
+                    continue
+                if status == ScoreStatusEnum.PRE_EMPLOYMENT.value:
+                    candidate['learning_recommendations'] = get_learning_recommendation(candidate['job_title'])
+                yield json.dumps(jsonable_encoder({**candidate, "model_version": model_version}), ensure_ascii=False) + "\n"
+    finally:
+        db.close()
 
 @router.get("/applications/{job_offer_uuid}/candidates_status")
 def get_candidates_status(
     job_offer_uuid: str,
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+    status: Optional[ScoreStatusEnum] = Query(None),
     db: Session = Depends(get_db)
 ):
+    """
+    Candidates of a job offer grouped by predicted status, each group ordered by ranking score.
+
+    With `limit`, `cursor` or `status`, a single page of candidates is returned instead, in
+    ranking order (probability of acceptance, then application uuid), with the `next_cursor`
+    to pass for the following page and the `counts` of each status.
+
+    Results are cached per offer and updated in place when an application is created,
+    updated or deleted; they are recomputed when the offer's data or the model changes.
+
+    With `Accept: application/x-ndjson`, applications are scored in chunks and streamed as
+    one JSON candidate (with its `status`) per line, in constant memory.
+    """
     try:
-        accepted_candidates, pre_employment_candidates, rejected_candidates = get_candidates_by_status(job_offer_uuid, db)
-        
-        # Ajouter des recommandations d'apprentissage pour les candidats en pré-emploi
-        for candidate in pre_employment_candidates:
-            candidate['learning_recommendations'] = get_learning_recommendation(candidate['job_title'])
+        if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+            get_job_offer_by_uuid(job_offer_uuid, db)
+            if not db.query(Application.uuid).filter(Application.job_offer_uuid == job_offer_uuid, Application.is_deleted.isnot(True)).first():
+                raise HTTPException(status_code=404, detail=__(key="no-applications-found-for-this-job-offer"))
+            return StreamingResponse(stream_candidates_by_status(job_offer_uuid), media_type=NDJSON_MEDIA_TYPE)
+
+        if limit is None and cursor is None and status is None:
+            return candidates_status_payload(*get_candidates_by_status(job_offer_uuid, db))
+
+        if cursor is not None:
+            try:
+                decode_cursor(cursor)
+            except ValueError:
+                raise HTTPException(status_code=400, detail=__(key="invalid-cursor"))
+
+        candidate_data, model_version = get_scored_candidates(job_offer_uuid, db)
+        candidates = [
+            candidate for candidate in candidate_data
+            if candidate["status"] is not None and (status is None or candidate["status"] == status.value)
+        ]
+        page, next_cursor = rank_page(candidates, limit or DEFAULT_PAGE_SIZE, cursor)
+        page = [
+            {**candidate, 'learning_recommendations': get_learning_recommendation(candidate['job_title'])}
+            if candidate["status"] == ScoreStatusEnum.PRE_EMPLOYMENT.value else candidate
+            for candidate in page
+        ]
 
         return {
             "message": "Je suis une IA qui analyse les candidatures en fonction des offres d'emploi et des expériences des candidats.",
-            "accepted_candidates": accepted_candidates,
-            "pre_employment_candidates": pre_employment_candidates,
-            "rejected_candidates": rejected_candidates,
+            "candidates": page,
+            "next_cursor": next_cursor,
+            "counts": offer_results.counts(job_offer_uuid),
+            "model_version": model_version,
             "status_message": __(key="prediction-completed")
         }
     except HTTPException as e:
         raise e
+
+
+@router.post("/applications/candidates_status")
+def get_candidates_status_bulk(
+    obj_in: schemas.BulkCandidatesStatus,
+    current_user: models.User = Depends(TokenRequired(roles=["SUPER_ADMIN"]))
+):
+    """
+    Candidate statuses for several job offers, predicted in one pass per chunk of offers.
+
+    The response is a JSON array streamed offer by offer, in request order; an unknown offer
+    gets an entry with a `detail` message instead of candidates. Consecutive offers are scored
+    together up to `ANALYSIS_STREAM_CHUNK_SIZE` applications, and each chunk is sent before
+    the next one is loaded.
+    """
+    job_offer_uuids = list(dict.fromkeys(obj_in.job_offer_uuids))
+
+    def offer_payload(job_offer_uuid, result, model_version):
+        if result is None:
+            return {"job_offer_uuid": job_offer_uuid, "detail": __(key="offer-not-found")}
+        return {"job_offer_uuid": job_offer_uuid, **candidates_status_payload(*result, model_version)}
+
+    def stream():
+        # La session de la requête est fermée dès l'envoi des en-têtes : le flux utilise la sienne
+        stream_db = SessionLocal()
+        try:
+            yield "["
+            for i, offer in enumerate(get_candidates_by_status_for_offers(job_offer_uuids, stream_db)):
+                yield ("," if i else "") + json.dumps(jsonable_encoder(offer_payload(*offer)), ensure_ascii=False)
+            yield "]"
+        finally:
+            stream_db.close()
+
+    return StreamingResponse(stream(), media_type="application/json")
+
+
+@router.get("/applications/{job_offer_uuid}/matches", response_model=list[schemas.ApplicantMatch])
+def get_applicant_matches(
+    job_offer_uuid: str,
+    limit: int = Query(20, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(TokenRequired(roles=["SUPER_ADMIN"]))
+):
+    """
+    Rank the applicants of a job offer by TF-IDF cosine similarity between the offer text and their experiences and diplomas.
+    """
+    job_offer = get_job_offer_by_uuid(job_offer_uuid, db)
+    return rank_applicants(db, job_offer, limit)
+
+
+@router.get("/applications/{job_offer_uuid}/screening", response_model=schemas.ScreeningResult)
+def get_screened_applicants(
+    job_offer_uuid: str,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(TokenRequired(roles=["SUPER_ADMIN"]))
+):
+    """
+    Split the applicants of a job offer into selected and rejected with rules derived from the offer:
+    at least two experiences, a title keyword in one of their job titles, and the years of experience
+    and diploma level its requirements ask for.
+    """
+    get_job_offer_by_uuid(job_offer_uuid, db)
+    result = analyze_candidates(db, job_offer_uuid)
+    return {**result, "criteria": result["criteria"]._asdict()}
+
+
+@router.get("/offers/{job_offer_uuid}/sourcing", response_model=list[schemas.CandidateMatch])
+def get_sourced_candidates(
+    job_offer_uuid: str,
+    limit: int = Query(20, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(TokenRequired(roles=["SUPER_ADMIN"]))
+):
+    """
+    Find the best-matching candidates for a job offer across the whole candidate pool, applicants or not.
+    """
+    job_offer = get_job_offer_by_uuid(job_offer_uuid, db)
+    return source_candidates(db, job_offer, limit)
+
+
+@router.post("/applications/{job_offer_uuid}/profile_analysis", response_model=list[schemas.ProfileAnalysisResult])
+async def analyze_applicant_profiles(
+    job_offer_uuid: str,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(TokenRequired(roles=["SUPER_ADMIN"]))
+):
+    """
+    Language model analysis of the CV, experiences and cover letter of every applicant of a job offer.
+
+    All profiles are submitted as one batch: cached responses are reused, and the remaining
+    prompts are sent concurrently within the provider's concurrency limit.
+    """
+    job_offer = await run_in_threadpool(get_job_offer_by_uuid, job_offer_uuid, db)
+    profiles = await run_in_threadpool(load_offer_profiles, db, job_offer)
+    results = await profile_analysis.analyze_many([profile for _, profile in profiles])
+    return [
+        {
+            "application_uuid": application.uuid,
+            "candidate_uuid": application.candidate_uuid,
+            "analysis": result.analysis,
+            "cached": result.cached,
+        }
+        for (application, _), result in zip(profiles, results)
+    ]
+
+
+@router.get("/models", response_model=list[schemas.ModelVersion])
+def get_model_versions(
+    current_user: models.User = Depends(TokenRequired(roles=["SUPER_ADMIN"]))
+):
+    """
+    List the model versions available in the registry.
+    """
+    return model_registry.describe()
+
+
+@router.post("/models/activate", response_model=schemas.Msg)
+def activate_model_version(
+    obj_in: schemas.ModelVersionActivate,
+    current_user: models.User = Depends(TokenRequired(roles=["SUPER_ADMIN"]))
+):
+    """
+    Activate a model version; in-flight predictions finish on the previous one.
+    """
+    if obj_in.version not in model_registry.versions():
+        raise HTTPException(status_code=404, detail=__(key="model-version-not-found"))
+    model_registry.activate(obj_in.version)
+    return schemas.Msg(message=__(key="model-version-activated"))
+
+
+@router.get("/inference/metrics")
+def get_inference_metrics(
+    current_user: models.User = Depends(TokenRequired(roles=["SUPER_ADMIN"]))
+):
+    """
+    Micro-batching metrics of the inference service (queue depth and batch sizes), the number
+    of analysis requests computed or coalesced into an in-flight computation, and the cache
+    hits and provider calls of the profile analysis service.
+    """
+    return {**inference.metrics(), "analysis_requests": analysis_requests.metrics(), "profile_analysis": profile_analysis.metrics()}
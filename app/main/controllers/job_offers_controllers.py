@@ -6,7 +6,8 @@ from app.main.core.dependencies import get_db, TokenRequired
 from app.main import schemas, crud, models
 from app.main.core.i18n import __
 from app.main.core.config import Config
-from app.main.core.dependencies import TokenRequired
+from app.main.core.dependencies import TokenRequired, CandidateTokenRequired
+from app.main.analysis.matching import recommend_offers
 
 router = APIRouter(prefix="/offers", tags=["offers"])
 
@@ -50,6 +51,21 @@ def delete_offers(
     crud.offers.delete(db=db,obj_in=obj_in)
     return schemas.Msg(message=__(key="offer-delete-successfully"))
 
+@router.get("/recommended", response_model=list[schemas.RecommendedJobOffer])
+def get_recommended_offers(
+    *,
+    db: Session = Depends(get_db),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: models.Candidat = Depends(CandidateTokenRequired())
+):
+    """
+    Active, unexpired offers ranked by similarity with the experiences and diplomas of the authenticated candidate.
+    """
+    return [
+        schemas.RecommendedJobOffer(**schemas.JobOffersResponse.model_validate(job_offer).model_dump(), score=score)
+        for job_offer, score in recommend_offers(db, current_user, limit)
+    ]
+
 @router.get("/get_many", response_model=None)
 async def get_many_offers(
     *,
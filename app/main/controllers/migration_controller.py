@@ -60,13 +60,21 @@ async def create_database_tables(
         logger.error("Successfully created the directory %s " % migrations_folder)
 
     try:
+        """ Apply the hand-written data migrations (alembic/data_migrations) before comparing the schema """
+        if platform.system() == 'Windows':
+
+            os.system('set PYTHONPATH=. && .\\venv\Scripts\python.exe -m alembic upgrade head')
+
+        else:
+            os.system('PYTHONPATH=. alembic upgrade head')
+
         # Get the environment system
         if platform.system() == 'Windows':
 
-            os.system('set PYTHONPATH=. && .\\venv\Scripts\python.exe -m alembic revision --autogenerate')
+            os.system('set PYTHONPATH=. && .\\venv\Scripts\python.exe -m alembic revision --autogenerate --version-path alembic/versions')
 
         else:
-            os.system('PYTHONPATH=. alembic revision --autogenerate')
+            os.system('PYTHONPATH=. alembic revision --autogenerate --version-path alembic/versions')
 
         # Get the environment system
         if platform.system() == 'Windows':
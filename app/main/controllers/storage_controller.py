@@ -6,11 +6,16 @@ from fastapi.responses import JSONResponse, RedirectResponse
 from sqlalchemy.orm import Session
 from app.main.core.config import Config
 from app.main.schemas.file import StorageCreate,FileSlim,FileList
-from app.main.crud.storage_crud import store_file,get_file_by_public_id,get_file_by_uuid,get_files
+from app.main.crud.storage_crud import store_file,get_file_by_public_id,get_file_by_uuid,get_files,get_file_by_content_hash,add_file_reference,release_file,get_dedup_stats
+from app.main.schemas.file import StorageDedupStats
 from app.main.schemas.msg import Msg
 from app.main.utils.file import file_utils
+from app.main.analysis.documents import document_texts
 import uuid
-from app.main.utils.uploads import download_and_save_file, get_access_control, get_file_url, update_access_control, upload_to_cloudinary
+from app.main.utils.uploads import delete_from_cloudinary, download_and_save_file, get_access_control, get_file_url, update_access_control, upload_to_cloudinary
+from app.main.utils import logger
+from app.main.core.i18n import __
+from sqlalchemy.exc import IntegrityError
 from app.main.core.dependencies import get_db, TokenRequired
 from app.main import models
 MAX_TOKENS = 4096
@@ -27,18 +32,26 @@ async def upload_file(
 ):
     """
     Upload a file.
+
+    Files are content-addressed: uploading a file already stored (same SHA-256) does not
+    upload it again and returns the existing file with one more reference.
     """
     try:
-        # Save the file temporarily
-        temp_file_path = file_utils.save_temp_file(file)
-        
+        # Save the file temporarily, hashing it while it is copied
+        saved_upload = file_utils.save_upload(file)
+        temp_file_path = saved_upload.path
+
+        # Reuse the stored file if the same content was already uploaded
+        existing_file = get_file_by_content_hash(db, saved_upload.sha256)
+        if existing_file:
+            file_utils.delete_temp_file(temp_file_path)
+            logger.info(f"Upload of {file.filename} deduplicated with file {existing_file.uuid}: {saved_upload.size} bytes saved")
+            return add_file_reference(db, existing_file)
+
         # Upload to Cloudinary
         public_id = str(uuid.uuid4())
         upload_result = upload_to_cloudinary(temp_file_path, public_id)
 
-        # Delete the temporary file
-        file_utils.delete_temp_file(temp_file_path)
-
         # Prepare file data for database
         file_data = StorageCreate(
             uuid = str(uuid.uuid4()),
@@ -52,12 +65,25 @@ async def upload_file(
             width=upload_result.get("width"),
             height=upload_result.get("height"),
             size=upload_result.get("bytes"),
+            content_hash=saved_upload.sha256,
         )
 
         # Store file data in the database
-        stored_file = store_file(db, file_data)
+        try:
+            stored_file = store_file(db, file_data)
+        except IntegrityError:
+            # The same content was stored by a concurrent upload meanwhile: keep that one
+            db.rollback()
+            file_utils.delete_temp_file(temp_file_path)
+            delete_from_cloudinary(upload_result.get("public_id"), upload_result.get("resource_type"))
+            return add_file_reference(db, get_file_by_content_hash(db, saved_upload.sha256))
+
+        # Extract the text in the background; the temporary file is deleted once done
+        document_texts.submit(db, stored_file, temp_file_path)
 
         return stored_file
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -125,6 +151,17 @@ def get_file(
     return RedirectResponse(url = url)
     
         
+@router.get("/dedup/stats",response_model = StorageDedupStats, status_code=200)
+def get_dedup_statistics(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(TokenRequired(roles=["SUPER_ADMIN","ADMIN"]))
+    ):
+    """
+    Get the number of deduplicated uploads and the bytes they saved
+    """
+    return get_dedup_stats(db)
+
+
 @router.get("/documents",response_model = FileList, status_code=200)
 def get_files_from_db(
     public_id: Optional[str] = None,
@@ -279,11 +316,18 @@ async def delete(
 
     """
     delete document
+
+    The file is shared by all identical uploads: only one reference is removed, and the
+    metadata is deleted with the last one.
     """
     # Retrieve file metadata from the database
     file_record = get_file_by_public_id(db, file_public_id)
-    db.delete(file_record)
-    db.commit()
+    if not file_record:
+        raise HTTPException(
+            status_code=404,
+            detail="File not found"
+        )
+    release_file(db, file_record)
     return {"message": __("document-deleted-successfully")}
     
     
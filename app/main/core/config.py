@@ -47,6 +47,34 @@ class ConfigClass(BaseSettings):
     IMAGE_MEDIUM_WIDTH: int = get_secret("IMAGE_MEDIUM_WIDTH", 600)
     IMAGE_THUMBNAIL_WIDTH: int = get_secret("IMAGE_THUMBNAIL_WIDTH", 300)
     UPLOADED_FILE_DEST: str = get_secret("UPLOADED_FILE_DEST", "uploads")
+    UPLOAD_MAX_SIZE: int = int(get_secret("UPLOAD_MAX_SIZE", 10 * 1024 * 1024))
+
+    # Analysis model registry
+    ML_MODELS_DIR: str = get_secret("ML_MODELS_DIR", "app/main/models/artifacts")
+    ML_LEGACY_MODEL_PATH: str = get_secret("ML_LEGACY_MODEL_PATH", "app/main/models/ml_model.pkl")
+    ML_INFERENCE_BACKEND: str = get_secret("ML_INFERENCE_BACKEND", "sklearn")  # sklearn | flat
+    ML_PRELOAD_MODEL: bool = get_secret("ML_PRELOAD_MODEL", True) in ["True", True]
+    ML_MODEL_SYNC_INTERVAL: int = int(get_secret("ML_MODEL_SYNC_INTERVAL", 30))
+    ML_BATCHING_ENABLED: bool = get_secret("ML_BATCHING_ENABLED", True) in ["True", True]
+    ML_BATCH_MAX_SIZE: int = int(get_secret("ML_BATCH_MAX_SIZE", 4096))
+    ML_BATCH_MAX_WAIT_MS: float = float(get_secret("ML_BATCH_MAX_WAIT_MS", 5))
+    SCORING_INTERVAL: int = int(get_secret("SCORING_INTERVAL", 60 * 10))
+    TEXT_INDEX_SYNC_INTERVAL: float = float(get_secret("TEXT_INDEX_SYNC_INTERVAL", 5))
+    ANALYSIS_STREAM_CHUNK_SIZE: int = int(get_secret("ANALYSIS_STREAM_CHUNK_SIZE", 500))
+
+    LLM_PROVIDER: str = get_secret("LLM_PROVIDER", "openai")  # openai | stub
+    OPENAI_API_KEY: str = get_secret("OPENAI_API_KEY", "your_openai_api_key")
+    LLM_MODEL: str = get_secret("LLM_MODEL", "gpt-4")
+    LLM_MAX_CONCURRENCY: int = int(get_secret("LLM_MAX_CONCURRENCY", 8))
+    LLM_CACHE_TTL: int = int(get_secret("LLM_CACHE_TTL", 60 * 60 * 24 * 7))
+    LLM_STUB_LATENCY_MS: float = float(get_secret("LLM_STUB_LATENCY_MS", 200))
+
+    TEXT_EXTRACTION_WORKERS: int = int(get_secret("TEXT_EXTRACTION_WORKERS", 2))
+    PDF_MAX_PAGES: int = int(get_secret("PDF_MAX_PAGES", 50))
+    PDF_MAX_TEXT_BYTES: int = int(get_secret("PDF_MAX_TEXT_BYTES", 1024 * 1024))
+    PDF_EXTRACTION_TIMEOUT: float = float(get_secret("PDF_EXTRACTION_TIMEOUT", 30))
+    # Hard limit of a text extraction (its worker is killed), on top of the checks between PDF pages
+    TEXT_EXTRACTION_TIMEOUT: float = float(get_secret("TEXT_EXTRACTION_TIMEOUT", 60))
 
 
     MAILTRAP_USERNAME :str = get_secret("MAILTRAP_USERNAME", "987982cf606b48")
@@ -32,5 +32,11 @@ translation = {
     "candidate-already-applied" : "The candidate has already applied",
     "offer-expired" :"The offer has expired",
     "prediction-completed" : "The prediction has completed",
-    "account-created-successfully" : "The account has been created successfully"
+    "account-created-successfully" : "The account has been created successfully",
+    "model-version-not-found" : "Model version not found",
+    "model-version-activated" : "Model version activated successfully",
+    "ml-model-not-found" : "ML model not found",
+    "invalid-cursor" : "Invalid pagination cursor",
+    "file-too-large" : "The file exceeds the maximum allowed size",
+    "document-deleted-successfully" : "The document has been deleted successfully"
 }
@@ -31,5 +31,11 @@ translation = {
     "candidate-already-applied" :"Le candidat a déjà postulé",
     "offer-expired" : "L'offre a expiré",
     "prediction-completed" : "La prediction est complète",
-    "account-created-successfully" : "Compte créé avec succès"
+    "account-created-successfully" : "Compte créé avec succès",
+    "model-version-not-found" : "Version du modèle introuvable",
+    "model-version-activated" : "Version du modèle activée avec succès",
+    "ml-model-not-found" : "Le modèle ML n'a pas été trouvé",
+    "invalid-cursor" : "Curseur de pagination invalide",
+    "file-too-large" : "Le fichier dépasse la taille maximale autorisée",
+    "document-deleted-successfully" : "Le document a été supprimé avec succès"
 }
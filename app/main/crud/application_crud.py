@@ -10,6 +10,8 @@ from app.main.core.i18n import __
 from sqlalchemy.orm import Session
 from app.main.crud.base import CRUDBase
 from app.main import models,schemas,crud
+from app.main.analysis import scoring
+from app.main.utils import logger
 
 class CRUDApplication(CRUDBase[models.Application,schemas.ApplicationDetails,schemas.ApplicationResponse]):
 
@@ -60,6 +62,13 @@ class CRUDApplication(CRUDBase[models.Application,schemas.ApplicationDetails,sch
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+
+        # Noter la nouvelle candidature pour que l'analyse de l'offre la lise directement
+        try:
+            scoring.score_application(db, db_obj.uuid)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to score application {db_obj.uuid}: {e}")
         return db_obj
     
 
@@ -69,16 +78,29 @@ class CRUDApplication(CRUDBase[models.Application,schemas.ApplicationDetails,sch
         if not db_obj:
             raise HTTPException(status_code=404,detail=__(key="application-not-found"))
         db_obj.status = status
+        db_obj.date_modified = datetime.now()
         db.commit()
 
+        # Le résultat d'analyse en cache de l'offre est mis à jour en place
+        try:
+            scoring.application_updated(db, db_obj)
+        except Exception as e:
+            logger.error(f"Failed to update cached analysis of application {db_obj.uuid}: {e}")
+
     @classmethod
     def delete(cls,db:Session,*,uuid:str):
         db_obj = cls.get_by_uuid(db=db,uuid=uuid)
         if not db_obj:
             raise HTTPException(status_code=404,detail=__(key="application-not-found"))
         db_obj.is_deleted = True
+        db_obj.date_modified = datetime.now()
         db.commit()
 
+        try:
+            scoring.application_deleted(db, db_obj)
+        except Exception as e:
+            logger.error(f"Failed to update cached analysis of application {db_obj.uuid}: {e}")
+
 
     @classmethod
     def get_multi(
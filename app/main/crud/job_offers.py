@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 from app.main.crud.base import CRUDBase
 from app.main import models,schemas
 from app.main.core.mail import send_notification_to_candidate
+from app.main.analysis.matching import text_index_sync
 
 class CRUDJobOffers(CRUDBase[models.JobOffer,schemas.JobOffersCreate,schemas.JobOffersUpdate]):
     
@@ -47,6 +48,7 @@ class CRUDJobOffers(CRUDBase[models.JobOffer,schemas.JobOffersCreate,schemas.Job
         db.add(offers)
         db.commit()
         db.refresh(offers)
+        text_index_sync.refresh_offer(offers)
         # Récupérer tous les candidats inscrits dans le système
         candidates = db.query(models.Candidat).filter(models.Candidat.is_deleted==False).all()
         
@@ -82,6 +84,7 @@ class CRUDJobOffers(CRUDBase[models.JobOffer,schemas.JobOffersCreate,schemas.Job
         db.flush()
         db.commit()
         db.refresh(offers)
+        text_index_sync.refresh_offer(offers)
         return offers
     
 
@@ -92,6 +95,7 @@ class CRUDJobOffers(CRUDBase[models.JobOffer,schemas.JobOffersCreate,schemas.Job
             raise HTTPException(status_code=404,detail=__(key="offers-not-found"))
         offers.is_deleted = True
         db.commit()
+        text_index_sync.refresh_offer(offers)
 
     @classmethod
     def update_status(cls,db:Session,uuid:str,status:str):
@@ -100,6 +104,7 @@ class CRUDJobOffers(CRUDBase[models.JobOffer,schemas.JobOffersCreate,schemas.Job
             raise HTTPException(status_code=404,detail=__(key="offers-not-found"))
         offers.status = status
         db.commit()
+        text_index_sync.refresh_offer(offers)
 
     @classmethod
     def get_multi(
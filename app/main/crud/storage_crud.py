@@ -1,7 +1,7 @@
 from datetime import date
 import math
 from typing import Any, Dict, Optional, Union
-from sqlalchemy import or_
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
 # from app.main.crud.base import CRUDBase
 from app.main.models.storage import Storage
@@ -11,7 +11,7 @@ from app.main.utils.file import FileUtils
 # from app.main import crud
 # from app.main.utils.qrcode import CreateQrcode
 from app.main.models.storage import Storage
-from app.main.schemas.file import FileList, StorageCreate
+from app.main.schemas.file import FileList, StorageCreate, StorageDedupStats
 
 
 
@@ -27,6 +27,48 @@ def get_file_by_public_id(db: Session, public_id: str) -> Storage:
         """Retrieve file metadata by public_id."""
         return db.query(Storage).filter(Storage.public_id == public_id).first()
     
+def get_file_by_content_hash(db: Session, content_hash: str) -> Storage:
+        """Retrieve file metadata by the SHA-256 of its content."""
+        return db.query(Storage).filter(Storage.content_hash == content_hash).first()
+
+def add_file_reference(db: Session, db_file: Storage) -> Storage:
+        """Record one more upload of an already stored file."""
+        # Incrément en SQL : deux envois simultanés du même fichier sont tous deux comptés
+        db.query(Storage).filter(Storage.uuid == db_file.uuid).update(
+            {Storage.reference_count: Storage.reference_count + 1}, synchronize_session=False
+        )
+        db.commit()
+        db.refresh(db_file)
+        return db_file
+
+def release_file(db: Session, db_file: Storage) -> bool:
+        """Remove one reference to a file; the metadata is deleted with the last one. Returns True if deleted."""
+        if db_file.reference_count > 1:
+            db.query(Storage).filter(Storage.uuid == db_file.uuid).update(
+                {Storage.reference_count: Storage.reference_count - 1}, synchronize_session=False
+            )
+            db.commit()
+            return False
+        db.delete(db_file)
+        db.commit()
+        return True
+
+def get_dedup_stats(db: Session) -> StorageDedupStats:
+        """Files stored, uploads referencing them and bytes saved by deduplication, in one aggregate query."""
+        files, references, stored_bytes, saved_bytes = db.query(
+            func.count(Storage.uuid),
+            func.coalesce(func.sum(Storage.reference_count), 0),
+            func.coalesce(func.sum(Storage.size), 0),
+            func.coalesce(func.sum((Storage.reference_count - 1) * Storage.size), 0),
+        ).one()
+        return StorageDedupStats(
+            files=files,
+            references=references,
+            duplicate_uploads=references - files,
+            stored_bytes=stored_bytes,
+            saved_bytes=saved_bytes,
+        )
+
 def get_file_by_uuid(db: Session, file_uuid: str) -> Storage:
         """Retrieve file metadata by file_uuid."""
         return db.query(Storage).filter(Storage.uuid == file_uuid).first()
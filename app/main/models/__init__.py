@@ -4,4 +4,7 @@ from .user import *
 from .storage import *
 from .job_offers import *
 from .candidates import *
-from .applications import *
\ No newline at end of file
+from .applications import *
+from .candidate_features import *
+from .application_scores import *
+from .llm_analyses import *
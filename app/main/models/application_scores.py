@@ -0,0 +1,63 @@
+from datetime import datetime
+from sqlalchemy import Column, ForeignKey, String, Integer, Float, DateTime, JSON, UniqueConstraint
+from sqlalchemy.orm import relationship
+from app.main.models.db.base_class import Base
+from enum import Enum
+
+
+class ScoreStatusEnum(str, Enum):
+    """
+    Enum representing the bucket an application is scored into.
+
+    Attributes:
+        ACCEPTED: The candidate is predicted to be accepted.
+        PRE_EMPLOYMENT: The candidate is predicted for pre-employment.
+        REJECTED: The candidate is predicted to be rejected.
+    """
+    ACCEPTED = "accepted"
+    PRE_EMPLOYMENT = "pre_employment"
+    REJECTED = "rejected"
+
+
+class ApplicationScore(Base):
+    """
+    Represents the precomputed score of an application for a model version.
+
+    A score is valid as long as its model version is the active one and its feature
+    hash matches the features currently computed for the application.
+
+    Attributes:
+        uuid (str): The unique identifier for the score.
+        application_uuid (str): The application the score belongs to.
+        application (Application): The scored application.
+        job_offer_uuid (str): The job offer of the application.
+        candidate_uuid (str): The candidate of the application.
+        model_version (str): The version of the model that produced the score.
+        feature_hash (str): Hash of the feature row the score was computed from.
+        prediction (int): Raw class predicted by the model.
+        status (str): Bucket of the application (accepted, pre_employment, rejected).
+        probabilities (dict): Probability of each model class, keyed by class.
+        ranking_score (float): Probability of the accepted class, used to rank applications.
+        date_added (datetime): The date and time the score was first computed.
+        date_modified (datetime): The date and time the score was last recomputed.
+    """
+
+    __tablename__ = "application_scores"
+    __table_args__ = (
+        UniqueConstraint("application_uuid", "model_version", name="uq_application_scores_application_model"),
+    )
+
+    uuid = Column(String, primary_key=True, index=True)  # UUID unique
+    application_uuid = Column(String, ForeignKey('applications.uuid'), nullable=False, index=True)  # Candidature notée
+    application = relationship("Application", foreign_keys=[application_uuid])
+    job_offer_uuid = Column(String, ForeignKey('job_offers.uuid'), nullable=False, index=True)  # Offre d'emploi concernée
+    candidate_uuid = Column(String, ForeignKey('candidates.uuid'), nullable=False)  # Candidat noté
+    model_version = Column(String, nullable=False)  # Version du modèle
+    feature_hash = Column(String(64), nullable=False)  # Empreinte des caractéristiques
+    prediction = Column(Integer, nullable=True)  # Classe prédite par le modèle
+    status = Column(String, nullable=True)  # Catégorie de la candidature (None si la classe prédite est inconnue)
+    probabilities = Column(JSON, nullable=True)  # Probabilité de chaque classe
+    ranking_score = Column(Float, nullable=True, index=True)  # Probabilité de la classe « accepté »
+
+    date_added = Column(DateTime, nullable=False, default=datetime.now)
+    date_modified = Column(DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
@@ -0,0 +1,213 @@
+from datetime import date, datetime
+import numpy as np
+from sqlalchemy import Column, ForeignKey, String, Integer, DateTime, JSON
+from sqlalchemy import event
+from sqlalchemy.orm import Session, relationship
+from app.main.models.db.base_class import Base
+from app.main.models.candidates import Candidat, Experience, Diploma
+from app.main.analysis.features import diploma_level, experience_years, is_ongoing, normalize_title
+from app.main.analysis.intervals import merge_intervals, parse_dates, total_experience_days
+from app.main.analysis.text_index import term_counts
+from app.main.utils import logger
+
+__all__ = ["CandidateFeature", "mark_candidate_features_stale", "refresh_candidate_features_before_commit"]
+
+class CandidateFeature(Base):
+    """
+    Precomputed scoring features of a candidate.
+
+    The row is refreshed in the same transaction as any write to the candidate,
+    their experiences or their diplomas, so the analysis pipeline never has to
+    reparse the raw experience history.
+
+    Attributes:
+        candidate_uuid (str): The UUID of the candidate the features belong to.
+        candidate (Candidat): The relationship to the Candidat model.
+        experience_count (int): Number of experiences of the candidate.
+        closed_experience_days (int): Days covered by the finished experiences, overlapping periods counted once.
+        closed_intervals (list): Merged [start, end] ISO periods of the finished experiences.
+        ongoing_start_dates (list): ISO start dates of the ongoing experiences, whose length depends on the current date.
+        job_titles (list): Job titles as entered by the candidate.
+        normalized_job_titles (list): Job titles lower-cased, without accents nor punctuation.
+        diploma_level (int): Highest recognized diploma level (years after the baccalaureate).
+        text_terms (dict): Term counts of the job titles, experience descriptions and diplomas, for text matching.
+        date_modified (datetime): The date when the features were last computed.
+    """
+    __tablename__ = "candidate_features"
+
+    candidate_uuid = Column(String, ForeignKey("candidates.uuid"), primary_key=True)  # Candidate the features belong to
+    candidate = relationship("Candidat", foreign_keys=[candidate_uuid])  # Relationship with Candidat
+    experience_count = Column(Integer, nullable=False, default=0)  # Number of experiences
+    closed_experience_days = Column(Integer, nullable=False, default=0)  # Days of finished experiences
+    closed_intervals = Column(JSON, nullable=False, default=[])  # Merged periods of finished experiences
+    ongoing_start_dates = Column(JSON, nullable=False, default=[])  # Start dates of ongoing experiences
+    job_titles = Column(JSON, nullable=False, default=[])  # Job titles as entered
+    normalized_job_titles = Column(JSON, nullable=False, default=[])  # Normalized job titles
+    diploma_level = Column(Integer, nullable=True)  # Highest diploma level
+    text_terms = Column(JSON, nullable=False, default={})  # Term counts for text matching
+    date_modified = Column(DateTime, nullable=False, default=datetime.now, onupdate=datetime.now, index=True)  # Last computation date
+
+    def total_experience_days(self, today: date = None) -> int:
+        """
+        Total days of experience, ongoing experiences being counted up to today and overlapping periods once.
+        """
+        return int(CandidateFeature.experience_days([self], today)[0])
+
+    def years_of_experience(self, today: date = None) -> int:
+        """
+        Full years of experience, ongoing experiences being counted up to today.
+        """
+        return experience_years(self.total_experience_days(today))
+
+    @staticmethod
+    def experience_days(features, today=None):
+        """
+        Total days of experience of several candidates at once.
+
+        Args:
+            features (list): CandidateFeature instances.
+            today (date or list): Date up to which ongoing experiences are counted, shared or one per candidate.
+
+        Returns:
+            numpy.ndarray: The days of experience of each candidate.
+        """
+        return total_experience_days(
+            [feature.closed_intervals for feature in features],
+            [feature.ongoing_start_dates for feature in features],
+            date.today() if today is None else today,
+        )
+
+    def compute(self, experiences, diplomas):
+        """
+        Recompute the features from the raw experiences and diplomas of the candidate.
+
+        Experiences whose dates cannot be parsed are left out of the durations.
+        """
+        return CandidateFeature.compute_many([(self, experiences, diplomas)])[0]
+
+    @staticmethod
+    def compute_many(entries):
+        """
+        Recompute the features of several candidates, parsing and merging all their experience periods at once.
+
+        Args:
+            entries (list): (CandidateFeature, experiences, diplomas) tuples.
+
+        Returns:
+            list: The recomputed CandidateFeature instances.
+        """
+        experiences = [experience for _, candidate_experiences, _ in entries for experience in candidate_experiences]
+        owners = np.repeat(np.arange(len(entries)), [len(candidate_experiences) for _, candidate_experiences, _ in entries])
+        ongoing = np.fromiter((is_ongoing(experience.end_date) for experience in experiences), dtype=bool, count=len(experiences))
+        starts = parse_dates([experience.start_date for experience in experiences])
+        ends = parse_dates([None if is_ongoing(experience.end_date) else experience.end_date for experience in experiences])
+
+        invalid = np.isnat(starts) | (~ongoing & (np.isnat(ends) | (ends < starts)))
+        for index in np.flatnonzero(invalid):
+            logger.warning(f"Invalid dates on experience {experiences[index].uuid}, skipped from candidate features")
+
+        closed = ~invalid & ~ongoing
+        closed_owners, closed_starts, closed_ends = merge_intervals(owners[closed], starts[closed], ends[closed])
+        closed_days = np.bincount(closed_owners, weights=(closed_ends - closed_starts).astype(np.int64), minlength=len(entries))
+        closed_bounds = np.searchsorted(closed_owners, np.arange(len(entries) + 1))
+        closed_starts, closed_ends = closed_starts.astype(str), closed_ends.astype(str)
+
+        ongoing &= ~invalid
+        ongoing_owners = owners[ongoing]
+        ongoing_starts = starts[ongoing].astype(str)
+        ongoing_bounds = np.searchsorted(ongoing_owners, np.arange(len(entries) + 1))
+
+        for i, (feature, candidate_experiences, diplomas) in enumerate(entries):
+            closed_slice = slice(closed_bounds[i], closed_bounds[i + 1])
+            feature.experience_count = len(candidate_experiences)
+            feature.closed_experience_days = int(closed_days[i])
+            feature.closed_intervals = [[start, end] for start, end in zip(closed_starts[closed_slice].tolist(), closed_ends[closed_slice].tolist())]
+            feature.ongoing_start_dates = ongoing_starts[ongoing_bounds[i]:ongoing_bounds[i + 1]].tolist()
+            feature.job_titles = [experience.job_title for experience in candidate_experiences]
+            feature.normalized_job_titles = [normalize_title(experience.job_title) for experience in candidate_experiences]
+            feature.diploma_level = diploma_level(diploma.degree_name for diploma in diplomas)
+            feature.text_terms = term_counts(
+                [experience.job_title for experience in candidate_experiences]
+                + [experience.description for experience in candidate_experiences]
+                + [diploma.degree_name for diploma in diplomas]
+            )
+        return [feature for feature, _, _ in entries]
+
+    @staticmethod
+    def refresh(db, candidate_uuids):
+        """
+        Recompute and stage the features of the given candidates, in a fixed number of queries.
+
+        Args:
+            db: The database session.
+            candidate_uuids (iterable): UUIDs of the candidates to refresh.
+
+        Returns:
+            list: The refreshed CandidateFeature instances.
+        """
+        candidate_uuids = list(set(candidate_uuids))
+        if not candidate_uuids:
+            return []
+
+        experiences = {uuid: [] for uuid in candidate_uuids}
+        for experience in db.query(Experience).filter(Experience.candidate_uuid.in_(candidate_uuids)):
+            experiences[experience.candidate_uuid].append(experience)
+        diplomas = {uuid: [] for uuid in candidate_uuids}
+        for diploma in db.query(Diploma).filter(Diploma.candidate_uuid.in_(candidate_uuids)):
+            diplomas[diploma.candidate_uuid].append(diploma)
+
+        features = {
+            feature.candidate_uuid: feature
+            for feature in db.query(CandidateFeature).filter(CandidateFeature.candidate_uuid.in_(candidate_uuids))
+        }
+        entries = []
+        for uuid in candidate_uuids:
+            feature = features.get(uuid)
+            if feature is None:
+                feature = CandidateFeature(candidate_uuid=uuid)
+                db.add(feature)
+            entries.append((feature, experiences[uuid], diplomas[uuid]))
+        return CandidateFeature.compute_many(entries)
+
+
+PENDING_CANDIDATE_FEATURES = "pending_candidate_features"
+# Models whose writes make the features of their candidate stale
+CANDIDATE_FEATURE_SOURCES = (Candidat, Experience, Diploma)
+
+
+def mark_candidate_features_stale(mapper, connection, target):
+    """
+    Event listener recording, on the session, the candidates whose features must be refreshed before commit.
+    """
+    session = Session.object_session(target)
+    candidate_uuid = target.uuid if isinstance(target, Candidat) else target.candidate_uuid
+    if session is not None and candidate_uuid:
+        session.info.setdefault(PENDING_CANDIDATE_FEATURES, set()).add(candidate_uuid)
+
+
+event.listen(Candidat, "after_insert", mark_candidate_features_stale)
+for source in (Experience, Diploma):
+    for event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(source, event_name, mark_candidate_features_stale)
+
+
+@event.listens_for(Session, "before_commit")
+def refresh_candidate_features_before_commit(session):
+    """
+    Event listener refreshing the features of the candidates written in the transaction.
+
+    The session is flushed first so that the after_insert/after_update/after_delete
+    listeners above have seen every pending experience and diploma; the refreshed
+    features are then flushed by the commit itself. Commits that touch no candidate,
+    experience nor diploma return immediately, without flushing.
+    """
+    if not session.info.get(PENDING_CANDIDATE_FEATURES) and not any(
+        isinstance(instance, CANDIDATE_FEATURE_SOURCES)
+        for instances in (session.new, session.dirty, session.deleted)
+        for instance in instances
+    ):
+        return
+    session.flush()
+    pending = session.info.pop(PENDING_CANDIDATE_FEATURES, None)
+    if pending:
+        CandidateFeature.refresh(session, pending)
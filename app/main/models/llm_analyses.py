@@ -0,0 +1,28 @@
+from datetime import datetime
+from sqlalchemy import Column, String, Text, DateTime
+from app.main.models.db.base_class import Base
+
+
+class LLMAnalysis(Base):
+    """
+    Cached response of a language model to a candidate profile analysis prompt.
+
+    Responses are keyed by a hash of the provider, its settings and the full prompt, so the
+    same CV, experiences and cover letter analysed against the same offer are sent only once
+    until the entry expires.
+
+    Attributes:
+        prompt_hash (str): SHA-256 of the provider namespace and the prompt.
+        provider (str): Provider namespace that produced the response (provider, model, settings).
+        response (str): Text returned by the model.
+        date_added (datetime): The date and time the response was stored.
+        expires_at (datetime): The date and time after which the response is no longer served.
+    """
+
+    __tablename__ = "llm_analyses"
+
+    prompt_hash = Column(String(64), primary_key=True)  # Empreinte du prompt
+    provider = Column(String, nullable=False)  # Fournisseur, modèle et paramètres
+    response = Column(Text, nullable=False)  # Réponse du modèle
+    date_added = Column(DateTime, nullable=False, default=datetime.now)
+    expires_at = Column(DateTime, nullable=False, index=True)  # Fin de validité
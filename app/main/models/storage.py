@@ -5,8 +5,26 @@ from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql.json import JSONB
 from sqlalchemy import Column, ForeignKey, Integer, String, Text, DateTime
 from sqlalchemy import event
+from enum import Enum
 from app.main.models.db.base_class import Base
 
+
+class TextStatusEnum(str, Enum):
+    """
+    Enum representing the state of the text extraction of a stored file.
+
+    Attributes:
+        PENDING: The text is being extracted in the background.
+        EXTRACTED: The extracted text is available.
+        FAILED: The extraction failed (encrypted or corrupted document).
+        UNSUPPORTED: The file format has no text to extract.
+    """
+    PENDING = "pending"
+    EXTRACTED = "extracted"
+    FAILED = "failed"
+    UNSUPPORTED = "unsupported"
+
+
 @dataclass
 class Storage(Base):
     """
@@ -27,6 +45,11 @@ class Storage(Base):
         size (int): Size of the file in bytes.
         thumbnail (JSONB): Thumbnail data in JSON format.
         medium (JSONB): Medium-sized image data in JSON format.
+        content_hash (str): SHA-256 of the file content, unique: identical uploads share the same row.
+        reference_count (int): Number of uploads referencing the file; the file is deleted when it drops to zero.
+        extracted_text (str): Text extracted once from the file (PDF, DOCX), read by the analysis features.
+        text_status (str): State of the text extraction (pending, extracted, failed, unsupported).
+        cv_data (JSONB): Sections parsed from the extracted text when the file is a CV (experience, education, skills).
         date_added (datetime): Timestamp when the file was added to storage.
         date_modified (datetime): Timestamp when the file was last modified.
     """
@@ -47,5 +70,10 @@ class Storage(Base):
     size: int = Column(Integer, default=0, nullable=True)  # Size of the file in bytes
     thumbnail: any = Column(JSONB, default={}, nullable=True)  # Thumbnail in JSON format
     medium: any = Column(JSONB, default={}, nullable=True)  # Medium-sized image data in JSON format
+    content_hash: str = Column(String(64), nullable=True, unique=True, index=True)  # SHA-256 of the file content
+    reference_count: int = Column(Integer, nullable=False, default=1, server_default="1")  # Number of uploads of the file
+    extracted_text: Text = Column(Text, nullable=True)  # Text extracted from the file
+    text_status: str = Column(String, nullable=True)  # State of the text extraction
+    cv_data: any = Column(JSONB, nullable=True)  # Structured content parsed from a CV
     date_added: any = Column(DateTime, server_default=func.now())  # Timestamp when the file was added
     date_modified: any = Column(DateTime, server_default=func.now(), onupdate=func.now())  # Last modified timestamp
@@ -2,6 +2,11 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.jobstores.base import ConflictingIdError
 
 from app.main.schedulers.test_scheduler import test_scheduler
+from app.main.schedulers.candidate_features_scheduler import backfill_candidate_features
+from app.main.schedulers.scoring_scheduler import score_open_offers
+from app.main.schedulers.llm_cache_scheduler import purge_llm_cache
+from app.main.schedulers.cv_parsing_scheduler import parse_pending_cvs
+from app.main.core.config import Config
 from app.main.utils import logger
 
 
@@ -27,6 +32,10 @@ class Scheduler:
             'apscheduler.timezone': 'UTC',
         })
         self.add_job(test_scheduler, 'interval', seconds=60 * 2, id='test_scheduler')
+        self.add_job(backfill_candidate_features, 'interval', seconds=60 * 5, id='backfill_candidate_features')
+        self.add_job(score_open_offers, 'interval', seconds=Config.SCORING_INTERVAL, id='score_open_offers')
+        self.add_job(purge_llm_cache, 'interval', seconds=60 * 60, id='purge_llm_cache')
+        self.add_job(parse_pending_cvs, 'interval', seconds=60, id='parse_pending_cvs')
 
     def add_job(self, func, trigger, **kwargs):
         try:
@@ -0,0 +1,27 @@
+from app.main.models.candidates import Candidat
+from app.main.models.candidate_features import CandidateFeature
+from app.main.models.db.session import SessionLocal
+from app.main.utils import logger
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def backfill_candidate_features():
+    """
+    Compute the features of the candidates created before the candidate_features store existed.
+    """
+    db = SessionLocal()
+    try:
+        missing = (
+            db.query(Candidat.uuid)
+            .outerjoin(CandidateFeature, CandidateFeature.candidate_uuid == Candidat.uuid)
+            .filter(CandidateFeature.candidate_uuid.is_(None))
+            .limit(BACKFILL_BATCH_SIZE)
+            .all()
+        )
+        if missing:
+            CandidateFeature.refresh(db, [uuid for uuid, in missing])
+            db.commit()
+            logger.info(f"Candidate features backfilled for {len(missing)} candidates")
+    finally:
+        db.close()
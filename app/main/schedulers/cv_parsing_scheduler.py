@@ -0,0 +1,38 @@
+from sqlalchemy import or_, select
+
+from app.main.analysis.cv_parser import parse_cvs
+from app.main.models.applications import Application
+from app.main.models.candidates import Candidat
+from app.main.models.db.session import SessionLocal
+from app.main.models.storage import Storage, TextStatusEnum
+from app.main.utils import logger
+
+CV_PARSING_BATCH_SIZE = 500
+
+
+def parse_pending_cvs():
+    """
+    Parse the extracted text of the CVs (application or candidate CV) that have not been parsed yet.
+    """
+    db = SessionLocal()
+    try:
+        storages = (
+            db.query(Storage)
+            .filter(
+                Storage.text_status == TextStatusEnum.EXTRACTED,
+                Storage.cv_data.is_(None),
+                or_(
+                    Storage.uuid.in_(select(Application.cv_uuid).where(Application.cv_uuid.isnot(None))),
+                    Storage.uuid.in_(select(Candidat.cv_uuid).where(Candidat.cv_uuid.isnot(None))),
+                ),
+            )
+            .limit(CV_PARSING_BATCH_SIZE)
+            .all()
+        )
+        if storages:
+            for storage, cv_data in zip(storages, parse_cvs([storage.extracted_text for storage in storages])):
+                storage.cv_data = cv_data
+            db.commit()
+            logger.info(f"{len(storages)} CVs parsed")
+    finally:
+        db.close()
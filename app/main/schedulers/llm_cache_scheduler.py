@@ -0,0 +1,11 @@
+from app.main.analysis.llm import profile_analysis
+from app.main.utils import logger
+
+
+def purge_llm_cache():
+    """
+    Delete the cached language model responses that have expired.
+    """
+    count = profile_analysis.cache.purge_expired()
+    if count:
+        logger.info(f"{count} expired LLM analyses purged")
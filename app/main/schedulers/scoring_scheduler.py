@@ -0,0 +1,23 @@
+from app.main.analysis.scoring import score_offer
+from app.main.models.job_offers import JobOffer, JobStatus
+from app.main.models.db.session import SessionLocal
+from app.main.utils import logger
+
+
+def score_open_offers():
+    """
+    Score the applications of the open job offers that have no score, or a stale one, for the active model.
+    """
+    db = SessionLocal()
+    try:
+        offer_uuids = [
+            uuid for uuid, in db.query(JobOffer.uuid).filter(JobOffer.is_deleted == False, JobOffer.status == JobStatus.active)
+        ]
+        for offer_uuid in offer_uuids:
+            try:
+                score_offer(db, offer_uuid)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Failed to score applications of offer {offer_uuid}: {e}")
+    finally:
+        db.close()
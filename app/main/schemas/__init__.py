@@ -6,4 +6,5 @@ from .user import *
 from .file import *
 from .job_offers import *
 from .candidats import *
-from .applications import *
\ No newline at end of file
+from .applications import *
+from .analysis import *
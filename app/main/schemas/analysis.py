@@ -0,0 +1,63 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional
+from datetime import datetime
+
+
+class ModelVersion(BaseModel):
+    version: str
+    size: int
+    modified_at: datetime
+    is_active: bool
+    is_loaded: bool
+
+
+class ModelVersionActivate(BaseModel):
+    version: str
+
+
+class ApplicantMatch(BaseModel):
+    application_uuid: str
+    candidate_uuid: str
+    first_name: str
+    last_name: str
+    score: float
+
+
+class CandidateMatch(BaseModel):
+    candidate_uuid: str
+    first_name: str
+    last_name: str
+    email: str
+    score: float
+
+
+class BulkCandidatesStatus(BaseModel):
+    job_offer_uuids: List[str] = Field(..., min_length=1, max_length=200)
+
+
+class ProfileAnalysisResult(BaseModel):
+    application_uuid: str
+    candidate_uuid: str
+    analysis: Optional[str] = None
+    cached: bool
+
+
+class ScreeningRules(BaseModel):
+    min_experience_count: Optional[int] = None
+    min_years_of_experience: Optional[int] = None
+    min_diploma_level: Optional[int] = None
+    title_keywords: List[str] = []
+
+
+class ScreenedCandidate(BaseModel):
+    uuid: str
+    first_name: str
+    last_name: str
+    email: str
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ScreeningResult(BaseModel):
+    criteria: ScreeningRules
+    selected: List[ScreenedCandidate]
+    rejected: List[ScreenedCandidate]
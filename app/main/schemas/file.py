@@ -45,6 +45,7 @@ class StorageCreate(BaseModel):
     width: Optional[int] = Field(None, description="La largeur du fichier")
     height: Optional[int] = Field(None, description="La hauteur du fichier")
     size: Optional[int] = Field(None, description="La taille du fichier en octets")
+    content_hash: Optional[str] = Field(None, description="L'empreinte SHA-256 du contenu du fichier")
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -73,6 +74,14 @@ class FileSlim1(BaseModel):
 
 
 
+class StorageDedupStats(BaseModel):
+    files: int = Field(..., description="Le nombre de fichiers stockés")
+    references: int = Field(..., description="Le nombre d'envois référençant ces fichiers")
+    duplicate_uploads: int = Field(..., description="Le nombre d'envois servis par un fichier déjà stocké")
+    stored_bytes: int = Field(..., description="La taille totale des fichiers stockés, en octets")
+    saved_bytes: int = Field(..., description="Les octets non envoyés ni stockés grâce à la déduplication")
+
+
 class FileList(DataList):
     data: list[FileSlim] = []
 
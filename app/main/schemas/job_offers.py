@@ -54,6 +54,10 @@ class JobOffersResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class RecommendedJobOffer(JobOffersResponse):
+    score:float
+
+
 class JobOffersUpdateStatus(BaseModel):
     uuid:str
 class JobOffersDetails(BaseModel):
@@ -1,11 +1,29 @@
+import hashlib
 import os
+import time
 import uuid
+from typing import Iterator, NamedTuple, Optional
+import filetype
 from fastapi import UploadFile, HTTPException
 from docx import Document
 import PyPDF2
 from app.main.core.config import Config
 from mimetypes import MimeTypes
 from app.main.core.i18n import __
+from app.main.utils import logger
+
+
+# Taille des blocs copiés depuis le corps de la requête
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Pages lues par un même PdfReader : un nouveau lecteur libère les objets résolus pour les précédentes
+PDF_PAGE_WINDOW = 10
+
+
+class SavedUpload(NamedTuple):
+    path: str
+    sha256: str
+    size: int
+    mime_type: str
 
 
 class FileUtils:
@@ -30,20 +48,59 @@ class FileUtils:
 
     def save_temp_file(self, file: UploadFile) -> str:
         """Save the uploaded file temporarily and return the path."""
-        # Check MIME type
-        mime = MimeTypes()
-        print("file: " + file.filename[-1])
-        mime_type = mime.guess_type(file.filename)[0]
+        return self.save_upload(file).path
+
+    def save_upload(self, file: UploadFile, max_size: int = Config.UPLOAD_MAX_SIZE) -> SavedUpload:
+        """
+        Copy the uploaded file to a temporary file in fixed-size chunks.
+
+        The SHA-256 of the content is computed while copying, and the MIME type is sniffed
+        from the first bytes. The upload is rejected as soon as it crosses `max_size` bytes
+        (or before copying when its size is known), and the partial file is deleted. Memory
+        stays constant whatever the size of the file.
 
-        print("mime_type: ",mime_type)
-        if mime_type not in self.allowed_mime_types:
+        Args:
+            file (UploadFile): The uploaded file.
+            max_size (int): The maximum size of the file, in bytes.
+
+        Returns:
+            SavedUpload: The path, SHA-256, size and sniffed MIME type of the saved file.
+
+        Raises:
+            HTTPException: 400 if the file type is not allowed, 413 if the file is too large.
+        """
+        # Le contenu fait foi ; une extension connue doit néanmoins désigner un type autorisé
+        mime_type = MimeTypes().guess_type(file.filename)[0]
+        if mime_type is not None and mime_type not in self.allowed_mime_types:
             raise HTTPException(status_code=400, detail="Invalid file type")
+        if file.size is not None and file.size > max_size:
+            raise HTTPException(status_code=413, detail=__("file-too-large"))
 
         file_name = f"{uuid.uuid4()}-{file.filename.replace(' ', '-')}"
         file_path = os.path.join(Config.UPLOADED_FILE_DEST, file_name)
-        with open(file_path, 'wb') as f:
-            f.write(file.file.read())
-        return file_path
+        digest = hashlib.sha256()
+        size = 0
+        sniffed_type = None
+        try:
+            with open(file_path, 'wb') as f:
+                while chunk := file.file.read(UPLOAD_CHUNK_SIZE):
+                    if size == 0:
+                        kind = filetype.guess(chunk)
+                        sniffed_type = kind.mime if kind else None
+                        if sniffed_type not in self.allowed_mime_types:
+                            raise HTTPException(status_code=400, detail="Invalid file type")
+                    size += len(chunk)
+                    if size > max_size:
+                        raise HTTPException(status_code=413, detail=__("file-too-large"))
+                    digest.update(chunk)
+                    f.write(chunk)
+        except BaseException:
+            self.delete_temp_file(file_path)
+            raise
+        if size == 0:
+            self.delete_temp_file(file_path)
+            raise HTTPException(status_code=400, detail="Invalid file type")
+        return SavedUpload(file_path, digest.hexdigest(), size, sniffed_type)
     
     def extract_text_from_file(self,file_path):
         """
@@ -60,8 +117,8 @@ class FileUtils:
             Exception: If text extraction fails.
         """
         file_extension = os.path.splitext(file_path)[1].lower()
-        print("file_extension",file_extension)
-        
+        logger.debug(f"Extracting text from {file_path} ({file_extension})")
+
         if file_extension == ".docx":
             try:
                 doc = Document(file_path)
@@ -71,13 +128,12 @@ class FileUtils:
         
         elif file_extension == ".pdf":
             try:
-                text = ""
-                with open(file_path, 'rb') as pdf_file:
-                    pdf_reader = PyPDF2.PdfReader(pdf_file)
-                    for page in pdf_reader.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += page_text
+                text = "".join(self.iter_pdf_text(
+                    file_path,
+                    max_pages=Config.PDF_MAX_PAGES,
+                    max_bytes=Config.PDF_MAX_TEXT_BYTES,
+                    timeout=Config.PDF_EXTRACTION_TIMEOUT,
+                ))
             except Exception as e:
                 raise HTTPException(status_code= 400, detail =__("this file is crypted, please upload an uncrypted file"))
         
@@ -86,6 +142,54 @@ class FileUtils:
         
         return text or ""
 
+    def iter_pdf_text(self, file_path: str, max_pages: Optional[int] = None, max_bytes: Optional[int] = None, timeout: Optional[float] = None) -> Iterator[str]:
+        """
+        Yield the text of a PDF file page by page.
+
+        Stops early once `max_pages` pages have been read, once `max_bytes` bytes (UTF-8) of
+        text have been yielded (the last page is cut to fit) or once `timeout` seconds have
+        elapsed; the timeout is checked between pages, so a single pathological page can
+        overrun it (analysis.documents enforces a hard deadline). The file is reopened with a new
+        reader every PDF_PAGE_WINDOW pages, dropping the objects parsed so far, so memory stays
+        flat whatever the document size.
+
+        Args:
+            file_path (str): The path to the PDF file.
+            max_pages (int, optional): Maximum number of pages read.
+            max_bytes (int, optional): Maximum size of the yielded text, in bytes.
+            timeout (float, optional): Maximum extraction time, in seconds.
+
+        Yields:
+            str: The text of each page that has some.
+
+        Raises:
+            Exception: If the file is encrypted or cannot be parsed.
+        """
+        deadline = time.monotonic() + timeout if timeout else None
+        remaining = max_bytes
+        with open(file_path, 'rb') as pdf_file:
+            pdf_reader = PyPDF2.PdfReader(pdf_file)
+            if pdf_reader.is_encrypted:
+                raise Exception("Encrypted PDF file")
+            page_count = len(pdf_reader.pages)
+            for page_number in range(min(page_count, max_pages) if max_pages else page_count):
+                if deadline is not None and time.monotonic() > deadline:
+                    logger.warning(f"PDF text extraction of {file_path} stopped after {page_number} pages: timeout of {timeout}s reached")
+                    return
+                if page_number and page_number % PDF_PAGE_WINDOW == 0:
+                    pdf_file.seek(0)
+                    pdf_reader = PyPDF2.PdfReader(pdf_file)
+                page_text = pdf_reader.pages[page_number].extract_text()
+                if not page_text:
+                    continue
+                if remaining is not None:
+                    encoded = page_text.encode()
+                    if len(encoded) >= remaining:
+                        yield encoded[:remaining].decode(errors="ignore")
+                        return
+                    remaining -= len(encoded)
+                yield page_text
+
     def delete_temp_file(self, file_path: str):
         """Delete the temporary file."""
         if os.path.exists(file_path):
@@ -48,6 +48,10 @@ def upload_to_cloudinary(file_path: str, public_id: str):
     """Upload the file to Cloudinary and return the response."""
     return cloudinary.uploader.upload(file_path, public_id=public_id, resource_type="auto")
 
+def delete_from_cloudinary(public_id: str, resource_type: str = "image"):
+    """Delete a file from Cloudinary."""
+    return cloudinary.uploader.destroy(public_id, resource_type=resource_type)
+
 def get_file_url(public_id: str) -> str:
     """Generate a secure URL for the file in Cloudinary."""
     url, _ = cloudinary.utils.cloudinary_url(public_id)
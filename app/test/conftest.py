@@ -1,12 +1,15 @@
+import random
+import uuid
 from typing import Dict, Generator
 
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
+from app.main.analysis.matching import text_index_sync
 from app.main.core.config import Config
 from app.main.models.db.session import SessionLocal
-from app.main import app
+from app.main import app, models
 
 
 @pytest.fixture(scope="session")
@@ -14,7 +17,186 @@ def db() -> Generator:
     yield SessionLocal()
 
 
-@pytest.fixture(scope="module")
+# The app starts the scheduler on startup and never stops it: one client for the whole session
+@pytest.fixture(scope="session")
 def client() -> Generator:
     with TestClient(app) as c:
-        yield c
\ No newline at end of file
+        yield c
+
+
+@pytest.fixture
+def fresh_text_index(monkeypatch):
+    """Text index synchronized with the database on every call instead of every TEXT_INDEX_SYNC_INTERVAL seconds."""
+    monkeypatch.setattr(text_index_sync, "min_interval", 0)
+
+
+@pytest.fixture
+def seed_offer(db: Session) -> Generator:
+    """
+    Factory creating a job offer with `n` applicants (random experiences and one diploma each).
+
+    Everything created is deleted at teardown.
+    """
+    created = []
+
+    def seed(n: int, seed: int = 0, **offer_fields) -> models.JobOffer:
+        rng = random.Random(seed)
+        offer = models.JobOffer(
+            uuid=str(uuid.uuid4()),
+            **{
+                "title": "Développeur Backend",
+                "description": "python django api",
+                "company_name": "company",
+                "location": "Douala",
+                "salary": 300000,
+                "full_salary": "300000FCFA",
+                "employment_type": "CDI",
+                "requirements": "python sql",
+                "contact_email": "hr@test.com",
+                **offer_fields,
+            },
+        )
+        db.add(offer)
+        candidates = []
+        for i in range(n):
+            candidate = models.Candidat(
+                uuid=str(uuid.uuid4()),
+                first_name=f"first{i}",
+                last_name="last",
+                email=f"{uuid.uuid4()}@test.com",
+                code_country="+237",
+                phone_number=str(uuid.uuid4()),
+                full_phone_number=str(uuid.uuid4()),
+            )
+            db.add(candidate)
+            candidates.append(candidate)
+            for _ in range(rng.randint(0, 3)):
+                year = rng.randint(2005, 2020)
+                db.add(models.Experience(
+                    uuid=str(uuid.uuid4()),
+                    job_title=rng.choice(["Développeur CDI", "Data Scientist", "Stage"]),
+                    company_name="company",
+                    start_date=f"{year}-01-15",
+                    end_date=rng.choice(["Present", f"{year + rng.randint(0, 4)}-06-01", None]),
+                    description="python api backend",
+                    candidate_uuid=candidate.uuid,
+                ))
+            db.add(models.Diploma(
+                uuid=str(uuid.uuid4()),
+                degree_name=rng.choice(["Master", "Licence", "BTS"]),
+                institution_name="university",
+                start_year=2010,
+                end_year=2012,
+                graduation_year="2010/2012",
+                candidate_uuid=candidate.uuid,
+            ))
+            db.add(models.Application(uuid=str(uuid.uuid4()), candidate_uuid=candidate.uuid, job_offer_uuid=offer.uuid))
+        db.commit()
+        created.append((offer.uuid, [candidate.uuid for candidate in candidates]))
+        return offer
+
+    yield seed
+
+    db.rollback()
+    for offer_uuid, candidate_uuids in created:
+        db.query(models.ApplicationScore).filter(models.ApplicationScore.job_offer_uuid == offer_uuid).delete(synchronize_session=False)
+        db.query(models.Application).filter(models.Application.job_offer_uuid == offer_uuid).delete(synchronize_session=False)
+        for model in (models.CandidateFeature, models.Experience, models.Diploma):
+            db.query(model).filter(model.candidate_uuid.in_(candidate_uuids)).delete(synchronize_session=False)
+        db.query(models.Candidat).filter(models.Candidat.uuid.in_(candidate_uuids)).delete(synchronize_session=False)
+        db.query(models.JobOffer).filter(models.JobOffer.uuid == offer_uuid).delete(synchronize_session=False)
+    db.commit()
+
+
+@pytest.fixture
+def make_candidate(db: Session) -> Generator:
+    """
+    Factory creating a candidate with the given experiences and diploma names.
+
+    Each experience is a dict of Experience fields; the missing ones default to a current
+    position started on 2015-01-01. Everything created is deleted at teardown.
+    """
+    created = []
+
+    def make(experiences=(), diplomas=(), **candidate_fields) -> models.Candidat:
+        candidate = models.Candidat(
+            uuid=str(uuid.uuid4()),
+            **{
+                "first_name": "first",
+                "last_name": "last",
+                "email": f"{uuid.uuid4()}@test.com",
+                "code_country": "+237",
+                "phone_number": str(uuid.uuid4()),
+                "full_phone_number": str(uuid.uuid4()),
+                **candidate_fields,
+            },
+        )
+        db.add(candidate)
+        for experience in experiences:
+            db.add(models.Experience(
+                uuid=str(uuid.uuid4()),
+                candidate_uuid=candidate.uuid,
+                **{"company_name": "company", "start_date": "2015-01-01", "end_date": "Present", "description": "", **experience},
+            ))
+        for degree_name in diplomas:
+            db.add(models.Diploma(
+                uuid=str(uuid.uuid4()),
+                degree_name=degree_name,
+                institution_name="university",
+                start_year=2010,
+                end_year=2012,
+                graduation_year="2010/2012",
+                candidate_uuid=candidate.uuid,
+            ))
+        db.commit()
+        created.append(candidate.uuid)
+        return candidate
+
+    yield make
+
+    db.rollback()
+    for model in (models.CandidateFeature, models.Experience, models.Diploma):
+        db.query(model).filter(model.candidate_uuid.in_(created)).delete(synchronize_session=False)
+    db.query(models.Candidat).filter(models.Candidat.uuid.in_(created)).delete(synchronize_session=False)
+    db.commit()
+
+
+@pytest.fixture
+def make_offer(db: Session, make_candidate) -> Generator:
+    """
+    Factory creating a job offer, with one application per candidate of `applicants`.
+
+    Applications and scores are deleted at teardown, before the candidates of make_candidate.
+    """
+    created = []
+
+    def make(applicants=(), **offer_fields) -> models.JobOffer:
+        offer = models.JobOffer(
+            uuid=str(uuid.uuid4()),
+            **{
+                "title": "Développeur Backend",
+                "description": "python django api",
+                "company_name": "company",
+                "location": "Douala",
+                "salary": 300000,
+                "full_salary": "300000FCFA",
+                "employment_type": "CDI",
+                "requirements": "python sql",
+                "contact_email": "hr@test.com",
+                **offer_fields,
+            },
+        )
+        db.add(offer)
+        for candidate in applicants:
+            db.add(models.Application(uuid=str(uuid.uuid4()), candidate_uuid=candidate.uuid, job_offer_uuid=offer.uuid))
+        db.commit()
+        created.append(offer.uuid)
+        return offer
+
+    yield make
+
+    db.rollback()
+    db.query(models.ApplicationScore).filter(models.ApplicationScore.job_offer_uuid.in_(created)).delete(synchronize_session=False)
+    db.query(models.Application).filter(models.Application.job_offer_uuid.in_(created)).delete(synchronize_session=False)
+    db.query(models.JobOffer).filter(models.JobOffer.uuid.in_(created)).delete(synchronize_session=False)
+    db.commit()
@@ -0,0 +1,51 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app.main.analysis.loaders import load_offer_applications
+from app.main.controllers.analyse_controller import get_candidates_by_status
+
+
+@contextmanager
+def count_queries(db):
+    """Counts the statements sent to the database while the block runs."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_load_applications_query_count_does_not_grow(db, seed_offer):
+    small, large = seed_offer(5, seed=1), seed_offer(50, seed=2)
+    db.expire_all()
+
+    with count_queries(db) as small_queries:
+        small_rows = load_offer_applications(db, small.uuid)
+    with count_queries(db) as large_queries:
+        large_rows = load_offer_applications(db, large.uuid)
+
+    assert (len(small_rows), len(large_rows)) == (5, 50)
+    assert all(row.candidate is not None for row in large_rows)
+    assert len(large_queries) == len(small_queries)
+
+
+def test_candidates_status_query_count_does_not_grow(db, seed_offer):
+    small, large = seed_offer(5, seed=3), seed_offer(50, seed=4)
+    db.expire_all()
+
+    with count_queries(db) as small_queries:
+        small_result = get_candidates_by_status(small.uuid, db)
+    with count_queries(db) as large_queries:
+        large_result = get_candidates_by_status(large.uuid, db)
+
+    # Les candidats dont la classe prédite n'a pas de catégorie ne sont dans aucune liste
+    assert 0 < sum(len(candidates) for candidates in small_result[:3]) <= 5
+    assert 0 < sum(len(candidates) for candidates in large_result[:3]) <= 50
+    assert len(large_queries) == len(small_queries)
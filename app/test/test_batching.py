@@ -0,0 +1,95 @@
+import threading
+
+import numpy as np
+from sklearn.tree import DecisionTreeClassifier
+
+from app.main.analysis.batching import MicroBatcher
+from app.main.analysis.model_registry import LoadedModel
+
+
+class CountingModel:
+    """Modèle enregistrant la taille de chaque matrice reçue ; la probabilité vaut la première colonne."""
+
+    def __init__(self, n_features, fail=False):
+        self.n_features_in_ = n_features
+        self.classes_ = np.array([0, 1])
+        self.fail = fail
+        self.calls = []
+
+    def predict_proba(self, X):
+        if self.fail:
+            raise ValueError("model failure")
+        assert X.shape[1] == self.n_features_in_
+        self.calls.append(len(X))
+        return np.column_stack([1 - X[:, 0], X[:, 0]])
+
+
+def predict_concurrently(batcher, requests):
+    """Soumet les demandes (X, modèle) depuis autant de threads ; retourne résultats ou exceptions."""
+    results = [None] * len(requests)
+    barrier = threading.Barrier(len(requests))
+
+    def submit(i, X, loaded_model):
+        barrier.wait()
+        try:
+            results[i] = batcher.predict_proba(X, loaded_model)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=submit, args=(i, *request)) for i, request in enumerate(requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def matrix(values, n_features):
+    X = np.zeros((len(values), n_features))
+    X[:, 0] = values
+    return X
+
+
+def test_concurrent_requests_are_coalesced_and_split_back():
+    loaded = LoadedModel("v1", CountingModel(3))
+    batcher = MicroBatcher(lambda: loaded, max_wait_ms=200)
+    requests = [(matrix([i / 10] * (i + 1), 3), None) for i in range(4)]
+
+    results = predict_concurrently(batcher, requests)
+    assert loaded.model.calls == [10]
+    for (X, _), (probabilities, classes, version) in zip(requests, results):
+        np.testing.assert_array_equal(probabilities[:, 1], X[:, 0])
+        assert classes.tolist() == [0, 1] and version == "v1"
+    assert batcher.metrics()["requests"] == 4 and batcher.metrics()["batches"] == 1
+
+
+def test_failure_reaches_every_waiter():
+    loaded = LoadedModel("v1", CountingModel(3, fail=True))
+    batcher = MicroBatcher(lambda: loaded, max_wait_ms=200)
+
+    results = predict_concurrently(batcher, [(matrix([0.5], 3), None) for _ in range(3)])
+    assert all(isinstance(result, ValueError) for result in results)
+    assert batcher.metrics()["errors"] == 1
+
+    # Le thread de travail continue de servir les demandes suivantes
+    loaded.model.fail = False
+    assert batcher.predict_proba(matrix([0.5], 3))[2] == "v1"
+
+
+def test_requests_built_for_different_models_during_activation():
+    # Ancien modèle à 3 colonnes, nouveau à 6 (colonnes du CV) : chaque matrice va au modèle qui l'a construite
+    old, new = LoadedModel("v1", CountingModel(3)), LoadedModel("v2", CountingModel(6))
+    batcher = MicroBatcher(lambda: new, max_wait_ms=200)
+
+    results = predict_concurrently(batcher, [(matrix([0.1, 0.2], 3), old), (matrix([0.3], 6), new), (matrix([0.4], 3), old)])
+    assert old.model.calls == [3] and new.model.calls == [1]
+    assert [result[2] for result in results] == ["v1", "v2", "v1"]
+    np.testing.assert_array_equal(results[2][0][:, 1], [0.4])
+
+
+def test_empty_matrix_is_answered_without_the_worker():
+    model = DecisionTreeClassifier().fit(np.array([[0], [1]]), np.array([1, 2]))
+    batcher = MicroBatcher(lambda: LoadedModel("v1", model))
+    probabilities, classes, version = batcher.predict_proba(np.empty((0, 1)))
+    assert probabilities.shape == (0, 2) and classes.tolist() == [1, 2] and version == "v1"
+    assert batcher._thread is None
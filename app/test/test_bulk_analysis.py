@@ -0,0 +1,28 @@
+from app.main.analysis import scoring
+from app.main.controllers.analyse_controller import get_candidates_by_status_for_offers
+
+
+def test_offers_are_scored_chunk_by_chunk(db, seed_offer, monkeypatch):
+    first, second, third = seed_offer(2, seed=8), seed_offer(3, seed=9), seed_offer(4, seed=10)
+    predictions = []
+    predict_proba = scoring.inference.predict_proba
+
+    def counting_predict_proba(X, loaded_model=None):
+        predictions.append(len(X))
+        return predict_proba(X, loaded_model)
+
+    monkeypatch.setattr(scoring.inference, "predict_proba", counting_predict_proba)
+    offers = get_candidates_by_status_for_offers([first.uuid, second.uuid, "unknown", third.uuid], db, chunk_size=5)
+
+    # Les deux premières offres tiennent dans un lot : une prédiction, la troisième n'est pas encore notée
+    assert next(offers)[0] == first.uuid
+    assert predictions == [5]
+    assert next(offers)[0] == second.uuid
+    assert next(offers) == ("unknown", None, None)
+    assert predictions == [5]
+
+    job_offer_uuid, result, model_version = next(offers)
+    assert job_offer_uuid == third.uuid and model_version
+    assert predictions == [5, 4]
+    assert sum(len(candidates) for candidates in result) <= 4
+    assert next(offers, None) is None
@@ -0,0 +1,42 @@
+import uuid
+
+from app.main import models
+from app.main.models import candidate_features
+
+
+def test_features_refreshed_on_commit(db, seed_offer):
+    offer = seed_offer(1, seed=5)
+    candidate_uuid = db.query(models.Application.candidate_uuid).filter(models.Application.job_offer_uuid == offer.uuid).scalar()
+    count = db.query(models.Experience).filter(models.Experience.candidate_uuid == candidate_uuid).count()
+
+    db.add(models.Experience(
+        uuid=str(uuid.uuid4()), job_title="Développeur", company_name="company",
+        start_date="2015-01-01", end_date="2016-01-01", description="python", candidate_uuid=candidate_uuid,
+    ))
+    db.commit()
+
+    feature = db.query(models.CandidateFeature).get(candidate_uuid)
+    db.refresh(feature)
+    assert feature.experience_count == count + 1
+    assert "Développeur" in feature.job_titles
+
+
+def test_unrelated_commit_does_not_flush(db, seed_offer, monkeypatch):
+    offer = seed_offer(0, seed=6)
+    offer.title = "Data Engineer"
+
+    def flush(*args, **kwargs):
+        raise AssertionError("flushed for a commit touching no candidate")
+
+    # Seule l'offre est modifiée : le listener ne doit pas forcer de flush
+    monkeypatch.setattr(db, "flush", flush)
+    candidate_features.refresh_candidate_features_before_commit(db)
+    monkeypatch.undo()
+    db.commit()
+
+
+def test_star_import_exports_only_public_names():
+    namespace = {}
+    exec("from app.main.models.candidate_features import *", namespace)
+    assert {"CandidateFeature"} <= set(namespace) <= set(candidate_features.__all__) | {"__builtins__"}
+    assert "model" not in namespace and "np" not in namespace
@@ -0,0 +1,59 @@
+import json
+
+from app.main import models
+from app.main.analysis.loaders import iter_applications
+from app.main.controllers import analyse_controller
+from app.main.controllers.analyse_controller import NDJSON_MEDIA_TYPE, get_scored_candidates
+from app.main.core.config import Config
+
+
+def applicants(make_candidate, n):
+    """Candidats d'expérience croissante : de quelques mois à plusieurs années."""
+    return [
+        make_candidate(experiences=[{"job_title": "Développeur CDI", "description": "python api", "start_date": f"{2024 - 2 * i}-01-15"}])
+        for i in range(n)
+    ]
+
+
+def test_iter_applications_pages_by_uuid(db, make_candidate, make_offer):
+    offer = make_offer(applicants(make_candidate, 7))
+    deleted = db.query(models.Application).filter(models.Application.job_offer_uuid == offer.uuid).first()
+    deleted.is_deleted = True
+    db.commit()
+
+    chunks = list(iter_applications(db, models.Application.job_offer_uuid == offer.uuid, chunk_size=4))
+    assert [len(rows) for rows in chunks] == [4, 2]
+    uuids = [row.application.uuid for rows in chunks for row in sorted(rows, key=lambda row: row.application.uuid)]
+    assert uuids == sorted(uuids) and deleted.uuid not in uuids
+    # Chaque ligne porte le candidat et ses caractéristiques précalculées, sans requête par candidature
+    assert all(row.candidate.uuid == row.application.candidate_uuid and row.features is not None for rows in chunks for row in rows)
+
+
+def test_candidates_status_streams_ndjson(db, client, make_candidate, make_offer, monkeypatch):
+    monkeypatch.setattr(Config, "ANALYSIS_STREAM_CHUNK_SIZE", 3)
+    offer = make_offer(applicants(make_candidate, 8))
+    scored_chunks = []
+    score_candidates = analyse_controller.score_candidates
+
+    def counting_score_candidates(db, job_offer, candidate_data, job_offer_data):
+        scored_chunks.append(len(candidate_data))
+        return score_candidates(db, job_offer, candidate_data, job_offer_data)
+
+    monkeypatch.setattr(analyse_controller, "score_candidates", counting_score_candidates)
+    response = client.get(f"{Config.API_V1_STR}/analyse/applications/{offer.uuid}/candidates_status", headers={"Accept": NDJSON_MEDIA_TYPE})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(NDJSON_MEDIA_TYPE)
+    # Les candidatures sont notées lot par lot au fil du flux
+    assert scored_chunks == [3, 3, 2]
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    candidate_data, model_version = get_scored_candidates(offer.uuid, db)
+    expected = {candidate["application_uuid"]: candidate["status"] for candidate in candidate_data if candidate["status"] is not None}
+    assert {line["application_uuid"]: line["status"] for line in lines} == expected
+    assert {line["model_version"] for line in lines} == {model_version}
+
+
+def test_candidates_status_stream_without_applications(client, make_offer):
+    offer = make_offer()
+    response = client.get(f"{Config.API_V1_STR}/analyse/applications/{offer.uuid}/candidates_status", headers={"Accept": NDJSON_MEDIA_TYPE})
+    assert response.status_code == 404
@@ -0,0 +1,48 @@
+from datetime import date
+
+from app.main.analysis.cv_parser import parse_cv, parse_cvs
+from app.main.analysis.features import cv_features
+
+
+CV = """Jean Dupont
+Profil
+Développeur passionné
+Expériences professionnelles
+Développeur Backend — Orange, 01/2015 – 12/2017
+Lead développeur, 2017 - 2019
+Consultant, 03/2022 à aujourd'hui
+Formation
+Master en informatique, 2014
+Licence, 2012
+Compétences techniques
+- Python
+- Django, SQL; Docker
+Langues
+Français, Anglais
+"""
+
+TODAY = date(2024, 2, 15)
+
+
+def test_parse_cv_sections():
+    cv = parse_cv(CV, today=TODAY)
+    assert cv["sections"] == ["education", "experience", "skills"]
+    assert cv["experience_count"] == 3
+    # 2015-2019 fusionnés (60 mois), 03/2022 à 02/2024 inclus (24 mois)
+    assert cv["experience_months"] == 84
+    assert cv["diploma_level"] == 5
+    assert cv["skills"] == ["python", "django", "sql", "docker"]
+    assert cv_features(cv) == (7, 5, 4)
+
+
+def test_missing_cv_has_no_features():
+    cv = parse_cv(None, today=TODAY)
+    assert cv == {"sections": [], "experience_count": 0, "experience_months": 0, "diploma_level": None, "skills": []}
+    assert cv_features(cv) == cv_features(None) == (0, -1, 0)
+
+
+def test_batch_months_stay_with_their_cv():
+    second = "Experience\nStage, 06/2023 - 08/2023\nFuture, 2030 - 2031\n"
+    first, empty, other = parse_cvs([CV, "", second], today=TODAY)
+    assert (first["experience_months"], empty["experience_months"], other["experience_months"]) == (84, 0, 3)
+    assert other["experience_count"] == 1
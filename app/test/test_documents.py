@@ -0,0 +1,167 @@
+import os
+import time
+import uuid
+
+import pytest
+from docx import Document
+
+from app.main import models
+from app.main.analysis.documents import DocumentTexts
+from app.main.models.storage import TextStatusEnum
+from app.main.utils import file as file_module
+from app.main.utils.file import file_utils
+
+
+def write_pdf(path, pages):
+    """PDF minimal d'une page de texte par élément de `pages`."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 712 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    content, offsets = b"%PDF-1.4\n", []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(content))
+        content += f"{number} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(content)
+    content += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    content += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    content += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(content)
+    return str(path)
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    return write_pdf(tmp_path / "cv.pdf", [f"Page {i} python" for i in range(10)])
+
+
+def test_iter_pdf_text_reads_every_page(pdf):
+    pages = list(file_utils.iter_pdf_text(pdf))
+    assert [page.strip() for page in pages] == [f"Page {i} python" for i in range(10)]
+
+
+def test_iter_pdf_text_reopens_the_reader_per_window(pdf, monkeypatch):
+    readers = []
+    pdf_reader = file_module.PyPDF2.PdfReader
+
+    def counting_reader(stream):
+        readers.append(stream.tell())
+        return pdf_reader(stream)
+
+    monkeypatch.setattr(file_module.PyPDF2, "PdfReader", counting_reader)
+    monkeypatch.setattr(file_module, "PDF_PAGE_WINDOW", 3)
+    pages = list(file_utils.iter_pdf_text(pdf))
+    assert [page.strip() for page in pages] == [f"Page {i} python" for i in range(10)]
+    assert readers == [0, 0, 0, 0]
+
+
+def test_iter_pdf_text_page_and_size_budgets(pdf):
+    assert len(list(file_utils.iter_pdf_text(pdf, max_pages=3))) == 3
+    text = "".join(file_utils.iter_pdf_text(pdf, max_bytes=20))
+    assert len(text.encode()) == 20 and text.startswith("Page 0 python")
+
+
+def test_iter_pdf_text_timeout(pdf, monkeypatch):
+    clock = iter(range(0, 1000, 10))
+    monkeypatch.setattr(file_module.time, "monotonic", lambda: next(clock))
+    # Chaque lecture de l'horloge avance de 10 s : l'échéance de 25 s passe après deux pages
+    assert len(list(file_utils.iter_pdf_text(pdf, timeout=25))) == 2
+
+
+def slow_extract(file_path):
+    """
+    Exécutée dans le pool : bloque sur « slow », comme une page piégée ; bloque sur « medium »
+    tant que son fichier témoin existe, c'est-à-dire à la première tentative seulement.
+    """
+    name = os.path.basename(file_path)
+    if name == "slow.pdf":
+        time.sleep(60)
+    if os.path.exists(f"{file_path}.first"):
+        os.remove(f"{file_path}.first")
+        time.sleep(60)
+    return f"text of {name}", None
+
+
+def test_overdue_extraction_is_killed_and_others_retried(db, tmp_path):
+    texts = DocumentTexts(max_workers=2, timeout=8, extract=slow_extract)
+    storages = {}
+    (tmp_path / "medium.pdf.first").touch()
+    for name in ("slow.pdf", "medium.pdf"):
+        path = tmp_path / name
+        path.write_bytes(b"%PDF")
+        storages[name] = models.Storage(uuid=str(uuid.uuid4()), file_name=name)
+        db.add(storages[name])
+        db.commit()
+        texts.submit(db, storages[name], str(path))
+        # « medium » part plus tard : il est encore dans les temps quand « slow » dépasse l'échéance
+        time.sleep(4)
+
+    try:
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            db.expire_all()
+            if all(storage.text_status != TextStatusEnum.PENDING for storage in storages.values()):
+                break
+            time.sleep(0.2)
+
+        assert storages["slow.pdf"].text_status == TextStatusEnum.FAILED
+        # Tué avec le pool, puis relancé dans le nouveau pool
+        assert storages["medium.pdf"].text_status == TextStatusEnum.EXTRACTED
+        assert storages["medium.pdf"].extracted_text == "text of medium.pdf"
+        assert not os.listdir(tmp_path)
+    finally:
+        if texts._executor is not None:
+            texts._executor.shutdown(cancel_futures=True)
+        for storage in storages.values():
+            db.delete(storage)
+        db.commit()
+
+
+def test_documents_are_extracted_in_the_pool(db, tmp_path):
+    texts = DocumentTexts(max_workers=2)
+    paths = {
+        "cv.pdf": write_pdf(tmp_path / "cv.pdf", ["Data Scientist", "python sql"]),
+        "broken.pdf": tmp_path / "broken.pdf",
+        "letter.docx": tmp_path / "letter.docx",
+        "photo.png": tmp_path / "photo.png",
+    }
+    paths["broken.pdf"].write_bytes(b"%PDF-1.4 tronque")
+    letter = Document()
+    letter.add_paragraph("Lettre de motivation")
+    letter.save(paths["letter.docx"])
+    paths["photo.png"].write_bytes(b"\x89PNG")
+
+    storages = {name: models.Storage(uuid=str(uuid.uuid4()), file_name=name) for name in paths}
+    db.add_all(storages.values())
+    db.commit()
+    try:
+        for name, path in paths.items():
+            texts.submit(db, storages[name], str(path))
+        # Format sans texte : rien n'est envoyé au pool
+        assert storages["photo.png"].text_status == TextStatusEnum.UNSUPPORTED
+
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            db.expire_all()
+            if all(storage.text_status != TextStatusEnum.PENDING for storage in storages.values()):
+                break
+            time.sleep(0.2)
+
+        assert storages["cv.pdf"].text_status == TextStatusEnum.EXTRACTED
+        assert storages["cv.pdf"].extracted_text.startswith("Data Scientist") and "python sql" in storages["cv.pdf"].extracted_text
+        assert (storages["letter.docx"].text_status, storages["letter.docx"].extracted_text) == (TextStatusEnum.EXTRACTED, "Lettre de motivation")
+        assert (storages["broken.pdf"].text_status, storages["broken.pdf"].extracted_text) == (TextStatusEnum.FAILED, None)
+        # Les fichiers temporaires sont supprimés après extraction
+        assert not os.listdir(tmp_path)
+    finally:
+        if texts._executor is not None:
+            texts._executor.shutdown()
+        for storage in storages.values():
+            db.delete(storage)
+        db.commit()
@@ -0,0 +1,34 @@
+import numpy as np
+
+from app.main.analysis.benchmarks import legacy_transform_for_model, synthetic_candidates
+from app.main.analysis.features import build_feature_matrix, employment_type_matches
+
+
+def test_matrix_matches_legacy_builder():
+    candidate_data = synthetic_candidates(500, seed=3)
+    for employment_type in ("CDI", "cdd", "Freelance", ""):
+        job_offer_data = {"salary": 350000.0, "employment_type": employment_type}
+        np.testing.assert_array_equal(build_feature_matrix(candidate_data, job_offer_data), legacy_transform_for_model(candidate_data, job_offer_data))
+
+
+def test_missing_employment_type_is_an_empty_string():
+    # Type absent : même matrice que le type vide de l'implémentation de référence
+    candidate_data = synthetic_candidates(50, seed=4) + [
+        {"experience": ["Nonetheless Consultant"], "years_of_experience": 2, "job_title": "Consultant"},
+        {"experience": [], "years_of_experience": 0, "job_title": "Consultant"},
+    ]
+    X = build_feature_matrix(candidate_data, {"salary": 350000.0, "employment_type": None})
+    np.testing.assert_array_equal(X, legacy_transform_for_model(candidate_data, {"salary": 350000.0, "employment_type": ""}))
+
+
+def test_missing_values_per_candidate():
+    candidate_data = [
+        {"experience": ["Développeur CDI", None]},
+        {"experience": [None]},
+        {"experience": ["None of the above"]},
+        {"experience": ["Stage"]},
+    ]
+    matches = employment_type_matches(candidate_data, ["cdi", "none", None, None])
+    assert matches.tolist() == [True, False, True, True]
+    assert employment_type_matches(candidate_data, None).tolist() == [True, True, True, True]
+    assert employment_type_matches(candidate_data, "none").tolist() == [False, False, True, False]
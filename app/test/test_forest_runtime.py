@@ -0,0 +1,39 @@
+import os
+import pickle
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from app.main.analysis.forest_runtime import FlatForest
+from app.main.analysis.model_registry import FLAT_BACKEND, ModelRegistry
+
+
+def train_forest():
+    rng = np.random.default_rng(0)
+    X = np.zeros((200, 6))
+    # Seule la première colonne varie : les dernières ne sont utilisées par aucun nœud
+    X[:, 0] = rng.random(200)
+    y = np.where(X[:, 0] > 0.5, 1, 2)
+    return RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y), X
+
+
+def test_flat_forest_matches_sklearn():
+    forest, X = train_forest()
+    flat = FlatForest.from_sklearn(forest)
+    np.testing.assert_array_equal(flat.predict_proba(X), forest.predict_proba(X))
+    assert flat.n_features_in_ == forest.n_features_in_ == 6
+
+
+def test_flat_export_keeps_training_feature_count(tmp_path):
+    forest, X = train_forest()
+    with open(os.path.join(tmp_path, "v1.pkl"), "wb") as f:
+        pickle.dump(forest, f)
+    registry = ModelRegistry(str(tmp_path), backend=FLAT_BACKEND)
+
+    loaded = registry.activate("v1").model
+    assert loaded.n_features_in_ == 6
+    np.testing.assert_array_equal(loaded.predict(X), forest.predict(X))
+
+    # Export antérieur, sans le nombre de colonnes : il est complété au chargement
+    os.remove(os.path.join(tmp_path, "v1.forest", "n_features_in_.npy"))
+    assert ModelRegistry(str(tmp_path), backend=FLAT_BACKEND).get().model.n_features_in_ == 6
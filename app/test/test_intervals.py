@@ -0,0 +1,56 @@
+import random
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.main.analysis.intervals import DAY, experience_days, merge_intervals, parse_dates, total_experience_days
+
+
+def covered_days(intervals) -> int:
+    """Référence naïve : jours couverts par l'union des intervalles [début, fin)."""
+    days = set()
+    for start, end in intervals:
+        days.update(start + timedelta(days=i) for i in range((end - start).days))
+    return len(days)
+
+
+def test_merge_overlapping_and_touching_intervals_per_owner():
+    owners = np.array([1, 0, 0, 0, 1])
+    starts = np.array(["2020-01-01", "2015-01-01", "2016-01-01", "2019-01-01", "2010-01-01"], dtype=DAY)
+    ends = np.array(["2021-01-01", "2017-01-01", "2019-01-01", "2019-06-01", "2011-01-01"], dtype=DAY)
+    merged_owners, merged_starts, merged_ends = merge_intervals(owners, starts, ends)
+    assert merged_owners.tolist() == [0, 1, 1]
+    assert merged_starts.astype(str).tolist() == ["2015-01-01", "2010-01-01", "2020-01-01"]
+    assert merged_ends.astype(str).tolist() == ["2019-06-01", "2011-01-01", "2021-01-01"]
+
+
+def test_total_experience_days_matches_naive_union():
+    rng = random.Random(3)
+    today = date(2024, 6, 1)
+    closed, ongoing, expected = [], [], []
+    for _ in range(50):
+        intervals = []
+        for _ in range(rng.randint(0, 4)):
+            start = date(2005, 1, 1) + timedelta(days=rng.randint(0, 6000))
+            intervals.append((start, start + timedelta(days=rng.randint(0, 1500))))
+        starts = [date(2015, 1, 1) + timedelta(days=rng.randint(0, 3000)) for _ in range(rng.randint(0, 2))]
+        closed.append([(start.isoformat(), end.isoformat()) for start, end in intervals])
+        ongoing.append([start.isoformat() for start in starts])
+        expected.append(covered_days(intervals + [(start, today) for start in starts]))
+    assert total_experience_days(closed, ongoing, today).tolist() == expected
+
+
+def test_experience_days_skips_invalid_and_counts_present():
+    today = date(2024, 1, 1)
+    days = experience_days(
+        owners=[0, 0, 0, 1, 1],
+        start_dates=["2020-01-01", "2021-01-01", "not a date", "2023-01-01", "2022-01-01"],
+        end_dates=["2022-01-01", "Present", "2023-01-01", None, "2021-01-01"],
+        n_owners=3,
+        today=today,
+    )
+    assert days.tolist() == [(today - date(2020, 1, 1)).days, (today - date(2023, 1, 1)).days, 0]
+
+
+def test_parse_dates_falls_back_per_value():
+    assert parse_dates(["2020-01-02", "", None, "02/01/2020"]).astype(str).tolist() == ["2020-01-02", "NaT", "NaT", "NaT"]
@@ -0,0 +1,80 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.tree import DecisionTreeClassifier
+
+from app.main.analysis.model_registry import ACTIVE_POINTER, LEGACY_VERSION, ModelNotFound, ModelRegistry, model_registry
+from app.main.core.config import Config
+from app.main.core.i18n import __
+
+
+def write_version(models_dir, version):
+    model = DecisionTreeClassifier().fit(np.array([[0], [1]]), np.array([1, 2]))
+    with open(os.path.join(models_dir, f"{version}.pkl"), "wb") as f:
+        pickle.dump(model, f)
+
+
+def point_to(models_dir, version, mtime):
+    """Réécrit le pointeur ACTIVE comme le ferait un autre worker."""
+    pointer = os.path.join(models_dir, ACTIVE_POINTER)
+    with open(pointer, "w") as f:
+        f.write(version)
+    os.utime(pointer, (mtime, mtime))
+
+
+def test_get_follows_pointer_written_by_another_process(tmp_path):
+    write_version(tmp_path, "v1")
+    write_version(tmp_path, "v2")
+    point_to(tmp_path, "v1", 1_000_000)
+    registry = ModelRegistry(str(tmp_path), sync_interval=0)
+    assert registry.get().version == "v1"
+
+    point_to(tmp_path, "v2", 2_000_000)
+    assert registry.get().version == "v2"
+
+
+def test_pointer_checks_are_throttled(tmp_path):
+    write_version(tmp_path, "v1")
+    write_version(tmp_path, "v2")
+    point_to(tmp_path, "v1", 1_000_000)
+    registry = ModelRegistry(str(tmp_path), sync_interval=3600)
+    assert registry.get().version == "v1"
+
+    point_to(tmp_path, "v2", 2_000_000)
+    assert registry.get().version == "v1"
+    registry._next_sync = 0
+    assert registry.get().version == "v2"
+
+
+def test_without_pointer_the_legacy_model_is_served(tmp_path):
+    legacy_path = tmp_path / "ml_model.pkl"
+    write_version(tmp_path, "ml_model")
+    models_dir = tmp_path / "artifacts"
+    models_dir.mkdir()
+    write_version(models_dir, "v2")
+    registry = ModelRegistry(str(models_dir), str(legacy_path), sync_interval=0)
+    assert registry.get().version == LEGACY_VERSION
+
+    registry.activate("v2")
+    assert registry.get().version == "v2"
+
+
+def test_without_pointer_nor_legacy_model_nothing_is_served(tmp_path):
+    write_version(tmp_path, "v1")
+    registry = ModelRegistry(str(tmp_path))
+    assert registry.active_version() is None
+    with pytest.raises(ModelNotFound):
+        registry.get()
+    assert registry.warm_up() == {}
+
+
+def test_missing_model_is_a_server_error(client, seed_offer, monkeypatch, tmp_path):
+    offer = seed_offer(2, seed=91)
+    monkeypatch.setattr(model_registry, "models_dir", str(tmp_path))
+    monkeypatch.setattr(model_registry, "legacy_path", None)
+    monkeypatch.setattr(model_registry, "_active", None)
+    response = client.get(f"{Config.API_V1_STR}/analyse/applications/{offer.uuid}/candidates_status")
+    assert response.status_code == 500
+    assert response.json() == {"detail": __(key="ml-model-not-found")}
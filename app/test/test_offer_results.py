@@ -0,0 +1,120 @@
+import uuid
+
+import pytest
+
+from app.main import models
+from app.main.analysis import scoring
+from app.main.analysis.offer_results import offer_results
+from app.main.controllers import analyse_controller
+from app.main.controllers.analyse_controller import get_scored_candidates
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Nombre de chargements complets des candidatures d'une offre (résultats non servis par le cache)."""
+    calls = []
+    load_offer_applications = analyse_controller.load_offer_applications
+
+    def counting_load(db, job_offer_uuid):
+        calls.append(job_offer_uuid)
+        return load_offer_applications(db, job_offer_uuid)
+
+    monkeypatch.setattr(analyse_controller, "load_offer_applications", counting_load)
+    return calls
+
+
+def add_application(db, offer, candidate) -> models.Application:
+    application = models.Application(uuid=str(uuid.uuid4()), candidate_uuid=candidate.uuid, job_offer_uuid=offer.uuid)
+    db.add(application)
+    db.commit()
+    return application
+
+
+def developer(make_candidate, since: int) -> models.Candidat:
+    return make_candidate(experiences=[{"job_title": "Développeur CDI", "description": "python api", "start_date": f"{since}-01-15"}])
+
+
+def statuses(candidate_data) -> dict:
+    return {candidate["application_uuid"]: candidate["application_status"] for candidate in candidate_data}
+
+
+def test_cached_results_are_updated_in_place(db, make_candidate, make_offer, loads, monkeypatch):
+    offer = make_offer([developer(make_candidate, year) for year in range(2010, 2016)])
+    candidate_data, _ = get_scored_candidates(offer.uuid, db)
+    get_scored_candidates(offer.uuid, db)
+    assert loads == [offer.uuid]
+
+    # Nouvelle candidature notée seule par ce worker, puis ajoutée à l'entrée
+    predicted_rows = []
+    predict_proba = scoring.inference.predict_proba
+
+    def counting_predict_proba(X, loaded_model=None):
+        predicted_rows.append(len(X))
+        return predict_proba(X, loaded_model)
+
+    monkeypatch.setattr(scoring.inference, "predict_proba", counting_predict_proba)
+    application = add_application(db, offer, developer(make_candidate, 2020))
+    scoring.score_application(db, application.uuid)
+    assert predicted_rows == [1]
+    cached, _ = get_scored_candidates(offer.uuid, db)
+    assert application.uuid in statuses(cached) and len(cached) == len(candidate_data) + 1
+    assert sum(offer_results.counts(offer.uuid).values()) == sum(candidate["status"] is not None for candidate in cached)
+
+    # Changement de statut puis suppression
+    application.status = models.ApplicationStatusEnum.ACCEPTED
+    db.commit()
+    scoring.application_updated(db, application)
+    assert statuses(get_scored_candidates(offer.uuid, db)[0])[application.uuid] == models.ApplicationStatusEnum.ACCEPTED
+    application.is_deleted = True
+    db.commit()
+    scoring.application_deleted(db, application)
+    cached, _ = get_scored_candidates(offer.uuid, db)
+    assert application.uuid not in statuses(cached) and len(cached) == len(candidate_data)
+    assert loads == [offer.uuid]
+    assert predicted_rows == [1]
+
+
+def test_writes_from_another_worker_invalidate_the_entry(db, make_candidate, make_offer, loads):
+    offer = make_offer([developer(make_candidate, year) for year in range(2012, 2016)])
+    get_scored_candidates(offer.uuid, db)
+
+    # Candidature écrite sans passer par ce worker : la version des données change
+    application = add_application(db, offer, developer(make_candidate, 2018))
+    cached, _ = get_scored_candidates(offer.uuid, db)
+    assert application.uuid in statuses(cached)
+    assert loads == [offer.uuid, offer.uuid]
+
+
+def test_entry_of_another_model_version_is_not_served(db, make_candidate, make_offer, loads):
+    offer = make_offer([developer(make_candidate, year) for year in range(2013, 2016)])
+    _, model_version = get_scored_candidates(offer.uuid, db)
+    assert offer_results.get(offer.uuid, "another-version", analyse_controller.data_version(db, offer.uuid, model_version)) is None
+    offer_results.apply(db, offer.uuid, "another-version", candidates=[])
+    assert offer_results.counts(offer.uuid) is None
+
+
+def test_scores_of_changed_features_are_refreshed_on_read(db, make_candidate, make_offer):
+    candidate = developer(make_candidate, 2022)
+    offer = make_offer([candidate, developer(make_candidate, 2015)])
+    get_scored_candidates(offer.uuid, db)
+    application = db.query(models.Application).filter(models.Application.candidate_uuid == candidate.uuid).one()
+    score = db.query(models.ApplicationScore).filter(models.ApplicationScore.application_uuid == application.uuid).one()
+    feature_hash = score.feature_hash
+
+    # Dix ans d'expérience ajoutés : caractéristiques modifiées sans nouvelle notation
+    db.add(models.Experience(
+        uuid=str(uuid.uuid4()),
+        job_title="Développeur CDI",
+        company_name="company",
+        start_date="1990-01-15",
+        end_date="2000-01-15",
+        description="python api backend",
+        candidate_uuid=candidate.uuid,
+    ))
+    db.commit()
+
+    cached, _ = get_scored_candidates(offer.uuid, db)
+    db.refresh(score)
+    assert score.feature_hash != feature_hash
+    cached_candidate = next(cached_candidate for cached_candidate in cached if cached_candidate["application_uuid"] == application.uuid)
+    assert cached_candidate["probabilities"] == score.probabilities
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from app.main.analysis.llm import ProfileAnalysisService, ProfileInput, StubProvider
+from app.main.analysis.openai_utils import analyze_candidate_profile
+
+
+class MemoryCache:
+    def __init__(self):
+        self.responses = {}
+
+    def get_many(self, keys):
+        return {key: self.responses[key] for key in keys if key in self.responses}
+
+    def set_many(self, responses, namespace, ttl):
+        self.responses.update(responses)
+
+
+class CountingProvider(StubProvider):
+    def __init__(self):
+        super().__init__(latency_ms=10)
+        self.running = self.max_running = self.calls = 0
+
+    async def complete(self, prompt):
+        self.calls += 1
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            return await super().complete(prompt)
+        finally:
+            self.running -= 1
+
+
+def profiles(n):
+    return [ProfileInput(f"cv {i}", "experience", "lettre", "offre") for i in range(n)]
+
+
+def test_service_can_be_used_from_several_event_loops():
+    provider = CountingProvider()
+    service = ProfileAnalysisService(provider, MemoryCache(), max_concurrency=2)
+
+    # Chaque asyncio.run crée une nouvelle boucle : le sémaphore ne doit pas rester lié à la première
+    first = asyncio.run(service.analyze_many(profiles(6)))
+    second = asyncio.run(service.analyze_many(profiles(12)))
+
+    assert provider.calls == 12
+    assert provider.max_running == 2
+    assert [result.analysis for result in second[:6]] == [result.analysis for result in first]
+    assert all(result.cached for result in second[:6]) and not any(result.cached for result in second[6:])
+
+
+def test_sync_wrapper_refuses_running_loop():
+    async def call():
+        analyze_candidate_profile("cv", "experience", "lettre", "offre")
+
+    with pytest.raises(RuntimeError, match="await profile_analysis.analyze"):
+        asyncio.run(call())
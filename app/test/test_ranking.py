@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+from app.main.analysis.pipeline import decode_cursor, encode_cursor, rank_page
+from app.main.core.config import Config
+
+
+def candidates(n, seed=0):
+    rng = random.Random(seed)
+    # Scores arrondis : beaucoup d'égalités, départagées par l'uuid de candidature
+    return [{"application_uuid": f"app-{rng.random():.6f}-{i}", "score": round(rng.random(), 1)} for i in range(n)]
+
+
+def full_order(candidate_data):
+    return sorted(candidate_data, key=lambda candidate: (-candidate["score"], candidate["application_uuid"]))
+
+
+def test_pages_follow_the_ranking_order():
+    candidate_data = candidates(53)
+    pages, cursor = [], None
+    while True:
+        page, cursor = rank_page(candidate_data, 10, cursor)
+        pages.append(page)
+        if cursor is None:
+            break
+    assert [len(page) for page in pages] == [10, 10, 10, 10, 10, 3]
+    assert [candidate for page in pages for candidate in page] == full_order(candidate_data)
+
+
+def test_cursor_is_a_position_not_a_rank():
+    candidate_data = candidates(30, seed=1)
+    first, cursor = rank_page(candidate_data, 10)
+    # Des candidats notés entre deux appels, au-dessus et en dessous de la position du curseur
+    newcomers = [{"application_uuid": "new-top", "score": 2.0}, {"application_uuid": "new-bottom", "score": -1.0}]
+    second, _ = rank_page(candidate_data + newcomers, 10, cursor)
+    assert not {candidate["application_uuid"] for candidate in first} & {candidate["application_uuid"] for candidate in second}
+    assert second == full_order(candidate_data)[10:20]
+    assert decode_cursor(cursor) == (first[-1]["score"], first[-1]["application_uuid"])
+    assert decode_cursor(encode_cursor(first[-1])) == decode_cursor(cursor)
+
+
+def test_last_page_has_no_cursor():
+    page, cursor = rank_page(candidates(5), 5)
+    assert len(page) == 5 and cursor is None
+    assert rank_page([], 5) == ([], None)
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", "bm90IGpzb24=", encode_cursor({"score": 0.5, "application_uuid": "a"})[:-4]])
+def test_invalid_cursor(cursor, client, make_candidate, make_offer):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+    offer = make_offer([make_candidate(experiences=[{"job_title": "Développeur CDI"}])])
+    response = client.get(f"{Config.API_V1_STR}/analyse/applications/{offer.uuid}/candidates_status", params={"cursor": cursor})
+    assert response.status_code == 400
+
+
+def test_candidates_status_pages(client, make_candidate, make_offer):
+    # Expériences de longueurs variées : les probabilités d'acceptation diffèrent d'un candidat à l'autre
+    offer = make_offer([
+        make_candidate(experiences=[{"job_title": title, "start_date": f"{2023 - i}-03-01"}])
+        for i, title in enumerate(["Développeur CDI", "Stage", "Data Scientist"] * 4)
+    ])
+    url = f"{Config.API_V1_STR}/analyse/applications/{offer.uuid}/candidates_status"
+    everyone = client.get(url, params={"limit": 500}).json()
+    assert everyone["next_cursor"] is None
+    assert sum(everyone["counts"].values()) == len(everyone["candidates"]) > 0
+    assert everyone["candidates"] == full_order(everyone["candidates"])
+
+    seen, cursor = [], None
+    while True:
+        body = client.get(url, params={"limit": 5, **({"cursor": cursor} if cursor else {})}).json()
+        seen += body["candidates"]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert [candidate["application_uuid"] for candidate in seen] == [candidate["application_uuid"] for candidate in everyone["candidates"]]
+
+    for status, count in everyone["counts"].items():
+        filtered = client.get(url, params={"status": status, "limit": 500}).json()["candidates"]
+        assert len(filtered) == count
+        assert filtered == [candidate for candidate in everyone["candidates"] if candidate["status"] == status]
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+
+from app.main import crud, models, schemas
+from app.main.analysis.matching import recommend_offers, text_index_sync
+
+
+FUTURE = datetime.now() + timedelta(days=30)
+
+
+def test_recommend_active_unexpired_offers(db, make_candidate, make_offer, fresh_text_index):
+    candidate = make_candidate(experiences=[{"job_title": "Pâtissier", "description": "croissant brioche viennoiserie"}])
+    exact = make_offer(title="Pâtissier", description="croissant brioche viennoiserie", requirements="", expiration_date=FUTURE)
+    close = make_offer(title="Boulanger", description="brioche", requirements="", expiration_date=FUTURE)
+    make_offer(title="Pâtissier", description="viennoiserie", requirements="", expiration_date=datetime.now() - timedelta(days=1))
+    closed = make_offer(title="Pâtissier", description="croissant", requirements="", expiration_date=FUTURE)
+    crud.offers.update_status(db, closed.uuid, models.JobStatus.closed)
+
+    recommended = recommend_offers(db, candidate, limit=10)
+    assert [job_offer.uuid for job_offer, _ in recommended] == [exact.uuid, close.uuid]
+    assert recommended[0][1] > recommended[1][1] > 0
+    assert [job_offer.uuid for job_offer, _ in recommend_offers(db, candidate, limit=1)] == [exact.uuid]
+
+
+def test_diplomas_are_matched(db, make_candidate, make_offer, fresh_text_index):
+    candidate = make_candidate(diplomas=["CAP Cuisine"])
+    offer = make_offer(title="Commis", description="cuisine collective", requirements="", expiration_date=FUTURE)
+    assert [job_offer.uuid for job_offer, _ in recommend_offers(db, candidate, limit=10)] == [offer.uuid]
+
+
+def test_offer_writes_refresh_the_index_without_a_scan(db, make_candidate, make_offer, fresh_text_index, monkeypatch):
+    candidate = make_candidate(experiences=[{"job_title": "Fromager", "description": "affinage comté"}])
+    offer = make_offer(title="Vendeur", description="caisse", requirements="", expiration_date=FUTURE)
+    assert recommend_offers(db, candidate, limit=10) == []
+
+    # Plus de synchronisation avec la base : seuls les appels à CRUDJobOffers mettent l'index à jour
+    monkeypatch.setattr(text_index_sync, "min_interval", 3600)
+    crud.offers.update(db, schemas.JobOffersUpdate(uuid=offer.uuid, title="Fromager", description="affinage comté"))
+    assert [job_offer.uuid for job_offer, _ in recommend_offers(db, candidate, limit=10)] == [offer.uuid]
+
+    crud.offers.delete(db, schemas.JobOffersDelete(uuid=offer.uuid))
+    assert recommend_offers(db, candidate, limit=10) == []
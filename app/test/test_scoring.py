@@ -0,0 +1,31 @@
+import uuid
+
+from app.main import models
+from app.main.analysis.scoring import commit_scores
+from app.main.controllers.analyse_controller import get_scored_candidates
+
+
+def test_commit_scores_reads_scores_written_concurrently(db, seed_offer):
+    offer = seed_offer(2, seed=7)
+    get_scored_candidates(offer.uuid, db)
+    stored = db.query(models.ApplicationScore).filter(models.ApplicationScore.job_offer_uuid == offer.uuid).all()
+    assert len(stored) == 2
+
+    attempts = []
+
+    def score():
+        attempts.append(len(attempts) + 1)
+        if len(attempts) == 1:
+            # Score de la même candidature pour la même version, déjà enregistré par une autre requête
+            db.add(models.ApplicationScore(
+                uuid=str(uuid.uuid4()),
+                application_uuid=stored[0].application_uuid,
+                job_offer_uuid=offer.uuid,
+                candidate_uuid=stored[0].candidate_uuid,
+                model_version=stored[0].model_version,
+                feature_hash="0" * 40,
+            ))
+        return attempts[-1]
+
+    assert commit_scores(db, score) == (2, False)
+    assert db.query(models.ApplicationScore).filter(models.ApplicationScore.job_offer_uuid == offer.uuid).count() == 2
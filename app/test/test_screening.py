@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+from app.main import models
+from app.main.analysis.features import normalize_title
+from app.main.analysis.rules import DEFAULT_CRITERIA, ScreeningCriteria, offer_criteria, screen_candidates
+from app.main.analysis.services import analyze_candidates
+
+
+def meets_criteria(candidate, job_offer) -> bool:
+    """Règle retirée de analysis.services, gardée comme référence."""
+    if candidate.experiences and len(candidate.experiences) >= 2:
+        return True
+    return False
+
+
+def legacy_analysis(db, job_offer_uuid):
+    job_offer = db.query(models.JobOffer).filter(models.JobOffer.uuid == job_offer_uuid).first()
+    candidates = (
+        db.query(models.Candidat)
+        .join(models.Application, models.Application.candidate_uuid == models.Candidat.uuid)
+        .filter(models.Application.job_offer_uuid == job_offer_uuid)
+        .all()
+    )
+    selected = {candidate.uuid for candidate in candidates if meets_criteria(candidate, job_offer)}
+    return selected, {candidate.uuid for candidate in candidates} - selected
+
+
+def uuids(candidates):
+    return {candidate.uuid for candidate in candidates}
+
+
+def test_default_criteria_match_legacy_rule(db, seed_offer):
+    offer = seed_offer(30, seed=11)
+    selected, rejected = screen_candidates(db, offer.uuid, DEFAULT_CRITERIA)
+    assert (uuids(selected), uuids(rejected)) == legacy_analysis(db, offer.uuid)
+
+
+def test_offer_criteria_narrow_legacy_selection(db, seed_offer):
+    offer = seed_offer(30, seed=12, title="Développeur Python Senior", requirements="Licence en informatique, 2 ans d'expérience")
+    legacy_selected, _ = legacy_analysis(db, offer.uuid)
+
+    result = analyze_candidates(db, offer.uuid)
+    assert result["criteria"] == DEFAULT_CRITERIA._replace(min_years_of_experience=2, min_diploma_level=3, title_keywords=("developpeur", "python"))
+    assert result["selected"] and uuids(result["selected"]) < legacy_selected
+    assert uuids(result["selected"]) | uuids(result["rejected"]) == legacy_selected | legacy_analysis(db, offer.uuid)[1]
+    for candidate in result["selected"]:
+        titles = [normalize_title(experience.job_title) for experience in candidate.experiences]
+        assert any("developpeur" in title.split() or "python" in title.split() for title in titles)
+        assert any(diploma.degree_name in ("Master", "Licence") for diploma in candidate.diplomas)
+
+
+def test_offer_criteria_read_requirements():
+    job_offer = SimpleNamespace(title="Data Scientist (H/F)", requirements="Bac+5, 3 ans d'expérience", description="5+ years of experience")
+    assert offer_criteria(job_offer) == ScreeningCriteria(2, 5, 5, ("data", "scientist"))
+    assert offer_criteria(SimpleNamespace(title="Stage", requirements=None, description="")) == DEFAULT_CRITERIA
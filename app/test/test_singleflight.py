@@ -0,0 +1,69 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.main.analysis.singleflight import SingleFlight
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def run_concurrently(flight, key, compute, n):
+    """Lance n appels de même clé ; le calcul du premier n'aboutit qu'une fois les n-1 autres en attente."""
+    release = threading.Event()
+
+    def blocking_compute():
+        release.wait(5)
+        return compute()
+
+    with ThreadPoolExecutor(n) as pool:
+        futures = [pool.submit(flight.do, key, blocking_compute)]
+        wait_for(lambda: flight.metrics()["in_flight"] == 1)
+        futures += [pool.submit(flight.do, key, blocking_compute) for _ in range(n - 1)]
+        wait_for(lambda: flight.metrics()["coalesced"] >= n - 1)
+        release.set()
+        return [future.exception() or future.result() for future in futures]
+
+
+def test_concurrent_calls_share_one_computation():
+    flight = SingleFlight()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return object()
+
+    results = run_concurrently(flight, "offer", compute, 8)
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.metrics() == {"computed": 1, "coalesced": 7, "errors": 0, "in_flight": 0}
+
+    # La clé est libérée : un appel ultérieur recalcule
+    flight.do("offer", compute)
+    assert len(calls) == 2
+
+
+def test_error_is_raised_to_every_waiting_caller():
+    flight = SingleFlight()
+
+    def compute():
+        raise ValueError("scoring failed")
+
+    errors = run_concurrently(flight, "offer", compute, 4)
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert flight.metrics()["errors"] == 1
+    with pytest.raises(ValueError):
+        flight.do("offer", compute)
+    assert flight.metrics()["in_flight"] == 0
+
+
+def test_different_keys_are_not_coalesced():
+    flight = SingleFlight()
+    assert [flight.do(key, lambda key=key: key * 2) for key in (1, 2, 1)] == [2, 4, 2]
+    assert flight.metrics()["computed"] == 3
@@ -0,0 +1,21 @@
+from app.main.analysis.matching import source_candidates
+
+
+def test_source_candidates_across_the_pool(db, make_candidate, make_offer, fresh_text_index):
+    pastry_chef = make_candidate(experiences=[{"job_title": "Pâtissier", "description": "croissant brioche viennoiserie"}])
+    baker = make_candidate(experiences=[{"job_title": "Boulanger", "description": "pain brioche"}])
+    developer = make_candidate(experiences=[{"job_title": "Développeur", "description": "python api"}])
+    # Candidat ayant postulé à une autre offre : il fait partie du vivier comme les autres
+    make_offer(applicants=[baker])
+    offer = make_offer(title="Pâtissier", description="viennoiserie et croissant", requirements="brioche")
+
+    sourced = source_candidates(db, offer, limit=5)
+    # Le développeur ne partage aucun terme avec l'offre : écarté par l'index avant la notation
+    assert [candidate["candidate_uuid"] for candidate in sourced] == [pastry_chef.uuid, baker.uuid]
+    assert sourced[0]["score"] > sourced[1]["score"] > 0
+    assert developer.uuid not in {candidate["candidate_uuid"] for candidate in source_candidates(db, offer, limit=100)}
+    assert [candidate["candidate_uuid"] for candidate in source_candidates(db, offer, limit=1)] == [pastry_chef.uuid]
+
+    pastry_chef.is_deleted = True
+    db.commit()
+    assert [candidate["candidate_uuid"] for candidate in source_candidates(db, offer, limit=1)] == [baker.uuid]
@@ -0,0 +1,102 @@
+import hashlib
+import os
+import uuid
+
+import pytest
+from alembic import command
+from alembic.config import Config as AlembicConfig
+from sqlalchemy import create_engine, inspect, text
+
+from app.main import models
+from app.main.crud.storage_crud import add_file_reference, get_dedup_stats, release_file, store_file
+from app.main.schemas.file import StorageCreate
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MERGE_REVISION = "b7e4c2d91a30"
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+@pytest.fixture
+def storages(db):
+    created = []
+    yield created
+    db.rollback()
+    db.query(models.Storage).filter(models.Storage.uuid.in_(created)).delete(synchronize_session=False)
+    db.commit()
+
+
+def test_references_are_counted_and_released(db, storages):
+    db_file = store_file(db, StorageCreate(uuid=str(uuid.uuid4()), file_name="cv.pdf", url="url", size=1000, content_hash=content_hash(b"cv")))
+    storages.append(db_file.uuid)
+    before = get_dedup_stats(db)
+
+    add_file_reference(db, db_file)
+    add_file_reference(db, db_file)
+    assert db_file.reference_count == 3
+    stats = get_dedup_stats(db)
+    assert (stats.files, stats.references - before.references, stats.saved_bytes - before.saved_bytes) == (before.files, 2, 2000)
+
+    assert release_file(db, db_file) is False
+    db.refresh(db_file)
+    assert release_file(db, db_file) is False
+    db.refresh(db_file)
+    assert db_file.reference_count == 1
+    assert release_file(db, db_file) is True
+    assert db.query(models.Storage).filter(models.Storage.uuid == db_file.uuid).count() == 0
+
+
+def alembic(engine, command, revision: str):
+    """Applique les migrations d'alembic.ini (commande upgrade ou downgrade) à une autre base que celle de l'application."""
+    config = AlembicConfig(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+    with engine.begin() as connection:
+        config.attributes.update(connection=connection, configure_logger=False)
+        command(config, revision)
+
+
+# Schéma antérieur à la déduplication : pas de reference_count, empreinte non unique
+LEGACY_SCHEMA = """
+CREATE TABLE storages (uuid VARCHAR PRIMARY KEY, file_name VARCHAR, public_id VARCHAR, content_hash VARCHAR(64), date_added DATETIME);
+CREATE TABLE candidats (uuid VARCHAR PRIMARY KEY, cv_uuid VARCHAR REFERENCES storages (uuid), avatar_uuid VARCHAR REFERENCES storages (uuid));
+CREATE TABLE applications (uuid VARCHAR PRIMARY KEY, cv_uuid VARCHAR REFERENCES storages (uuid), cover_letter_uuid VARCHAR REFERENCES storages (uuid));
+INSERT INTO storages VALUES
+    ('kept', 'cv.pdf', 'p1', 'same', '2024-01-01 00:00:00'),
+    ('second', 'cv.pdf', 'p2', 'same', '2024-01-02 00:00:00'),
+    ('third', 'cv.pdf', 'p3', 'same', '2024-01-03 00:00:00'),
+    ('other', 'letter.pdf', 'p4', 'other', '2024-01-01 00:00:00'),
+    ('no-hash', 'photo.png', 'p5', NULL, '2024-01-01 00:00:00'),
+    ('no-hash-2', 'photo.png', 'p6', NULL, '2024-01-02 00:00:00');
+INSERT INTO candidats VALUES ('candidate', 'third', 'no-hash');
+INSERT INTO applications VALUES ('application', 'second', 'third'), ('letter', NULL, 'other');
+"""
+
+
+def test_migration_merges_duplicates_into_oldest_row(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.sqlite'}")
+    with engine.begin() as connection:
+        for statement in LEGACY_SCHEMA.split(";"):
+            if statement.strip():
+                connection.execute(text(statement))
+
+    for _ in range(2):
+        # Relancée à chaque migration, elle ne fait plus rien une fois les lignes fusionnées
+        alembic(engine, command.upgrade, MERGE_REVISION)
+        with engine.connect() as connection:
+            assert connection.execute(text("SELECT uuid, reference_count FROM storages ORDER BY uuid")).all() == [
+                ("kept", 3), ("no-hash", 1), ("no-hash-2", 1), ("other", 1),
+            ]
+            assert connection.execute(text("SELECT cv_uuid, avatar_uuid FROM candidats")).one() == ("kept", "no-hash")
+            assert connection.execute(text("SELECT uuid, cv_uuid, cover_letter_uuid FROM applications ORDER BY uuid")).all() == [
+                ("application", "kept", "kept"), ("letter", None, "other"),
+            ]
+        alembic(engine, command.downgrade, "base")
+
+
+def test_migration_skips_a_database_without_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'empty.sqlite'}")
+    alembic(engine, command.upgrade, MERGE_REVISION)
+    assert inspect(engine).get_table_names() == ["alembic_version"]
@@ -0,0 +1,103 @@
+import random
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfTransformer
+
+from app.main import models
+from app.main.analysis.matching import rank_applicants
+from app.main.analysis.text_index import TfidfIndex, term_counts, tokenize, top_k
+
+
+WORDS = ["python", "django", "sql", "docker", "react", "comptable", "paie", "audit", "marketing", "seo"]
+
+
+def random_documents(rng, n):
+    return {f"doc{i}": {word: rng.randint(1, 3) for word in rng.sample(WORDS, rng.randint(1, 4))} for i in range(n)}
+
+
+def reference_vectors(documents: dict) -> np.ndarray:
+    """Vecteurs TF-IDF de scikit-learn (IDF lissé, normalisation L2) sur les mêmes comptes."""
+    counts = np.array([[terms.get(word, 0) for word in WORDS] for terms in documents.values()], dtype=np.float64)
+    return TfidfTransformer().fit_transform(counts).toarray()
+
+
+def index_vectors(index: TfidfIndex, documents: dict) -> np.ndarray:
+    vectors = index.vectors(documents).toarray()
+    columns = [index.vocabulary[word] for word in WORDS]
+    # Un mot absent de tous les documents restants a une colonne nulle des deux côtés
+    return vectors[:, columns]
+
+
+def test_tokenize_drops_stop_words_and_numbers():
+    assert tokenize("Développeur Python et SQL, 5 ans d'expérience") == ["developpeur", "python", "sql", "ans", "experience"]
+    assert term_counts(["Python", None, "python django"]) == {"python": 2, "django": 1}
+
+
+def test_vectors_match_scikit_learn_after_updates():
+    rng = random.Random(0)
+    documents = random_documents(rng, 200)
+    index = TfidfIndex()
+    for key, terms in documents.items():
+        index.add(key, terms)
+    for key in rng.sample(sorted(documents), 150):
+        if rng.random() < 0.5:
+            index.remove(key)
+            del documents[key]
+        else:
+            documents[key] = random_documents(rng, 1)["doc0"]
+            index.add(key, documents[key])
+
+    assert len(index) == len(documents)
+    np.testing.assert_allclose(index_vectors(index, documents), reference_vectors(documents), atol=1e-12)
+
+
+def brute_force(index: TfidfIndex, query_key, group=None) -> dict:
+    keys = [key for key in index._rows if key != query_key and (group is None or index._groups[index._rows[key]] == group)]
+    similarities = index.similarities(query_key, keys)
+    return {key: score for key, score in zip(keys, similarities.tolist()) if score > 0}
+
+
+def check_search(index: TfidfIndex, query_key, k: int, group=None, atol=1e-12):
+    expected = brute_force(index, query_key, group)
+    results = index.search(query_key, k, group=group)
+    assert len(results) == min(k, len(expected))
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+    # Chaque résultat est noté comme par le calcul direct, et aucun document écarté ne le dépasse
+    np.testing.assert_allclose(scores, [expected[key] for key, _ in results], atol=atol)
+    assert max(score for key, score in expected.items() if key not in dict(results)) <= scores[-1] + atol
+
+
+def test_search_matches_brute_force():
+    rng = random.Random(1)
+    documents = random_documents(rng, 300)
+    index = TfidfIndex(snapshot_tolerance=0.05)
+    index.add_many((key, terms, i % 2) for i, (key, terms) in enumerate(documents.items()))
+    check_search(index, "doc0", 10)
+    check_search(index, "doc0", 10, group=0)
+
+    # Documents ajoutés après l'instantané, notés à part ; l'instantané garde l'IDF de sa construction
+    index.add_many((f"new{i}", terms, 0) for i, terms in enumerate(random_documents(rng, 10).values()))
+    index.remove("doc2")
+    assert "doc2" not in dict(index.search("doc0", 300))
+    check_search(index, "doc0", 10, atol=0.01)
+    check_search(index, "doc0", 10, group=0, atol=0.01)
+
+
+def test_top_k_is_sorted():
+    scores = np.array([0.1, 0.9, 0.5, 0.7])
+    assert top_k(scores, 3).tolist() == [1, 3, 2]
+    assert top_k(scores, 0).tolist() == []
+
+
+def test_rank_applicants_orders_by_similarity(db, seed_offer, fresh_text_index):
+    offer = seed_offer(12, seed=31, title="Data Scientist", description="data science python", requirements="Master")
+    ranked = rank_applicants(db, offer, limit=5)
+    applicants = db.query(models.Application).filter(models.Application.job_offer_uuid == offer.uuid).count()
+    assert len(ranked) == min(5, applicants)
+    scores = [row["score"] for row in ranked]
+    assert scores == sorted(scores, reverse=True)
+    assert "Data Scientist" in {
+        experience.job_title
+        for experience in db.query(models.Experience).filter(models.Experience.candidate_uuid == ranked[0]["candidate_uuid"])
+    }
@@ -0,0 +1,110 @@
+import json
+import os
+import uuid
+from datetime import datetime
+
+import pytest
+
+from app.main import models
+from app.main.analysis.features import cv_features
+from app.main.analysis.model_registry import ACTIVE_POINTER, ModelRegistry
+from app.main.analysis.training import TRAINING_COLUMNS, build_training_chunk, load_training_set, main, train, training_query
+
+
+APPLICATION_CV = {"experience_months": 50, "diploma_level": 5, "skills": ["python", "sql"]}
+CANDIDATE_CV = {"experience_months": 12, "diploma_level": None, "skills": ["excel"]}
+
+
+@pytest.fixture
+def storages(db):
+    created = []
+    yield created
+    db.rollback()
+    db.query(models.Storage).filter(models.Storage.uuid.in_(created)).delete(synchronize_session=False)
+    db.commit()
+
+
+def add_cv(db, storages, cv_data) -> str:
+    storage = models.Storage(uuid=str(uuid.uuid4()), file_name="cv.pdf", cv_data=cv_data)
+    db.add(storage)
+    storages.append(storage.uuid)
+    return storage.uuid
+
+
+def test_training_rows_carry_cv_columns(db, storages, seed_offer):
+    offer = seed_offer(3, seed=21)
+    applications = db.query(models.Application).filter(models.Application.job_offer_uuid == offer.uuid).order_by(models.Application.uuid).all()
+    # CV de la candidature, CV du candidat à défaut, aucun CV
+    applications[0].cv_uuid = add_cv(db, storages, APPLICATION_CV)
+    applications[0].candidate.cv_uuid = add_cv(db, storages, CANDIDATE_CV)
+    applications[1].candidate.cv_uuid = add_cv(db, storages, CANDIDATE_CV)
+    applications[0].status = models.ApplicationStatusEnum.ACCEPTED
+    db.commit()
+
+    rows = training_query(db).filter(models.Application.job_offer_uuid == offer.uuid).order_by(models.Application.uuid).all()
+    X, y = build_training_chunk(rows)
+    assert X.shape == (3, len(TRAINING_COLUMNS))
+    assert [tuple(row) for row in X[:, 3:].tolist()] == [cv_features(APPLICATION_CV), cv_features(CANDIDATE_CV), cv_features(None)]
+    assert y.tolist() == [1, 2, 2]
+
+
+def test_trained_model_consumes_cv_columns(db, storages, seed_offer):
+    offer = seed_offer(20, seed=22)
+    applications = db.query(models.Application).filter(models.Application.job_offer_uuid == offer.uuid).all()
+    for i, application in enumerate(applications):
+        application.status = models.ApplicationStatusEnum.ACCEPTED if i % 2 else models.ApplicationStatusEnum.REJECTED
+        application.cv_uuid = add_cv(db, storages, APPLICATION_CV if i % 2 else CANDIDATE_CV)
+    db.commit()
+
+    X, y = load_training_set(db, chunk_size=7)
+    assert X.shape == (len(y), len(TRAINING_COLUMNS)) and len(y) >= 20
+    model, metrics = train(X, y, n_estimators=5, n_jobs=1)
+    assert model.n_features_in_ == len(TRAINING_COLUMNS)
+    assert metrics["features"] == list(TRAINING_COLUMNS)
+    assert set(metrics["feature_importances"]) == set(TRAINING_COLUMNS)
+
+
+def test_ongoing_experience_counted_until_application_date():
+    # Même candidat : une période terminée chevauchant une expérience en cours depuis 2018
+    features = ([["2016-01-01", "2018-06-01"]], ["2018-01-01"], ["Développeur CDI"], None)
+    rows = [
+        (status, applied_date, 300000, "CDI", *features)
+        for status, applied_date in (("Rejected", datetime(2020, 1, 1)), ("Accepted", datetime(2023, 1, 2)))
+    ]
+    X, y = build_training_chunk(rows)
+    assert X[:, 0].tolist() == [4, 7]
+    assert X[:, 2].tolist() == [1, 1]
+    assert y.tolist() == [0, 1]
+
+
+def test_synthetic_training_run(tmp_path):
+    models_dir = str(tmp_path / "models")
+    database_url = f"sqlite:///{tmp_path / 'training.sqlite'}"
+    args = ["--database-url", database_url, "--models-dir", models_dir, "--version", "v1", "--n-estimators", "5", "--n-jobs", "1", "--chunk-size", "700"]
+    main(args + ["--synthetic", "3000", "--activate"])
+
+    with open(os.path.join(models_dir, "v1.metrics.json")) as f:
+        metrics = json.load(f)
+    assert (metrics["rows"], metrics["holdout_rows"]) == (3000, 600)
+    assert sum(metrics["class_counts"].values()) == 3000
+    assert metrics["features"] == list(TRAINING_COLUMNS)
+    with open(os.path.join(models_dir, ACTIVE_POINTER)) as f:
+        assert f.read().strip() == "v1"
+
+    # Une version existante n'est jamais écrasée
+    with pytest.raises(ValueError):
+        main(args)
+
+
+def test_artifact_is_inert_until_activated(tmp_path):
+    models_dir = str(tmp_path / "models")
+    database_url = f"sqlite:///{tmp_path / 'training.sqlite'}"
+    args = ["--database-url", database_url, "--models-dir", models_dir, "--n-estimators", "5", "--n-jobs", "1"]
+    main(args + ["--synthetic", "500", "--version", "v1"])
+    assert ModelRegistry(models_dir).active_version() is None
+
+    main(args + ["--version", "v2", "--activate"])
+    main(args + ["--version", "v3"])
+    registry = ModelRegistry(models_dir)
+    assert registry.versions()[-1] == "v3"
+    assert registry.get().version == "v2"
@@ -0,0 +1,52 @@
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.main.core.config import Config
+from app.main.utils.file import UPLOAD_CHUNK_SIZE, file_utils
+
+
+PDF = b"%PDF-1.4\n" + b"x" * (3 * UPLOAD_CHUNK_SIZE)
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "UPLOADED_FILE_DEST", str(tmp_path))
+    return tmp_path
+
+
+def upload(content: bytes, filename: str = "cv.pdf", size=None) -> UploadFile:
+    return UploadFile(io.BytesIO(content), filename=filename, size=size)
+
+
+def test_upload_is_copied_and_hashed(upload_dir):
+    saved = file_utils.save_upload(upload(PDF), max_size=len(PDF))
+    assert (saved.sha256, saved.size, saved.mime_type) == (hashlib.sha256(PDF).hexdigest(), len(PDF), "application/pdf")
+    with open(saved.path, "rb") as f:
+        assert f.read() == PDF
+    assert os.path.dirname(saved.path) == str(upload_dir)
+
+
+@pytest.mark.parametrize("size", [None, len(PDF)])
+def test_too_large_upload_is_rejected_with_413(upload_dir, size):
+    with pytest.raises(HTTPException) as error:
+        file_utils.save_upload(upload(PDF, size=size), max_size=len(PDF) - 1)
+    assert error.value.status_code == 413
+    # Le fichier partiel est supprimé
+    assert not os.listdir(upload_dir)
+
+
+@pytest.mark.parametrize("content, filename", [
+    (PDF, "script.exe"),
+    (b"MZ\x90\x00" + b"\x00" * 100, "cv.pdf"),
+    (b"just some text", "cv.pdf"),
+    (b"", "cv.pdf"),
+])
+def test_invalid_type_or_empty_upload_is_rejected_with_400(upload_dir, content, filename):
+    with pytest.raises(HTTPException) as error:
+        file_utils.save_upload(upload(content, filename))
+    assert error.value.status_code == 400
+    assert not os.listdir(upload_dir)